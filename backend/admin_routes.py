@@ -1,102 +1,41 @@
 # Admin Routes for Multi-vendor Management
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, User, Vendor, Product, Order, OrderItem, AdminAction, UserRole, VendorStatus, OrderStatus
+from flask import Blueprint, request, jsonify, current_app, Response, send_file, stream_with_context
+from models import db, User, Vendor, Product, Order, OrderItem, AdminAction, AdminActionArchive, UserRole, VendorStatus, OrderStatus
 from datetime import datetime, timedelta
-from sqlalchemy import func, desc
+from sqlalchemy import func, desc, update
+from sqlalchemy.exc import IntegrityError
+from cache import cache
+from pagination import encode_cursor, keyset_page, newest_first
+from audit import log_admin_action, log_admin_actions, flush_audit_log
+from auth import admin_required, get_current_user_id, invalidate_identity
+from replicas import replica_reads
+from availability import duplicate_user_error
+from exports import (EXPORT_FORMATS, ORDER_COLUMNS, VENDOR_COLUMNS, COMMISSION_COLUMNS,
+                     parse_date_range, write_rows, order_rows, vendor_rows, commission_rows)
+from platform_stats import get_dashboard_stats, increment, vendor_status_changed
+from serializers import ADMIN_PRODUCT
+import profiling
+from slowlog import slow_queries
 
 admin_bp = Blueprint('admin', __name__)
 
-# Utility function to handle JWT identity
-def get_current_user_id():
-    """Get current user ID from JWT, handling both string and int formats"""
-    user_id = get_jwt_identity()
-    if isinstance(user_id, str):
-        return int(user_id)
-    return user_id
-
-def admin_required(f):
-    """Decorator to require admin access"""
-    from functools import wraps
-    @wraps(f)
-    @jwt_required()
-    def decorated_function(*args, **kwargs):
-        current_user_id = get_current_user_id()
-        user = User.query.get(current_user_id)
-        if not user or user.role != UserRole.ADMIN:
-            return jsonify({'error': 'Admin access required'}), 403
-        return f(*args, **kwargs)
-    return decorated_function
-
 # Dashboard Stats
 @admin_bp.route('/dashboard/stats', methods=['GET'])
+@replica_reads
 @admin_required
 def dashboard_stats():
     try:
         # Get date range (default: last 30 days)
         days = request.args.get('days', 30, type=int)
-        start_date = datetime.utcnow() - timedelta(days=days)
-        
-        # Basic counts
-        total_users = User.query.filter(User.role == UserRole.CUSTOMER).count()
-        total_vendors = Vendor.query.count()
-        pending_vendors = Vendor.query.filter(Vendor.status == VendorStatus.PENDING).count()
-        approved_vendors = Vendor.query.filter(Vendor.status == VendorStatus.APPROVED).count()
-        total_products = Product.query.count()
-        active_products = Product.query.filter(Product.is_active == True).count()
-        
-        # Orders stats
-        total_orders = Order.query.count()
-        recent_orders = Order.query.filter(Order.created_at >= start_date).count()
-        pending_orders = Order.query.filter(Order.status == OrderStatus.PENDING).count()
-        
-        # Revenue stats
-        total_revenue = db.session.query(func.sum(Order.total_amount)).scalar() or 0
-        total_commission = db.session.query(func.sum(Order.commission_amount)).scalar() or 0
-        recent_revenue = db.session.query(func.sum(Order.total_amount)).filter(
-            Order.created_at >= start_date
-        ).scalar() or 0
-        
-        # Low stock products
-        low_stock_products = Product.query.filter(
-            Product.stock <= Product.min_stock,
-            Product.is_active == True
-        ).count()
         
-        # Top performing vendors
-        top_vendors = db.session.query(
-            Vendor.business_name,
-            Vendor.total_sales,
-            func.count(Product.id).label('product_count')
-        ).join(Product).group_by(Vendor.id).order_by(desc(Vendor.total_sales)).limit(5).all()
+        # Counters and rollups are cheap, but dashboards auto-refresh, so keep the payload briefly
+        stats = cache.get_or_set(
+            ('admin_dashboard', days),
+            current_app.config.get('DASHBOARD_CACHE_TTL', 15),
+            lambda: get_dashboard_stats(days)
+        )
         
-        return jsonify({
-            'summary': {
-                'total_users': total_users,
-                'total_vendors': total_vendors,
-                'pending_vendors': pending_vendors,
-                'approved_vendors': approved_vendors,
-                'total_products': total_products,
-                'active_products': active_products,
-                'total_orders': total_orders,
-                'recent_orders': recent_orders,
-                'pending_orders': pending_orders,
-                'low_stock_products': low_stock_products
-            },
-            'revenue': {
-                'total_revenue': total_revenue,
-                'total_commission': total_commission,
-                'recent_revenue': recent_revenue,
-                'commission_rate': 8.0
-            },
-            'top_vendors': [
-                {
-                    'business_name': vendor[0],
-                    'total_sales': vendor[1],
-                    'product_count': vendor[2]
-                } for vendor in top_vendors
-            ]
-        }), 200
+        return jsonify(stats), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -111,7 +50,19 @@ def get_vendors():
         status = request.args.get('status')
         search = request.args.get('search')
         
-        query = Vendor.query
+        # Product counts come from a correlated COUNT over the vendor_id index and the
+        # user columns from the join, so a page is a single query
+        product_count = db.session.query(func.count(Product.id)).filter(
+            Product.vendor_id == Vendor.id
+        ).correlate(Vendor).scalar_subquery()
+        
+        query = db.session.query(
+            Vendor,
+            User.username,
+            User.email,
+            User.phone,
+            product_count.label('product_count')
+        ).join(User, User.id == Vendor.user_id)
         
         if status:
             try:
@@ -125,14 +76,14 @@ def get_vendors():
                 Vendor.business_name.contains(search) |
                 Vendor.business_email.contains(search) |
                 User.username.contains(search)
-            ).join(User)
+            )
         
         vendors = query.order_by(Vendor.created_at.desc()).paginate(
             page=page, per_page=per_page, error_out=False
         )
         
         result = []
-        for vendor in vendors.items:
+        for vendor, username, email, phone, vendor_product_count in vendors.items:
             result.append({
                 'id': vendor.id,
                 'user_id': vendor.user_id,
@@ -144,13 +95,13 @@ def get_vendors():
                 'commission_rate': vendor.commission_rate,
                 'total_sales': vendor.total_sales,
                 'current_balance': vendor.current_balance,
-                'product_count': len(vendor.products),
+                'product_count': vendor_product_count,
                 'created_at': vendor.created_at.isoformat(),
                 'approved_at': vendor.approved_at.isoformat() if vendor.approved_at else None,
                 'user': {
-                    'username': vendor.user.username,
-                    'email': vendor.user.email,
-                    'phone': vendor.user.phone
+                    'username': username,
+                    'email': email,
+                    'phone': phone
                 }
             })
         
@@ -171,7 +122,7 @@ def get_vendors():
 @admin_required
 def approve_vendor(vendor_id):
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = get_current_user_id()
         vendor = Vendor.query.get_or_404(vendor_id)
         
         if vendor.status != VendorStatus.PENDING:
@@ -179,17 +130,17 @@ def approve_vendor(vendor_id):
         
         vendor.status = VendorStatus.APPROVED
         vendor.approved_at = datetime.utcnow()
+        vendor_status_changed(VendorStatus.PENDING, VendorStatus.APPROVED)
+        invalidate_identity(vendor.user_id)
         
         # Log admin action
-        action = AdminAction(
-            admin_id=current_user_id,
-            action_type='vendor_approval',
-            target_id=vendor_id,
-            description=f'Approved vendor: {vendor.business_name}'
+        log_admin_action(
+            current_user_id, 'vendor_approval', vendor_id,
+            f'Approved vendor: {vendor.business_name}'
         )
-        db.session.add(action)
         
         db.session.commit()
+        cache.invalidate('admin_dashboard')
         
         # TODO: Send approval email to vendor
         
@@ -202,7 +153,7 @@ def approve_vendor(vendor_id):
 @admin_required
 def reject_vendor(vendor_id):
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = get_current_user_id()
         vendor = Vendor.query.get_or_404(vendor_id)
         data = request.get_json()
         reason = data.get('reason', 'No reason provided')
@@ -211,17 +162,17 @@ def reject_vendor(vendor_id):
             return jsonify({'error': 'Vendor is not in pending status'}), 400
         
         vendor.status = VendorStatus.REJECTED
+        vendor_status_changed(VendorStatus.PENDING, VendorStatus.REJECTED)
+        invalidate_identity(vendor.user_id)
         
         # Log admin action
-        action = AdminAction(
-            admin_id=current_user_id,
-            action_type='vendor_rejection',
-            target_id=vendor_id,
-            description=f'Rejected vendor: {vendor.business_name}. Reason: {reason}'
+        log_admin_action(
+            current_user_id, 'vendor_rejection', vendor_id,
+            f'Rejected vendor: {vendor.business_name}. Reason: {reason}'
         )
-        db.session.add(action)
         
         db.session.commit()
+        cache.invalidate('admin_dashboard')
         
         # TODO: Send rejection email to vendor
         
@@ -236,7 +187,7 @@ def create_vendor():
     """Create a new vendor account by admin"""
     try:
         data = request.get_json()
-        current_user_id = get_jwt_identity()
+        current_user_id = get_current_user_id()
         
         # Validate required fields
         required_fields = ['username', 'email', 'password', 'business_name']
@@ -244,13 +195,6 @@ def create_vendor():
             if not data.get(field):
                 return jsonify({'error': f'{field} is required'}), 400
         
-        # Check if user exists
-        if User.query.filter_by(email=data['email']).first():
-            return jsonify({'error': 'Email already registered'}), 400
-        
-        if User.query.filter_by(username=data['username']).first():
-            return jsonify({'error': 'Username already taken'}), 400
-        
         # Create new vendor user
         vendor_user = User(
             username=data['username'],
@@ -273,22 +217,19 @@ def create_vendor():
             business_email=data.get('business_email', data['email']),
             business_phone=data.get('business_phone'),
             business_address=data.get('business_address'),
-            category=data.get('category', 'Other'),
             status=VendorStatus.APPROVED,  # Admin-created vendors are auto-approved
             approved_at=datetime.utcnow(),
             commission_rate=8.0  # Default commission rate
         )
         
         db.session.add(vendor)
+        increment(vendors=1, vendors_approved=1)
         
         # Log admin action
-        action = AdminAction(
-            admin_id=current_user_id,
-            action_type='vendor_creation',
-            target_id=None,
-            description=f'Created new vendor: {vendor.business_name} ({vendor_user.email})'
+        log_admin_action(
+            current_user_id, 'vendor_creation', None,
+            f'Created new vendor: {vendor.business_name} ({vendor_user.email})'
         )
-        db.session.add(action)
         
         db.session.commit()
         
@@ -304,6 +245,9 @@ def create_vendor():
             }
         }), 201
         
+    except IntegrityError as e:
+        db.session.rollback()
+        return jsonify({'error': duplicate_user_error(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -312,33 +256,131 @@ def create_vendor():
 @admin_required
 def suspend_vendor(vendor_id):
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = get_current_user_id()
         vendor = Vendor.query.get_or_404(vendor_id)
         data = request.get_json()
         reason = data.get('reason', 'No reason provided')
         
+        old_status = vendor.status
         vendor.status = VendorStatus.SUSPENDED
+        vendor_status_changed(old_status, VendorStatus.SUSPENDED)
+        invalidate_identity(vendor.user_id)
         
-        # Deactivate all vendor products
-        for product in vendor.products:
-            product.is_active = False
+        # Deactivate all vendor products with one UPDATE
+        deactivated = _deactivate_products(Product.vendor_id == vendor_id)
+        increment(products_active=-deactivated)
         
         # Log admin action
-        action = AdminAction(
-            admin_id=current_user_id,
-            action_type='vendor_suspension',
-            target_id=vendor_id,
-            description=f'Suspended vendor: {vendor.business_name}. Reason: {reason}'
+        log_admin_action(
+            current_user_id, 'vendor_suspension', vendor_id,
+            f'Suspended vendor: {vendor.business_name}. Reason: {reason}', critical=True
         )
-        db.session.add(action)
         
         db.session.commit()
+        cache.invalidate('admin_dashboard')
         
         return jsonify({'message': 'Vendor suspended successfully'}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Bulk Moderation
+MAX_BULK_TARGETS = 1000
+
+BULK_VENDOR_ACTIONS = {
+    # action: (new status, statuses it may be applied to, audit action type, audit verb)
+    'approve': (VendorStatus.APPROVED, (VendorStatus.PENDING,), 'vendor_approval', 'Approved'),
+    'reject': (VendorStatus.REJECTED, (VendorStatus.PENDING,), 'vendor_rejection', 'Rejected'),
+    'suspend': (VendorStatus.SUSPENDED, (VendorStatus.PENDING, VendorStatus.APPROVED, VendorStatus.REJECTED),
+                'vendor_suspension', 'Suspended'),
+}
+
+def _deactivate_products(*criteria):
+    """Set-based deactivation of active products matching ``criteria``; returns the row count"""
+    result = db.session.execute(
+        update(Product)
+        .where(Product.is_active == True, *criteria)
+        .values(is_active=False, updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+def _bulk_target_ids(data, key):
+    """Validated, de-duplicated list of integer ids from the request body"""
+    ids = data.get(key)
+    if not isinstance(ids, list) or not ids:
+        raise ValueError(f'{key} must be a non-empty list')
+    if len(ids) > MAX_BULK_TARGETS:
+        raise ValueError(f'At most {MAX_BULK_TARGETS} {key} per request')
+    try:
+        return list(dict.fromkeys(int(target_id) for target_id in ids))
+    except (TypeError, ValueError):
+        raise ValueError(f'{key} must contain integer ids')
+
+@admin_bp.route('/vendors/bulk/<action>', methods=['POST'])
+@admin_required
+def bulk_vendor_action(action):
+    """Approve, reject or suspend many vendors with set-based UPDATEs"""
+    try:
+        if action not in BULK_VENDOR_ACTIONS:
+            return jsonify({'error': 'Invalid action. Use approve, reject, or suspend'}), 400
+        new_status, allowed_from, action_type, verb = BULK_VENDOR_ACTIONS[action]
+        
+        current_user_id = get_current_user_id()
+        data = request.get_json() or {}
+        reason = data.get('reason', 'No reason provided')
+        try:
+            vendor_ids = _bulk_target_ids(data, 'vendor_ids')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        vendors = db.session.query(Vendor.id, Vendor.user_id, Vendor.business_name, Vendor.status).filter(
+            Vendor.id.in_(vendor_ids),
+            Vendor.status.in_(allowed_from)
+        ).all()
+        target_ids = [vendor.id for vendor in vendors]
+        
+        if target_ids:
+            values = {'status': new_status}
+            if new_status == VendorStatus.APPROVED:
+                values['approved_at'] = datetime.utcnow()
+            db.session.execute(
+                update(Vendor)
+                .where(Vendor.id.in_(target_ids), Vendor.status.in_(allowed_from))
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            
+            for old_status in allowed_from:
+                count = sum(1 for vendor in vendors if vendor.status == old_status)
+                if count:
+                    vendor_status_changed(old_status, new_status, count=count)
+            
+            deactivated = 0
+            if new_status == VendorStatus.SUSPENDED:
+                deactivated = _deactivate_products(Product.vendor_id.in_(target_ids))
+                increment(products_active=-deactivated)
+            
+            suffix = '' if action == 'approve' else f'. Reason: {reason}'
+            log_admin_actions(current_user_id, action_type, [
+                (vendor.id, f'{verb} vendor: {vendor.business_name}{suffix}') for vendor in vendors
+            ], critical=new_status == VendorStatus.SUSPENDED)
+        
+        invalidate_identity(*[vendor.user_id for vendor in vendors])
+        db.session.commit()
+        cache.invalidate('admin_dashboard')
+        
+        updated = set(target_ids)
+        return jsonify({
+            'message': f'{len(target_ids)} vendors updated successfully',
+            'updated': target_ids,
+            'skipped': [vendor_id for vendor_id in vendor_ids if vendor_id not in updated]
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 # Product Management
 @admin_bp.route('/products', methods=['GET'])
 @admin_required
@@ -351,7 +393,7 @@ def admin_get_products():
         is_active = request.args.get('is_active')
         low_stock = request.args.get('low_stock', type=bool)
         
-        query = Product.query
+        query = ADMIN_PRODUCT.query().select_from(Product).join(Vendor, Vendor.id == Product.vendor_id)
         
         if category:
             query = query.filter(Product.category == category)
@@ -360,32 +402,14 @@ def admin_get_products():
         if is_active is not None:
             query = query.filter(Product.is_active == (is_active.lower() == 'true'))
         if low_stock:
-            query = query.filter(Product.stock <= Product.min_stock)
+            # Active products only, the same predicate as ix_product_low_stock so the partial index is used
+            query = query.filter(Product.stock <= Product.min_stock, Product.is_active == True)
         
         products = query.order_by(Product.created_at.desc()).paginate(
             page=page, per_page=per_page, error_out=False
         )
         
-        result = []
-        for product in products.items:
-            result.append({
-                'id': product.id,
-                'name': product.name,
-                'price': product.price,
-                'category': product.category,
-                'stock': product.stock,
-                'min_stock': product.min_stock,
-                'is_active': product.is_active,
-                'rating': product.rating,
-                'review_count': product.review_count,
-                'vendor': {
-                    'id': product.vendor.id,
-                    'business_name': product.vendor.business_name,
-                    'status': product.vendor.status.value
-                },
-                'is_low_stock': product.stock <= product.min_stock,
-                'created_at': product.created_at.isoformat()
-            })
+        result = ADMIN_PRODUCT.many(products.items)
         
         return jsonify({
             'products': result,
@@ -404,29 +428,69 @@ def admin_get_products():
 @admin_required
 def deactivate_product(product_id):
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = get_current_user_id()
         product = Product.query.get_or_404(product_id)
         data = request.get_json()
         reason = data.get('reason', 'Admin action')
         
+        if product.is_active:
+            increment(products_active=-1)
         product.is_active = False
         
         # Log admin action
-        action = AdminAction(
-            admin_id=current_user_id,
-            action_type='product_deactivation',
-            target_id=product_id,
-            description=f'Deactivated product: {product.name}. Reason: {reason}'
+        log_admin_action(
+            current_user_id, 'product_deactivation', product_id,
+            f'Deactivated product: {product.name}. Reason: {reason}'
         )
-        db.session.add(action)
         
         db.session.commit()
+        cache.invalidate('admin_dashboard')
         
         return jsonify({'message': 'Product deactivated successfully'}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@admin_bp.route('/products/bulk/deactivate', methods=['POST'])
+@admin_required
+def bulk_deactivate_products():
+    """Deactivate many products with one UPDATE and one audit INSERT"""
+    try:
+        current_user_id = get_current_user_id()
+        data = request.get_json() or {}
+        reason = data.get('reason', 'Admin action')
+        try:
+            product_ids = _bulk_target_ids(data, 'product_ids')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        products = db.session.query(Product.id, Product.name).filter(
+            Product.id.in_(product_ids),
+            Product.is_active == True
+        ).all()
+        target_ids = [product.id for product in products]
+        
+        if target_ids:
+            deactivated = _deactivate_products(Product.id.in_(target_ids))
+            increment(products_active=-deactivated)
+            log_admin_actions(current_user_id, 'product_deactivation', [
+                (product.id, f'Deactivated product: {product.name}. Reason: {reason}') for product in products
+            ])
+        
+        db.session.commit()
+        cache.invalidate('admin_dashboard')
+        
+        updated = set(target_ids)
+        return jsonify({
+            'message': f'{len(target_ids)} products deactivated successfully',
+            'updated': target_ids,
+            'skipped': [product_id for product_id in product_ids if product_id not in updated]
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 # Order Management
 @admin_bp.route('/orders', methods=['GET'])
 @admin_required
@@ -437,7 +501,24 @@ def admin_get_orders():
         status = request.args.get('status')
         vendor_id = request.args.get('vendor_id')
         
-        query = Order.query
+        cursor = request.args.get('cursor')
+        
+        # Line items are counted per row through the order_id index instead of loading them
+        item_count = db.session.query(func.count(OrderItem.id)).filter(
+            OrderItem.order_id == Order.id
+        ).correlate(Order).scalar_subquery()
+        
+        query = db.session.query(
+            Order.id,
+            Order.order_number,
+            Order.total_amount,
+            Order.commission_amount,
+            Order.status,
+            Order.created_at,
+            User.username,
+            User.email,
+            item_count.label('item_count')
+        ).join(User, User.id == Order.user_id)
         
         if status:
             try:
@@ -447,14 +528,36 @@ def admin_get_orders():
                 return jsonify({'error': 'Invalid status'}), 400
         
         if vendor_id:
-            query = query.join(Order.items).filter(OrderItem.vendor_id == vendor_id)
+            # EXISTS keeps one row per order even when the vendor has several items in it
+            query = query.filter(
+                db.session.query(OrderItem.id).filter(
+                    OrderItem.order_id == Order.id,
+                    OrderItem.vendor_id == vendor_id
+                ).exists()
+            )
         
-        orders = query.order_by(Order.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        if cursor:
+            try:
+                rows, next_cursor = keyset_page(query, Order.created_at, Order.id, per_page, cursor)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            pagination = {'per_page': per_page, 'next_cursor': next_cursor}
+        else:
+            orders = newest_first(query, Order.created_at, Order.id).paginate(
+                page=page, per_page=per_page, error_out=False
+            )
+            rows = orders.items
+            last = rows[-1] if rows else None
+            pagination = {
+                'page': orders.page,
+                'pages': orders.pages,
+                'per_page': orders.per_page,
+                'total': orders.total,
+                'next_cursor': encode_cursor(last.created_at, last.id) if last and orders.has_next else None
+            }
         
         result = []
-        for order in orders.items:
+        for order in rows:
             result.append({
                 'id': order.id,
                 'order_number': order.order_number,
@@ -462,21 +565,16 @@ def admin_get_orders():
                 'commission_amount': order.commission_amount,
                 'status': order.status.value,
                 'customer': {
-                    'username': order.customer.username,
-                    'email': order.customer.email
+                    'username': order.username,
+                    'email': order.email
                 },
-                'item_count': len(order.items),
+                'item_count': order.item_count,
                 'created_at': order.created_at.isoformat()
             })
         
         return jsonify({
             'orders': result,
-            'pagination': {
-                'page': orders.page,
-                'pages': orders.pages,
-                'per_page': orders.per_page,
-                'total': orders.total
-            }
+            'pagination': pagination
         }), 200
         
     except Exception as e:
@@ -489,16 +587,57 @@ def get_admin_actions():
     try:
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
-        
-        actions = AdminAction.query.order_by(AdminAction.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        cursor = request.args.get('cursor')
+        action_type = request.args.get('action_type')
+        target_id = request.args.get('target_id', type=int)
+        admin_id = request.args.get('admin_id', type=int)
+        
+        # Older history lives in the archive table with the same layout
+        source = AdminActionArchive if request.args.get('archive', '').lower() == 'true' else AdminAction
+        if source is AdminAction:
+            flush_audit_log(in_request=True)
+        
+        query = db.session.query(
+            source.id,
+            source.action_type,
+            source.target_id,
+            source.description,
+            source.created_at,
+            User.username
+        ).join(User, User.id == source.admin_id)
+        
+        if action_type:
+            query = query.filter(source.action_type == action_type)
+        if target_id is not None:
+            query = query.filter(source.target_id == target_id)
+        if admin_id is not None:
+            query = query.filter(source.admin_id == admin_id)
+        
+        if cursor:
+            try:
+                rows, next_cursor = keyset_page(query, source.created_at, source.id, per_page, cursor)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            pagination = {'per_page': per_page, 'next_cursor': next_cursor}
+        else:
+            actions = newest_first(query, source.created_at, source.id).paginate(
+                page=page, per_page=per_page, error_out=False
+            )
+            rows = actions.items
+            last = rows[-1] if rows else None
+            pagination = {
+                'page': actions.page,
+                'pages': actions.pages,
+                'per_page': actions.per_page,
+                'total': actions.total,
+                'next_cursor': encode_cursor(last.created_at, last.id) if last and actions.has_next else None
+            }
         
         result = []
-        for action in actions.items:
+        for action in rows:
             result.append({
                 'id': action.id,
-                'admin': action.admin.username,
+                'admin': action.username,
                 'action_type': action.action_type,
                 'target_id': action.target_id,
                 'description': action.description,
@@ -507,17 +646,63 @@ def get_admin_actions():
         
         return jsonify({
             'actions': result,
-            'pagination': {
-                'page': actions.page,
-                'pages': actions.pages,
-                'per_page': actions.per_page,
-                'total': actions.total
-            }
+            'pagination': pagination
         }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Report Exports
+def _export_response(name, columns, rows, fmt):
+    """Stream ``rows`` as a CSV/NDJSON download; the generator runs inside the request context"""
+    filename = f"{name}-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.{fmt}"
+    return Response(
+        stream_with_context(write_rows(columns, rows, fmt)),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+def _export_args():
+    """Validated ``(format, start, end)`` from the query string; raises ValueError"""
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError('Invalid format. Use csv or ndjson')
+    start, end = parse_date_range(request.args)
+    return fmt, start, end
+
+@admin_bp.route('/exports/orders', methods=['GET'])
+@replica_reads
+@admin_required
+def export_orders():
+    """Orders with their line items, optionally followed by per-vendor subtotals"""
+    try:
+        fmt, start, end = _export_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    include_subtotals = request.args.get('subtotals', '').lower() == 'true'
+    return _export_response('orders', ORDER_COLUMNS, order_rows(start, end, include_subtotals), fmt)
+
+@admin_bp.route('/exports/vendors', methods=['GET'])
+@replica_reads
+@admin_required
+def export_vendors():
+    try:
+        fmt, _, _ = _export_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return _export_response('vendors', VENDOR_COLUMNS, vendor_rows(), fmt)
+
+@admin_bp.route('/exports/commissions', methods=['GET'])
+@replica_reads
+@admin_required
+def export_commissions():
+    """Per-vendor gross sales, commission and payout totals over a date range"""
+    try:
+        fmt, start, end = _export_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return _export_response('commissions', COMMISSION_COLUMNS, commission_rows(start, end), fmt)
+
 # Commission Settings
 @admin_bp.route('/settings/commission', methods=['PUT'])
 @admin_required
@@ -538,14 +723,11 @@ def update_commission_rate():
         vendor.commission_rate = new_rate
         
         # Log admin action
-        current_user_id = get_jwt_identity()
-        action = AdminAction(
-            admin_id=current_user_id,
-            action_type='commission_update',
-            target_id=vendor_id,
-            description=f'Updated commission rate for {vendor.business_name} from {old_rate}% to {new_rate}%'
+        current_user_id = get_current_user_id()
+        log_admin_action(
+            current_user_id, 'commission_update', vendor_id,
+            f'Updated commission rate for {vendor.business_name} from {old_rate}% to {new_rate}%', critical=True
         )
-        db.session.add(action)
         
         db.session.commit()
         
@@ -591,13 +773,6 @@ def create_admin():
             if not data.get(field):
                 return jsonify({'error': f'{field} is required'}), 400
         
-        # Check if user exists
-        if User.query.filter_by(email=data['email']).first():
-            return jsonify({'error': 'Email already registered'}), 400
-        
-        if User.query.filter_by(username=data['username']).first():
-            return jsonify({'error': 'Username already taken'}), 400
-        
         # Create new admin user
         admin_user = User(
             username=data['username'],
@@ -611,16 +786,13 @@ def create_admin():
         admin_user.set_password(data['password'])
         
         # Log admin action
-        current_user_id = get_jwt_identity()
-        action = AdminAction(
-            admin_id=current_user_id,
-            action_type='admin_creation',
-            target_id=None,
-            description=f'Created new admin user: {admin_user.email}'
+        current_user_id = get_current_user_id()
+        log_admin_action(
+            current_user_id, 'admin_creation', None,
+            f'Created new admin user: {admin_user.email}', critical=True
         )
         
         db.session.add(admin_user)
-        db.session.add(action)
         db.session.commit()
         
         return jsonify({
@@ -633,16 +805,18 @@ def create_admin():
             }
         }), 201
         
+    except IntegrityError as e:
+        db.session.rollback()
+        return jsonify({'error': duplicate_user_error(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/admins/<int:admin_id>', methods=['DELETE'])
 @admin_required
-def delete_admin():
+def delete_admin(admin_id):
     """Delete an admin user (cannot delete yourself)"""
     try:
-        current_user_id = get_jwt_identity()
-        admin_id = request.view_args['admin_id']
+        current_user_id = get_current_user_id()
         
         if current_user_id == admin_id:
             return jsonify({'error': 'Cannot delete your own admin account'}), 400
@@ -657,18 +831,124 @@ def delete_admin():
             return jsonify({'error': 'Cannot delete the last admin user'}), 400
         
         # Log admin action
-        action = AdminAction(
-            admin_id=current_user_id,
-            action_type='admin_deletion',
-            target_id=admin_id,
-            description=f'Deleted admin user: {admin_to_delete.email}'
+        log_admin_action(
+            current_user_id, 'admin_deletion', admin_id,
+            f'Deleted admin user: {admin_to_delete.email}', critical=True
         )
-        
-        db.session.add(action)
         db.session.delete(admin_to_delete)
+        invalidate_identity(admin_id)
         db.session.commit()
         
         return jsonify({'message': 'Admin user deleted successfully'}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+# Profiling (see profiling.py)
+@admin_bp.route('/profiling/token', methods=['POST'])
+@admin_required
+def create_profiling_token():
+    """Token for the X-Profile header: requests carrying it are profiled"""
+    try:
+        if not profiling.is_installed(current_app):
+            return jsonify({'error': 'Profiling is disabled (PROFILING_ENABLED off or SECRET_KEY unset)'}), 503
+        admin_id = get_current_user_id()
+        log_admin_action(admin_id, 'profiling_token', None, 'Issued a request profiling token')
+        db.session.commit()
+        return jsonify({
+            'token': profiling.create_token(admin_id),
+            'header': profiling.HEADER,
+            'expires_in': current_app.config.get('PROFILING_TOKEN_MAX_AGE', 900)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/profiling/profiles', methods=['GET'])
+@admin_required
+def get_profiles():
+    """Newest stored request profiles (this worker's PROFILING_DIR)"""
+    try:
+        limit = min(request.args.get('limit', 50, type=int), 500)
+        return jsonify({'profiles': profiling.list_profiles(limit)}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/profiling/profiles/<profile_id>', methods=['GET'])
+@admin_required
+def get_profile(profile_id):
+    """?format=json (route, timings, queries), pstats (download) or text (top functions)"""
+    try:
+        fmt = request.args.get('format', 'json')
+        if fmt not in ('json', 'pstats', 'text'):
+            return jsonify({'error': 'Invalid format. Use json, pstats or text'}), 400
+        path = profiling.profile_path(profile_id, '.json' if fmt == 'json' else '.pstats')
+        if path is None:
+            return jsonify({'error': 'Profile not found'}), 404
+        if fmt == 'json':
+            return send_file(path, mimetype='application/json')
+        if fmt == 'pstats':
+            return send_file(path, mimetype='application/octet-stream', as_attachment=True)
+
+        sort = request.args.get('sort', 'cumulative')
+        if sort not in profiling.SORT_KEYS:
+            return jsonify({'error': f"Invalid sort. Use {', '.join(profiling.SORT_KEYS)}"}), 400
+        report = profiling.stats_report(path, sort, request.args.get('limit', 40, type=int))
+        return Response(report, mimetype='text/plain')
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/profiling/sample', methods=['POST'])
+@admin_required
+def sample_stacks():
+    """Sample this worker's thread stacks for a few seconds; returns collapsed stacks for a flame graph"""
+    try:
+        data = request.get_json(silent=True) or {}
+        seconds = float(data.get('seconds', 10))
+        interval = float(data.get('interval', 0.005))
+        max_seconds = current_app.config.get('PROFILING_MAX_SAMPLE_SECONDS', 60)
+        if not 0 < seconds <= max_seconds or not 0.001 <= interval <= 1:
+            return jsonify({'error': f'seconds must be in (0, {max_seconds}] and interval in [0.001, 1]'}), 400
+        
+        sampler = profiling.sample_stacks(seconds, interval)
+        response = Response(sampler.collapsed(), mimetype='text/plain')
+        response.headers['X-Samples'] = str(sampler.samples)
+        return response
+        
+    except (TypeError, ValueError):
+        return jsonify({'error': 'seconds and interval must be numbers'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Slow Query Log (see slowlog.py)
+@admin_bp.route('/slow-queries', methods=['GET'])
+@admin_required
+def get_slow_queries():
+    """Slowest statement shapes seen by this worker, with their plans and full-scan flags"""
+    try:
+        sort = request.args.get('sort', 'total_ms')
+        if sort not in ('total_ms', 'count', 'max_ms', 'avg_ms'):
+            return jsonify({'error': 'Invalid sort. Use total_ms, count, max_ms or avg_ms'}), 400
+        limit = min(request.args.get('limit', 20, type=int), 200)
+        full_scans_only = request.args.get('full_scans', '').lower() == 'true'
+        
+        return jsonify({
+            'threshold_ms': current_app.config.get('SLOW_QUERY_THRESHOLD_MS'),
+            'queries': slow_queries.top(sort, limit, full_scans_only)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/slow-queries', methods=['DELETE'])
+@admin_required
+def reset_slow_queries():
+    """Start this worker's slow-query aggregates afresh"""
+    try:
+        slow_queries.reset()
+        return jsonify({'message': 'Slow query log cleared'}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
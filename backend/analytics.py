@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Pre-aggregated vendor sales buckets
+
+Checkout adds each order's line items to one VendorSalesDaily row per vendor
+per day, so chart queries read a handful of small rows instead of scanning
+OrderItem. Weekly and monthly series are rolled up from the daily buckets.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from sqlalchemy import func, distinct
+from database import add_to_row
+from models import db, Order, OrderItem, VendorSalesDaily
+
+GRANULARITIES = ('day', 'week', 'month')
+MAX_TIMESERIES_DAYS = 3 * 366
+
+def _bucket_start(day, granularity):
+    """First day of the bucket containing ``day``"""
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+def _next_bucket(start, granularity):
+    if granularity == 'week':
+        return start + timedelta(days=7)
+    if granularity == 'month':
+        return (start + timedelta(days=32)).replace(day=1)
+    return start + timedelta(days=1)
+
+def record_order_sales(order, order_items):
+    """Add an order's line items to the daily buckets of each vendor involved.
+
+    Runs inside the caller's transaction; each bucket is upserted in SQL so
+    concurrent checkouts for the same vendor and day neither lose updates nor
+    collide creating the day's row.
+    """
+    day = (order.created_at or datetime.utcnow()).date()
+    totals = defaultdict(lambda: [0.0, 0])
+    for item in order_items:
+        totals[item.vendor_id][0] += item.vendor_amount
+        totals[item.vendor_id][1] += item.quantity
+
+    for vendor_id, (revenue, units) in totals.items():
+        add_to_row(VendorSalesDaily, {'vendor_id': vendor_id, 'day': day},
+                   {'revenue': revenue, 'units': units, 'order_count': 1})
+
+def vendor_timeseries(vendor_id, granularity, start, end):
+    """Revenue, units and order counts per bucket between ``start`` and ``end`` (inclusive).
+
+    One indexed range read over the daily buckets; empty buckets are filled
+    with zeros so charts get a continuous series.
+    """
+    rows = db.session.query(
+        VendorSalesDaily.day,
+        VendorSalesDaily.revenue,
+        VendorSalesDaily.units,
+        VendorSalesDaily.order_count
+    ).filter(
+        VendorSalesDaily.vendor_id == vendor_id,
+        VendorSalesDaily.day >= start,
+        VendorSalesDaily.day <= end
+    ).all()
+
+    buckets = defaultdict(lambda: [0.0, 0, 0])
+    for day, revenue, units, order_count in rows:
+        bucket = buckets[_bucket_start(day, granularity)]
+        bucket[0] += revenue
+        bucket[1] += units
+        bucket[2] += order_count
+
+    series = []
+    current = _bucket_start(start, granularity)
+    while current <= end:
+        revenue, units, order_count = buckets.get(current, (0.0, 0, 0))
+        series.append({
+            'period': current.isoformat(),
+            'revenue': round(revenue, 2),
+            'units': units,
+            'orders': order_count
+        })
+        current = _next_bucket(current, granularity)
+    return series
+
+def rebuild_vendor_sales_daily():
+    """Recompute every daily bucket from OrderItem/Order (backfill or repair)"""
+    day = func.date(Order.created_at)
+    rows = db.session.query(
+        OrderItem.vendor_id,
+        day.label('day'),
+        func.sum(OrderItem.vendor_amount),
+        func.sum(OrderItem.quantity),
+        func.count(distinct(OrderItem.order_id))
+    ).join(Order, Order.id == OrderItem.order_id).group_by(OrderItem.vendor_id, day).all()
+
+    VendorSalesDaily.query.delete()
+    db.session.bulk_insert_mappings(VendorSalesDaily, [
+        {
+            'vendor_id': vendor_id,
+            'day': day_value if isinstance(day_value, date) else date.fromisoformat(day_value),
+            'revenue': revenue or 0.0,
+            'units': units or 0,
+            'order_count': order_count
+        } for vendor_id, day_value, revenue, units, order_count in rows
+    ])
+    db.session.commit()
+    return len(rows)
+
+if __name__ == '__main__':
+    from app import create_app
+
+    app = create_app()
+    with app.app_context():
+        count = rebuild_vendor_sales_daily()
+        print(f"✅ Rebuilt {count} vendor sales buckets")
@@ -1,31 +1,45 @@
+import click
 from flask import Flask, jsonify
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
-from models import db
-from config import config
+from models import db, create_schema
+
+def init_db_command():
+    """Create missing tables and indexes, and the dashboard counters if they don't exist yet"""
+    from platform_stats import init_platform_stats
+    create_schema()
+    click.echo(f"✅ Schema is up to date ({db.engine.url.render_as_string(hide_password=True)})")
+    if init_platform_stats():
+        click.echo("✅ Built the platform counters")
 
 def create_app(config_name='default'):
+    from config import config
+    from database import init_database
+    from replicas import init_replicas
+    from metrics import init_metrics
+    from profiling import init_profiling
+    from slowlog import init_slow_query_log
+    from json_provider import init_json
+    from compression import init_compression, init_frontend
+
     app = Flask(__name__)
     app.config.from_object(config[config_name])
     
     # Initialize extensions
-    db.init_app(app)
+    init_database(app)
+    init_replicas(app)
+    init_json(app)
     jwt = JWTManager(app)
+    init_profiling(app)
+    init_metrics(app)
+    init_slow_query_log(app)
+    init_compression(app)
     
     # Configure JWT to handle string identities
     @jwt.user_identity_loader
     def user_identity_lookup(user):
         return str(user)
     
-    @jwt.user_lookup_loader
-    def user_lookup_callback(_jwt_header, jwt_data):
-        identity = jwt_data["sub"]
-        # Convert to int for database lookup
-        if isinstance(identity, str):
-            identity = int(identity)
-        from models import User
-        return User.query.filter_by(id=identity).one_or_none()
-    
     CORS(app, resources={r"/api/*": {"origins": app.config['CORS_ORIGINS']}})
     
     # Register blueprints
@@ -37,8 +51,7 @@ def create_app(config_name='default'):
     app.register_blueprint(admin_bp, url_prefix='/api/admin')
     app.register_blueprint(vendor_bp, url_prefix='/api/vendor')
     
-    # Add root route
-    @app.route('/')
+    # Add root route (the frontend is served there instead when it has been built)
     def home():
         return jsonify({
             "message": "Welcome to ShopNaija - Nigeria's Premier Multi-Vendor E-Commerce Platform",
@@ -53,6 +66,9 @@ def create_app(config_name='default'):
             ]
         }), 200
     
+    if not init_frontend(app):
+        app.add_url_rule('/', 'home', home)
+    
     # Health check endpoint
     @app.route('/health')
     def health_check():
@@ -76,9 +92,23 @@ def create_app(config_name='default'):
     def forbidden(error):
         return jsonify({"error": "Access forbidden"}), 403
     
-    # Create tables
-    with app.app_context():
-        db.create_all()
+    # Schema management: `flask init-db`, or on startup outside production
+    app.cli.command('init-db')(init_db_command)
+    if app.config.get('AUTO_CREATE_SCHEMA', True):
+        from platform_stats import init_platform_stats
+        with app.app_context():
+            create_schema()
+            init_platform_stats()
+
+    # Caches are primed by warmup.warmup() in each worker; drop any built against another app's database
+    from availability import user_filter
+    from auth import reset_identity_cache
+    user_filter.reset()
+    reset_identity_cache()
+    
+    # Start the buffered audit log writer
+    from audit import init_audit
+    init_audit(app)
     
     return app
 
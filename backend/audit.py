@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Admin audit log
+
+Routine admin actions are held on the request's session until its
+transaction commits (and dropped if it rolls back), then buffered in memory
+and written by a background flusher with one multi-row INSERT per batch, so
+they stay off the request's transaction. Security-relevant actions
+(critical=True) are still added to the request's own transaction and commit
+or roll back with it. A batch the database rejects is retried
+AUDIT_FLUSH_RETRIES times, then written row by row; rows that still fail
+(e.g. pointing at a deleted admin) are logged and dropped.
+
+History older than AUDIT_ARCHIVE_AFTER_DAYS can be moved to
+admin_action_archive in batches to keep the hot table small:
+
+    python audit.py archive [--days 90]
+"""
+
+import argparse
+import atexit
+import logging
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import delete, event, insert, select
+from models import db, AdminAction, AdminActionArchive
+
+logger = logging.getLogger(__name__)
+
+_COLUMNS = ('admin_id', 'action_type', 'target_id', 'description', 'created_at')
+
+_PENDING_KEY = 'pending_audit_entries'
+_buffer = []
+_lock = threading.Lock()
+_wake = threading.Event()
+_state = {'app': None, 'thread': None, 'batch_size': 100, 'interval': 2.0, 'retries': 3, 'failures': 0}
+
+def init_audit(app):
+    """Start the background flusher for ``app`` (no-op when buffering is disabled)"""
+    if not app.config.get('AUDIT_BUFFER_ENABLED', True):
+        # Write synchronously from now on (e.g. a test app created after a buffered one)
+        if _state['app'] is not None:
+            flush_audit_log()
+            _state['app'] = None
+        return
+    _state['app'] = app
+    _state['batch_size'] = app.config.get('AUDIT_BUFFER_SIZE', 100)
+    _state['interval'] = app.config.get('AUDIT_FLUSH_INTERVAL', 2.0)
+    _state['retries'] = app.config.get('AUDIT_FLUSH_RETRIES', 3)
+    if _state['thread'] is None or not _state['thread'].is_alive():  # Threads don't survive a fork
+        first_start = _state['thread'] is None
+        _state['thread'] = threading.Thread(target=_run_flusher, name='audit-flusher', daemon=True)
+        _state['thread'].start()
+        if first_start:
+            atexit.register(flush_audit_log)
+
+def _entry(admin_id, action_type, target_id, description):
+    return {
+        'admin_id': int(admin_id),
+        'action_type': action_type,
+        'target_id': target_id,
+        'description': description,
+        'created_at': datetime.utcnow()
+    }
+
+def log_admin_action(admin_id, action_type, target_id=None, description=None, critical=False):
+    """Record one admin action; see log_admin_actions"""
+    log_admin_actions(admin_id, action_type, [(target_id, description)], critical=critical)
+
+def log_admin_actions(admin_id, action_type, targets, critical=False):
+    """Record one action per ``(target_id, description)``.
+
+    Critical entries (or every entry when no flusher is running) are inserted
+    in the caller's transaction; the rest are buffered for the flusher once
+    that transaction commits.
+    """
+    entries = [_entry(admin_id, action_type, target_id, description) for target_id, description in targets]
+    if not entries:
+        return
+    if critical or _state['app'] is None:
+        db.session.execute(insert(AdminAction), entries)
+        return
+    db.session.info.setdefault(_PENDING_KEY, []).extend(entries)
+
+@event.listens_for(db.session, 'after_commit')
+def _buffer_after_commit(session):
+    entries = session.info.pop(_PENDING_KEY, None)
+    if not entries:
+        return
+    with _lock:
+        _buffer.extend(entries)
+        full = len(_buffer) >= _state['batch_size']
+    if full:
+        _wake.set()
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
+
+def flush_audit_log(in_request=False):
+    """Write every buffered entry now; returns the number of rows written.
+
+    With ``in_request=True`` the rows are written and committed through the
+    current request's session (used before reading the log, so an admin sees
+    their own actions); otherwise the flusher's own app context is used. A
+    failed batch goes back to the front of the buffer for the next flush.
+    """
+    with _lock:
+        batch = _buffer[:]
+        del _buffer[:]
+    if not batch:
+        return 0
+    if in_request:
+        return _write_batch(batch)
+    with _state['app'].app_context():
+        try:
+            return _write_batch(batch)
+        finally:
+            db.session.remove()
+
+def _write_batch(batch):
+    try:
+        db.session.execute(insert(AdminAction), batch)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        _state['failures'] += 1
+        if _state['failures'] <= _state['retries']:
+            logger.exception("Failed to write %d audit entries; re-queued", len(batch))
+            with _lock:
+                _buffer[:0] = batch
+            return 0
+        logger.exception("Failed to write %d audit entries %d times; writing them one by one",
+                         len(batch), _state['failures'])
+        _state['failures'] = 0
+        return _write_rows(batch)
+    _state['failures'] = 0
+    return len(batch)
+
+def _write_rows(batch):
+    """Insert entries one at a time, dropping (and logging) any the database rejects"""
+    written = 0
+    for entry in batch:
+        try:
+            db.session.execute(insert(AdminAction), [entry])
+            db.session.commit()
+            written += 1
+        except Exception:
+            db.session.rollback()
+            logger.exception("Dropping audit entry the database rejects: %r", entry)
+    return written
+
+def _run_flusher():
+    while True:
+        _wake.wait(_state['interval'])
+        _wake.clear()
+        flush_audit_log()
+
+def archive_admin_actions(older_than_days, batch_size=5000):
+    """Move actions older than ``older_than_days`` into admin_action_archive in batches"""
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    columns = [getattr(AdminAction, name) for name in ('id',) + _COLUMNS]
+    moved = 0
+    while True:
+        ids = [row[0] for row in db.session.execute(
+            select(AdminAction.id)
+            .where(AdminAction.created_at < cutoff)
+            .order_by(AdminAction.created_at, AdminAction.id)
+            .limit(batch_size)
+        )]
+        if not ids:
+            return moved
+        db.session.execute(
+            insert(AdminActionArchive).from_select(
+                ['id', *_COLUMNS], select(*columns).where(AdminAction.id.in_(ids))
+            )
+        )
+        db.session.execute(delete(AdminAction).where(AdminAction.id.in_(ids)))
+        db.session.commit()
+        moved += len(ids)
+
+if __name__ == '__main__':
+    from app import create_app
+
+    parser = argparse.ArgumentParser(description='Admin audit log maintenance')
+    parser.add_argument('command', choices=['archive'])
+    parser.add_argument('--days', type=int, default=None, help='Archive actions older than this many days')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        days = args.days if args.days is not None else app.config.get('AUDIT_ARCHIVE_AFTER_DAYS', 90)
+        moved = archive_admin_actions(days)
+        print(f"✅ Archived {moved} admin actions older than {days} days")
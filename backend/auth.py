@@ -0,0 +1,154 @@
+"""
+Authentication helpers shared by every blueprint
+
+Tokens carry the user's role and vendor id as claims, but they are only
+informational: the authoritative identity (role, vendor id, vendor status) is
+resolved by current_identity() at most once per request - there is no JWT
+user_lookup_loader. It is also kept in a short per-process cache, so most
+authorized requests need no identity query at all.
+
+The write paths call invalidate_identity() when a role or vendor status
+changes. Besides clearing this process's cache it records an IdentityChange
+row in the same transaction; every worker reads new rows at most every
+IDENTITY_SYNC_INTERVAL seconds and drops those users' cached identities, so a
+suspended vendor or deleted admin loses access everywhere within that time.
+"""
+
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import current_app, g, jsonify
+from flask_jwt_extended import create_access_token, get_jwt_identity, jwt_required
+from sqlalchemy import func, insert
+from cache import TTLCache
+from models import db, User, Vendor, UserRole, IdentityChange
+
+Identity = namedtuple('Identity', ['user_id', 'role', 'vendor_id', 'vendor_status'])
+
+identity_cache = TTLCache(maxsize=10000)
+_sync = {'last_id': None, 'checked': 0.0}
+_sync_lock = threading.Lock()
+
+def get_current_user_id():
+    """Get current user ID from JWT, handling both string and int formats"""
+    user_id = get_jwt_identity()
+    if isinstance(user_id, str):
+        return int(user_id)
+    return user_id
+
+def identity_claims(user):
+    """Extra JWT claims describing ``user``'s role and vendor profile"""
+    vendor = user.vendor_profile
+    return {
+        'role': user.role.value if user.role else UserRole.CUSTOMER.value,
+        'vendor_id': vendor.id if vendor else None
+    }
+
+def create_user_token(user, expires_delta=timedelta(days=7)):
+    """Access token for ``user`` with role/vendor claims"""
+    return create_access_token(
+        identity=str(user.id),
+        additional_claims=identity_claims(user),
+        expires_delta=expires_delta
+    )
+
+def _load_identity(user_id):
+    """Single query for the user's role and vendor; the Vendor row stays in the session"""
+    row = db.session.query(User.role, Vendor).outerjoin(
+        Vendor, Vendor.user_id == User.id
+    ).filter(User.id == user_id).first()
+    if row is None:
+        return None
+    role, vendor = row
+    g._current_vendor = vendor
+    return Identity(user_id, role, vendor.id if vendor else None, vendor.status if vendor else None)
+
+def current_identity():
+    """Identity of the authenticated user, or None if the user no longer exists"""
+    user_id = get_current_user_id()
+    # g outlives a single request when an outer app context is pushed (tests, scripts)
+    identity = g.get('_identity')
+    if identity is not None and identity.user_id == user_id:
+        return identity
+    ttl = current_app.config.get('IDENTITY_CACHE_TTL', 30)
+    if ttl > 0:
+        sync_identity_cache()
+    identity = identity_cache.get(user_id) if ttl > 0 else None
+    if identity is None:
+        identity = _load_identity(user_id)
+        if identity is not None and ttl > 0:
+            identity_cache.set(user_id, identity, ttl)
+    g._identity = identity
+    return identity
+
+def current_vendor():
+    """Vendor profile of the authenticated user (loaded at most once per request)"""
+    identity = current_identity()
+    if identity is None or identity.vendor_id is None:
+        return None
+    vendor = g.get('_current_vendor')
+    if vendor is None or vendor.id != identity.vendor_id:
+        vendor = g._current_vendor = db.session.get(Vendor, identity.vendor_id)
+    return vendor
+
+def invalidate_identity(*user_ids):
+    """Forget cached identities after a role or vendor-status change, in every worker.
+
+    Call it before committing the change: the IdentityChange rows other
+    workers read are written in the caller's transaction.
+    """
+    user_ids = {int(user_id) for user_id in user_ids}
+    if not user_ids:
+        return
+    now = datetime.utcnow()
+    db.session.execute(insert(IdentityChange), [{'user_id': user_id, 'changed_at': now} for user_id in user_ids])
+    for user_id in user_ids:
+        identity_cache.delete(user_id)
+    identity = g.get('_identity')
+    if identity is not None and identity.user_id in user_ids:
+        g.pop('_identity', None)
+        g.pop('_current_vendor', None)
+
+def sync_identity_cache():
+    """Drop identities other workers invalidated (reads IdentityChange at most every IDENTITY_SYNC_INTERVAL)"""
+    if time.monotonic() - _sync['checked'] < current_app.config.get('IDENTITY_SYNC_INTERVAL', 2):
+        return
+    if not _sync_lock.acquire(blocking=False):  # Another thread is already syncing
+        return
+    try:
+        if _sync['last_id'] is None:
+            # Nothing was cached before this process's first sync
+            _sync['last_id'] = db.session.query(func.max(IdentityChange.id)).scalar() or 0
+        else:
+            for change_id, user_id in db.session.query(IdentityChange.id, IdentityChange.user_id).filter(
+                IdentityChange.id > _sync['last_id']
+            ).order_by(IdentityChange.id):
+                identity_cache.delete(user_id)
+                _sync['last_id'] = change_id
+        _sync['checked'] = time.monotonic()
+    finally:
+        _sync_lock.release()
+
+def reset_identity_cache():
+    """Forget every cached identity and the sync position (a new app may use another database)"""
+    identity_cache.clear()
+    _sync.update(last_id=None, checked=0.0)
+
+def role_required(*roles, message='Access forbidden'):
+    """Decorator factory requiring a valid token whose user has one of ``roles``"""
+    def decorator(f):
+        @wraps(f)
+        @jwt_required()
+        def decorated_function(*args, **kwargs):
+            identity = current_identity()
+            if identity is None or identity.role not in roles:
+                return jsonify({'error': message}), 403
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+# Decorators to require admin / vendor access (admins may use vendor routes)
+admin_required = role_required(UserRole.ADMIN, message='Admin access required')
+vendor_required = role_required(UserRole.VENDOR, UserRole.ADMIN, message='Vendor access required')
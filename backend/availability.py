@@ -0,0 +1,163 @@
+"""
+Username/email availability
+
+An in-memory Bloom filter holds every normalized (stripped, lower-cased)
+username and email. A value the filter has never seen is definitely free and
+is answered without touching the database; only possible matches are checked
+with a query on the lower(username)/lower(email) expression indexes. The
+filter is built on first use, extended by a mapper event whenever a User row
+is inserted or updated in this process, and topped up every
+AVAILABILITY_REFRESH_INTERVAL seconds with rows other workers added and users
+they renamed (a username/email change also writes an IdentityChange row).
+
+The answer is only a hint for the signup form: the account-creating routes
+rely on the unique constraints and report IntegrityError via
+duplicate_user_error().
+"""
+
+import hashlib
+import math
+import threading
+import time
+from flask import current_app
+from datetime import datetime
+from sqlalchemy import event, func, inspect, insert
+from models import db, User, IdentityChange
+
+FIELDS = ('username', 'email')
+
+class BloomFilter:
+    """Fixed-size Bloom filter using double hashing over one blake2b digest"""
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+def normalize(value):
+    return (value or '').strip().lower()
+
+def _key(field, value):
+    return f"{field}:{normalize(value)}"
+
+class UserFilter:
+    """Bloom filter over every user's username and email, rebuilt when it fills up"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._count = 0
+        self._capacity = 0
+        self._last_id = 0
+        self._last_change_id = 0
+        self._refreshed = 0.0
+
+    def _add_user(self, user_id, username, email):
+        self._filter.add(_key('username', username))
+        self._filter.add(_key('email', email))
+        self._count += 1
+        self._last_id = max(self._last_id, user_id or 0)
+
+    def _load(self, after_id=0):
+        rows = db.session.query(User.id, User.username, User.email).filter(User.id > after_id).order_by(User.id)
+        for user_id, username, email in rows.yield_per(5000):
+            self._add_user(user_id, username, email)
+
+    def _load_changes(self):
+        """Re-add users whose username or email another worker changed"""
+        rows = db.session.query(IdentityChange.id, User.id, User.username, User.email).outerjoin(
+            User, User.id == IdentityChange.user_id
+        ).filter(IdentityChange.id > self._last_change_id).order_by(IdentityChange.id)
+        for change_id, user_id, username, email in rows:
+            if user_id is not None:
+                self._add_user(user_id, username, email)
+            self._last_change_id = change_id
+
+    def rebuild(self):
+        """Rebuild from the user table, sized with room for growth"""
+        with self._lock:
+            total = db.session.query(func.count(User.id)).scalar() or 0
+            self._capacity = max(1000, total * 2)
+            self._filter = BloomFilter(self._capacity, current_app.config.get('AVAILABILITY_ERROR_RATE', 0.01))
+            self._count = 0
+            self._last_id = 0
+            # Read first, so changes made while loading are picked up again by the next refresh
+            self._last_change_id = db.session.query(func.max(IdentityChange.id)).scalar() or 0
+            self._load()
+            self._refreshed = time.monotonic()
+
+    def reset(self):
+        """Forget the filter; it is rebuilt on next use"""
+        with self._lock:
+            self._filter = None
+
+    def refresh(self):
+        """Build on first use, then pick up rows other workers added or renamed"""
+        if self._filter is None or self._count >= self._capacity:
+            self.rebuild()
+            return
+        interval = current_app.config.get('AVAILABILITY_REFRESH_INTERVAL', 5)
+        if time.monotonic() - self._refreshed < interval:
+            return
+        with self._lock:
+            self._load(self._last_id)
+            self._load_changes()
+            self._refreshed = time.monotonic()
+
+    def note(self, user_id, username, email):
+        """Record a user written by this process (no-op until the filter exists)"""
+        with self._lock:
+            if self._filter is not None:
+                self._add_user(user_id, username, email)
+
+    def might_exist(self, field, value):
+        return _key(field, value) in self._filter
+
+user_filter = UserFilter()
+
+@event.listens_for(User, 'after_insert')
+def _note_user(mapper, connection, target):
+    user_filter.note(target.id, target.username, target.email)
+
+@event.listens_for(User, 'after_update')
+def _note_renamed_user(mapper, connection, target):
+    state = inspect(target)
+    if not any(state.attrs[field].history.has_changes() for field in FIELDS):
+        return
+    user_filter.note(target.id, target.username, target.email)
+    # Tells the other workers' filters (and identity caches) in the same transaction
+    connection.execute(insert(IdentityChange).values(user_id=target.id, changed_at=datetime.utcnow()))
+
+def is_available(field, value):
+    """True if no user has ``value`` (case-insensitively) as their ``field``"""
+    user_filter.refresh()
+    if not user_filter.might_exist(field, value):
+        return True
+    column = getattr(User, field)
+    return not db.session.query(
+        db.session.query(User.id).filter(func.lower(column) == normalize(value)).exists()
+    ).scalar()
+
+def duplicate_user_error(error):
+    """Client-facing message for an IntegrityError raised by a User insert"""
+    message = str(getattr(error, 'orig', error)).lower()
+    if 'unique' not in message and 'duplicate' not in message:
+        return 'Missing or invalid account details'
+    if 'email' in message:
+        return 'Email already registered'
+    if 'username' in message:
+        return 'Username already taken'
+    return 'Username or email already in use'
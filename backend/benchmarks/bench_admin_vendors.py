@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark GET /api/admin/vendors with vendors that own many products
+
+Compares the single-query listing against the previous per-vendor approach
+(len(vendor.products) plus a lazy vendor.user load for every row).
+
+    python benchmarks/bench_admin_vendors.py --vendors 20 --products-per-vendor 10000
+"""
+
+import argparse
+import os
+from datetime import datetime
+
+from common import make_app, auth_headers, measure, report
+
+def seed(vendor_count, products_per_vendor):
+    from sqlalchemy import insert
+    from models import db, User, Vendor, Product, UserRole, VendorStatus
+
+    admin = User(username='bench-admin', email='bench-admin@example.com', password='x', role=UserRole.ADMIN)
+    db.session.add(admin)
+    db.session.flush()
+
+    now = datetime.utcnow()
+    db.session.execute(insert(User), [
+        {'username': f'vendor{i}', 'email': f'vendor{i}@example.com', 'password': 'x',
+         'role': UserRole.VENDOR, 'created_at': now}
+        for i in range(vendor_count)
+    ])
+    user_ids = [row[0] for row in db.session.query(User.id).filter(User.role == UserRole.VENDOR).order_by(User.id)]
+    db.session.execute(insert(Vendor), [
+        {'user_id': user_id, 'business_name': f'Vendor {i}', 'business_address': 'Lagos',
+         'business_phone': '08000000000', 'business_email': f'shop{i}@example.com',
+         'status': VendorStatus.APPROVED, 'commission_rate': 8.0, 'total_sales': 0.0,
+         'current_balance': 0.0, 'created_at': now}
+        for i, user_id in enumerate(user_ids)
+    ])
+    vendor_ids = [row[0] for row in db.session.query(Vendor.id)]
+    for vendor_id in vendor_ids:
+        db.session.execute(insert(Product), [
+            {'vendor_id': vendor_id, 'name': f'Product {vendor_id}-{n}', 'price': 1000.0,
+             'category': 'electronics', 'stock': 10, 'min_stock': 5, 'is_active': True,
+             'featured': False, 'rating': 0.0, 'review_count': 0, 'created_at': now, 'updated_at': now}
+            for n in range(products_per_vendor)
+        ])
+    db.session.commit()
+    return admin.id
+
+def legacy_listing(per_page):
+    """The pre-optimisation listing: loads every product of every vendor on the page"""
+    from models import Vendor
+
+    page = Vendor.query.order_by(Vendor.created_at.desc()).paginate(page=1, per_page=per_page, error_out=False)
+    return [(vendor.id, len(vendor.products), vendor.user.username) for vendor in page.items]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--vendors', type=int, default=20)
+    parser.add_argument('--products-per-vendor', type=int, default=10000)
+    parser.add_argument('--per-page', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    app, db_path = make_app()
+    try:
+        with app.app_context():
+            print(f"Seeding {args.vendors} vendors x {args.products_per_vendor} products...")
+            admin_id = seed(args.vendors, args.products_per_vendor)
+
+        client = app.test_client()
+        headers = auth_headers(app, admin_id)
+        url = f'/api/admin/vendors?per_page={args.per_page}'
+
+        def endpoint():
+            response = client.get(url, headers=headers)
+            assert response.status_code == 200, response.get_json()
+
+        def legacy():
+            from models import db
+            with app.app_context():
+                legacy_listing(args.per_page)
+                db.session.remove()
+
+        report('GET /api/admin/vendors', measure(endpoint, repeat=args.repeat))
+        report('legacy len(vendor.products) listing', measure(legacy, repeat=args.repeat))
+    finally:
+        os.unlink(db_path)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark POST /api/login throughput under a burst of concurrent logins
+
+While the login threads run, a probe thread keeps requesting GET /api/products
+so the report also shows how much cheap requests slow down during the burst.
+
+    python benchmarks/bench_login.py --threads 16 --logins 20 --rounds 12 --workers 4
+"""
+
+import argparse
+import os
+import threading
+import time
+from datetime import datetime
+
+from common import make_app, measure, report
+
+def seed(user_count, rounds):
+    from sqlalchemy import insert
+    from models import db, User, UserRole
+    from passwords import hash_password
+
+    hashed = hash_password('bench-password', rounds=rounds)
+    now = datetime.utcnow()
+    db.session.execute(insert(User), [
+        {'username': f'user{i}', 'email': f'user{i}@example.com', 'password': hashed,
+         'role': UserRole.CUSTOMER, 'created_at': now}
+        for i in range(user_count)
+    ])
+    db.session.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16, help='Concurrent login clients')
+    parser.add_argument('--logins', type=int, default=20, help='Logins per client')
+    parser.add_argument('--rounds', type=int, default=12, help='BCRYPT_ROUNDS')
+    parser.add_argument('--workers', type=int, default=None, help='BCRYPT_WORKERS (default min(4, CPUs))')
+    args = parser.parse_args()
+
+    app, db_path = make_app(BCRYPT_ROUNDS=args.rounds, BCRYPT_WORKERS=args.workers)
+    try:
+        with app.app_context():
+            seed(args.threads, args.rounds)
+
+        def product_list(client=app.test_client()):
+            assert client.get('/api/products?per_page=10').status_code == 200
+
+        report('GET /api/products (idle)', measure(product_list, repeat=50))
+
+        def login_client(index, client_timings):
+            client = app.test_client()
+            payload = {'email': f'user{index}@example.com', 'password': 'bench-password'}
+            for _ in range(args.logins):
+                start = time.perf_counter()
+                response = client.post('/api/login', json=payload)
+                client_timings.append((time.perf_counter() - start) * 1000)
+                assert response.status_code == 200, response.get_json()
+
+        login_timings, probe_timings = [], []
+        done = threading.Event()
+
+        def probe():
+            client = app.test_client()
+            while not done.is_set():
+                start = time.perf_counter()
+                product_list(client)
+                probe_timings.append((time.perf_counter() - start) * 1000)
+
+        threads = [threading.Thread(target=login_client, args=(i, login_timings)) for i in range(args.threads)]
+        prober = threading.Thread(target=probe)
+        started = time.perf_counter()
+        prober.start()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        done.set()
+        prober.join()
+
+        report('POST /api/login (burst)', login_timings)
+        report('GET /api/products (during burst)', probe_timings)
+        print(f"{'login throughput':<40} {len(login_timings) / elapsed:9.1f} logins/s")
+    finally:
+        os.unlink(db_path)
+
+if __name__ == '__main__':
+    main()
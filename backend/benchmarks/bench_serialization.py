@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Serialization time per 100 products: ORM + hand-built dicts vs row serializers
+
+Builds the public product listing payload for 100 products three ways and
+encodes it with each JSON provider:
+
+- orm: Product objects with eager-loaded images/vendor, dicts built per row
+  (the pre-serializer route code) - "build" includes the queries
+- rows: PRODUCT_CARD over row tuples (one query plus the batched image lookup),
+  "build" includes the queries
+- dicts only: turning already-fetched rows into dicts (plus the image lookup)
+
+    python benchmarks/bench_serialization.py --repeat 200
+"""
+
+import argparse
+
+from flask.json.provider import DefaultJSONProvider
+
+from common import make_app, measure, report
+
+def legacy_cards(limit):
+    from sqlalchemy.orm import joinedload, selectinload
+    from models import Product
+
+    products = Product.query.options(selectinload(Product.images), joinedload(Product.vendor)).filter(
+        Product.is_active == True).order_by(Product.created_at.desc()).limit(limit).all()
+    result = []
+    for product in products:
+        primary_image = next((img.image_url for img in product.images if img.is_primary), None)
+        if not primary_image and product.images:
+            primary_image = product.images[0].image_url
+        result.append({
+            'id': product.id, 'name': product.name, 'description': product.description, 'price': product.price,
+            'category': product.category, 'subcategory': product.subcategory, 'brand': product.brand,
+            'stock': product.stock, 'rating': product.rating, 'review_count': product.review_count,
+            'image_url': primary_image or f'https://picsum.photos/400/300?random={product.id}',
+            'vendor': {
+                'id': product.vendor.id, 'business_name': product.vendor.business_name,
+                'status': product.vendor.status.value
+            } if product.vendor else None,
+            'is_low_stock': product.stock <= product.min_stock, 'out_of_stock': product.stock == 0,
+        })
+    return result
+
+def card_rows(limit):
+    from models import Product, Vendor
+    from serializers import PRODUCT_CARD
+
+    return PRODUCT_CARD.query().select_from(Product).outerjoin(
+        Vendor, Vendor.id == Product.vendor_id).filter(Product.is_active == True).order_by(
+        Product.created_at.desc()).limit(limit).all()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--products', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=100)
+    args = parser.parse_args()
+
+    from generate_data import generate
+    from json_provider import PROVIDERS
+    from serializers import PRODUCT_CARD
+
+    app, _ = make_app()
+    with app.app_context():
+        generate({'vendors': 20, 'customers': 10, 'products': max(args.products, 1000), 'orders': 0,
+                  'reviews': 0, 'carts': 0}, log=lambda message: None)
+        app.json.compact = True
+
+        limit = args.products
+        report(f'orm: build {limit}', measure(lambda: legacy_cards(limit), args.repeat))
+        report(f'rows: build {limit}', measure(lambda: PRODUCT_CARD.many(card_rows(limit)), args.repeat))
+        rows = card_rows(limit)
+        report(f'rows: dicts only {limit}', measure(lambda: PRODUCT_CARD.many(rows), args.repeat))
+
+        legacy_payload = {'products': legacy_cards(limit)}
+        payload = {'products': PRODUCT_CARD.many(rows)}
+        flask_default = DefaultJSONProvider(app)
+        report('encode flask default (orm dicts)', measure(lambda: flask_default.response(legacy_payload), args.repeat))
+        for name, provider_class in PROVIDERS.items():
+            provider = provider_class(app)
+            provider.compact = True
+            report(f'encode {name} (row dicts)', measure(lambda: provider.response(payload), args.repeat))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark mixed read/write throughput with the old and the tuned SQLite setup
+
+Reader threads list products while writer threads add to their carts. The
+"legacy" run uses the previous defaults (rollback journal, synchronous=FULL,
+no busy timeout); the "tuned" run uses the SQLITE_PRAGMAS from config.py.
+
+    python benchmarks/bench_sqlite_engine.py --readers 8 --writers 4 --seconds 10
+"""
+
+import argparse
+import os
+import threading
+import time
+from datetime import datetime
+
+from common import make_app, auth_headers
+from config import Config
+
+LEGACY_PRAGMAS = {'journal_mode': 'DELETE', 'synchronous': 'FULL', 'busy_timeout': 0}
+
+def seed(writer_count, product_count=200):
+    from sqlalchemy import insert
+    from models import db, User, Vendor, Product, UserRole, VendorStatus
+
+    now = datetime.utcnow()
+    vendor_user = User(username='bench-vendor', email='bench-vendor@example.com', password='x', role=UserRole.VENDOR)
+    db.session.add(vendor_user)
+    db.session.flush()
+    vendor = Vendor(user_id=vendor_user.id, business_name='Bench', business_address='Lagos',
+                    business_phone='08000000000', business_email='bench@example.com', status=VendorStatus.APPROVED)
+    db.session.add(vendor)
+    db.session.flush()
+    db.session.execute(insert(Product), [
+        {'vendor_id': vendor.id, 'name': f'Product {n}', 'price': 1000.0, 'category': 'electronics',
+         'stock': 10 ** 9, 'min_stock': 5, 'is_active': True, 'featured': False, 'rating': 0.0,
+         'review_count': 0, 'created_at': now, 'updated_at': now}
+        for n in range(product_count)
+    ])
+    customers = [User(username=f'writer{i}', email=f'writer{i}@example.com', password='x') for i in range(writer_count)]
+    db.session.add_all(customers)
+    db.session.commit()
+    return [customer.id for customer in customers]
+
+def run(label, pragmas, args):
+    app, db_path = make_app(SQLITE_PRAGMAS=pragmas)
+    try:
+        with app.app_context():
+            writer_ids = seed(args.writers)
+        deadline = time.perf_counter() + args.seconds
+        counts = {'reads': 0, 'writes': 0, 'errors': 0}
+        lock = threading.Lock()
+
+        def tally(key):
+            with lock:
+                counts[key] += 1
+
+        def reader():
+            client = app.test_client()
+            while time.perf_counter() < deadline:
+                ok = client.get('/api/products?per_page=20').status_code == 200
+                tally('reads' if ok else 'errors')
+
+        def writer(user_id):
+            client = app.test_client()
+            headers = auth_headers(app, user_id)
+            product_id = 1
+            while time.perf_counter() < deadline:
+                response = client.post('/api/cart', json={'product_id': product_id, 'quantity': 1}, headers=headers)
+                tally('writes' if response.status_code == 200 else 'errors')
+                product_id = product_id % 200 + 1
+
+        threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+        threads += [threading.Thread(target=writer, args=(user_id,)) for user_id in writer_ids]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        print(f"{label:<8} reads {counts['reads'] / args.seconds:8.1f}/s   "
+              f"writes {counts['writes'] / args.seconds:8.1f}/s   errors {counts['errors']}")
+    finally:
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(db_path + suffix):
+                os.unlink(db_path + suffix)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+
+    run('legacy', LEGACY_PRAGMAS, args)
+    run('tuned', Config.SQLITE_PRAGMAS, args)
+
+if __name__ == '__main__':
+    main()
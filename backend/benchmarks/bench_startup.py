@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Process startup time: imports, create_app and warmup
+
+Each run is a fresh interpreter (python -X importtime) doing what wsgi.py and
+a worker do - import the app, create it with the production config against a
+throwaway database, warm it up - so it measures what a gunicorn master or
+waitress process pays before serving:
+
+- imports: time to import the app module and everything it pulls in, and the
+  import time per top-level package (self time of all its modules, summed)
+- create_app / warmup: wall time of each, measured inside the subprocess
+
+    python benchmarks/bench_startup.py --repeat 10 --top 15
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+from common import BACKEND_DIR, make_app
+
+PROBE = '''
+import json, time
+started = time.perf_counter()
+import app as app_module
+imported = time.perf_counter()
+application = app_module.create_app("production")
+created = time.perf_counter()
+from warmup import warmup
+warmup(application)
+warmed = time.perf_counter()
+print(json.dumps({"imports": imported - started, "create_app": created - imported, "warmup": warmed - created}))
+'''
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+def parse_importtime(stderr):
+    """[(module, self_us, cumulative_us, depth)] from python -X importtime output"""
+    modules = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            modules.append((match.group(4), int(match.group(1)), int(match.group(2)), len(match.group(3)) // 2))
+    return modules
+
+def run_probe(env):
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', PROBE], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1]), parse_importtime(result.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help='Slowest packages to list')
+    args = parser.parse_args()
+
+    _, db_path = make_app()  # A migrated throwaway database, as after `flask init-db`
+    env = dict(os.environ, FLASK_CONFIG='production', DATABASE_URL=f'sqlite:///{db_path}',
+               JWT_SECRET_KEY='bench-secret', AUDIT_BUFFER_ENABLED='False', PYTHONDONTWRITEBYTECODE='1')
+    try:
+        run_probe(env)  # Warm the bytecode and OS file caches
+        timings = {'imports': [], 'create_app': [], 'warmup': []}
+        totals = {}
+        for _ in range(args.repeat):
+            phases, modules = run_probe(env)
+            for name, seconds in phases.items():
+                timings[name].append(seconds * 1000)
+            packages = {}
+            for name, self_us, _, _ in modules:
+                package = name.split('.')[0]
+                packages[package] = packages.get(package, 0) + self_us / 1000
+            for package, milliseconds in packages.items():
+                totals.setdefault(package, []).append(milliseconds)
+    finally:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.unlink(db_path + suffix)
+
+    print(f"{'phase':<14} {'median':>9} {'min':>9}")
+    for name, values in timings.items():
+        print(f"{name:<14} {statistics.median(values):>7.1f}ms {min(values):>7.1f}ms")
+
+    print(f"\nslowest packages to import (median of {args.repeat} runs)")
+    ranked = sorted(((statistics.median(values + [0] * (args.repeat - len(values))), name)
+                     for name, values in totals.items()), reverse=True)
+    for milliseconds, name in ranked[:args.top]:
+        print(f"  {milliseconds:>7.1f}ms  {name}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark suite with regression tracking
+
+Boots the app against a generated dataset (generate_data.py) and drives a
+realistic traffic mix - browse, search, product detail, cart, checkout,
+vendor and admin dashboards - either in-process through the Flask test
+client or over HTTP against serve.py. Reports p50/p95/p99 latency and
+throughput per endpoint, writes the results as JSON and, given a baseline,
+exits non-zero when an endpoint's p95 regressed beyond the threshold.
+
+    python benchmarks/bench_suite.py                                  # test client, small dataset
+    python benchmarks/bench_suite.py --driver http --clients 8 --seconds 30
+    python benchmarks/bench_suite.py --save-baseline                  # record a new baseline
+    python benchmarks/bench_suite.py --scale medium --database /tmp/medium.db   # reuse a dataset
+
+Baselines live in benchmarks/baselines/<driver>-<scale>.json and are only
+comparable on the same machine; re-record them after intentional changes.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import date
+
+from common import BACKEND_DIR, make_app, auth_headers, wait_until_up
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+JWT_SECRET = 'bench-suite-secret-key-not-for-production'
+SEARCH_TERMS = ['samsung', 'phone', 'shoes', 'premium', 'kitchen', 'nivea', 'classic', 'rice', 'bag', 'smart']
+CATEGORIES = ['electronics', 'fashion', 'groceries', 'home', 'beauty']
+CHECKOUT_STOCK = 10 ** 9  # Products used by the checkout scenario never run out
+
+# Dataset
+def prepare_dataset(db_path, scale, seed):
+    """Generate the dataset unless ``db_path`` already holds one; returns the context scenarios need"""
+    from generate_data import SCALES, generate
+    from models import db, User, Vendor, Product, UserRole, VendorStatus
+
+    app, db_path = make_app(db_path, JWT_SECRET_KEY=JWT_SECRET)
+    with app.app_context():
+        if not db.session.query(User.id).first():
+            print(f'🏗️  Generating {scale} dataset into {db_path}')
+            generate(SCALES[scale], seed=seed, end_date=date(2025, 1, 1), log=lambda message: None)
+
+        products = [row[0] for row in db.session.query(Product.id).filter(Product.is_active == True)
+                    .order_by(Product.review_count.desc(), Product.id).limit(500)]
+        checkout_products = products[:50]
+        Product.query.filter(Product.id.in_(checkout_products)).update(
+            {Product.stock: CHECKOUT_STOCK}, synchronize_session=False)
+        db.session.commit()
+
+        customers = [row[0] for row in db.session.query(User.id).filter(User.role == UserRole.CUSTOMER)
+                     .order_by(User.id).limit(200)]
+        vendors = [row[0] for row in db.session.query(Vendor.user_id).filter(Vendor.status == VendorStatus.APPROVED)
+                   .order_by(Vendor.total_sales.desc()).limit(20)]
+        admin = db.session.query(User.id).filter(User.role == UserRole.ADMIN).order_by(User.id).scalar()
+        db.engine.dispose()
+
+    return app, db_path, {
+        'products': products,
+        'checkout_products': checkout_products,
+        'customers': [auth_headers(app, user_id) for user_id in customers],
+        'vendors': [auth_headers(app, user_id) for user_id in vendors],
+        'admin': auth_headers(app, admin),
+    }
+
+# Scenarios: each returns a list of (endpoint label, method, path, headers, json body)
+def browse(rng, ctx, user):
+    query = f'page={rng.randint(1, 20)}&per_page=20'
+    if rng.random() < 0.5:
+        query += f'&category={rng.choice(CATEGORIES)}'
+    return [('browse', 'GET', f'/api/products?{query}', None, None)]
+
+def search(rng, ctx, user):
+    return [('search', 'GET', f'/api/products?search={rng.choice(SEARCH_TERMS)}&per_page=20', None, None)]
+
+def product_detail(rng, ctx, user):
+    return [('product_detail', 'GET', f"/api/products/{rng.choice(ctx['products'])}", None, None)]
+
+def cart(rng, ctx, user):
+    return [
+        ('cart_add', 'POST', '/api/cart', user, {'product_id': rng.choice(ctx['checkout_products']), 'quantity': 1}),
+        ('cart_view', 'GET', '/api/cart', user, None),
+    ]
+
+def checkout(rng, ctx, user):
+    return [
+        ('cart_add', 'POST', '/api/cart', user, {'product_id': rng.choice(ctx['checkout_products']), 'quantity': 1}),
+        ('checkout', 'POST', '/api/orders', user, {'delivery_address': '12 Allen Avenue, Ikeja',
+                                                   'delivery_phone': '08012345678'}),
+    ]
+
+def vendor_dashboard(rng, ctx, user):
+    return [('vendor_dashboard', 'GET', '/api/vendor/dashboard/stats', rng.choice(ctx['vendors']), None)]
+
+def admin_dashboard(rng, ctx, user):
+    return [('admin_dashboard', 'GET', '/api/admin/dashboard/stats', ctx['admin'], None)]
+
+# (scenario, weight): roughly a storefront's read-heavy traffic
+MIX = [
+    (browse, 35), (search, 15), (product_detail, 25), (cart, 12),
+    (checkout, 3), (vendor_dashboard, 7), (admin_dashboard, 3),
+]
+
+class Recorder:
+    """Latencies (ms) and error counts per endpoint label, shared by client threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+
+    def record(self, label, milliseconds, ok):
+        with self._lock:
+            self.latencies.setdefault(label, []).append(milliseconds)
+            if not ok:
+                self.errors[label] = self.errors.get(label, 0) + 1
+
+def run_mix(send, rng, ctx, user, deadline, recorder):
+    """Issue requests from the weighted mix until ``deadline``"""
+    scenarios, weights = zip(*MIX)
+    while time.perf_counter() < deadline:
+        scenario = rng.choices(scenarios, weights)[0]
+        for label, method, path, headers, body in scenario(rng, ctx, user):
+            start = time.perf_counter()
+            status = send(method, path, headers, body)
+            recorder.record(label, (time.perf_counter() - start) * 1000, 200 <= status < 300)
+
+# Drivers
+def drive_client(app, ctx, args, recorder):
+    """In-process: one thread through the Flask test client (no network or server overhead)"""
+    client = app.test_client()
+
+    def send(method, path, headers, body):
+        return client.open(path, method=method, headers=headers, json=body).status_code
+
+    with app.app_context():
+        started = time.perf_counter()
+        run_mix(send, random.Random(args.seed), ctx, ctx['customers'][0], started + args.seconds, recorder)
+        return time.perf_counter() - started
+
+def drive_http(app, ctx, args, recorder):
+    """Over HTTP: serve.py in a subprocess, ``--clients`` keep-alive connections"""
+    env = dict(os.environ, FLASK_CONFIG='production', DATABASE_URL=f'sqlite:///{args.database}',
+               JWT_SECRET_KEY=JWT_SECRET, RATELIMIT_ENABLED='False', AUDIT_BUFFER_ENABLED='False')
+    command = [sys.executable, 'serve.py', '--server', args.server, '--bind', f'127.0.0.1:{args.port}']
+    if args.workers:
+        command += ['--workers', str(args.workers)]
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_up(args.port)
+        started = time.perf_counter()
+        deadline = started + args.seconds
+
+        def client(index):
+            conn = http.client.HTTPConnection('127.0.0.1', args.port, timeout=30)
+
+            def send(method, path, headers, body):
+                nonlocal conn
+                request_headers = dict(headers or {})
+                payload = None
+                if body is not None:
+                    payload = json.dumps(body)
+                    request_headers['Content-Type'] = 'application/json'
+                try:
+                    conn.request(method, path, body=payload, headers=request_headers)
+                    response = conn.getresponse()
+                    response.read()
+                    return response.status
+                except (OSError, http.client.HTTPException):
+                    conn.close()
+                    conn = http.client.HTTPConnection('127.0.0.1', args.port, timeout=30)
+                    return 0
+
+            user = ctx['customers'][index % len(ctx['customers'])]
+            run_mix(send, random.Random(args.seed + index), ctx, user, deadline, recorder)
+            conn.close()
+
+        threads = [threading.Thread(target=client, args=(index,)) for index in range(args.clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - started
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+DRIVERS = {'client': drive_client, 'http': drive_http}
+
+# Results
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def summarize(recorder, seconds):
+    endpoints = {}
+    for label, timings in sorted(recorder.latencies.items()):
+        ordered = sorted(timings)
+        endpoints[label] = {
+            'count': len(ordered),
+            'errors': recorder.errors.get(label, 0),
+            'rps': round(len(ordered) / seconds, 2),
+            'mean_ms': round(sum(ordered) / len(ordered), 3),
+            'p50_ms': round(percentile(ordered, 0.50), 3),
+            'p95_ms': round(percentile(ordered, 0.95), 3),
+            'p99_ms': round(percentile(ordered, 0.99), 3),
+        }
+    total = sum(stats['count'] for stats in endpoints.values())
+    return {'endpoints': endpoints, 'total': {'count': total, 'rps': round(total / seconds, 2),
+                                               'errors': sum(recorder.errors.values())}}
+
+def print_table(results):
+    print(f"{'endpoint':<18} {'count':>7} {'errors':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for label, stats in results['endpoints'].items():
+        print(f"{label:<18} {stats['count']:>7} {stats['errors']:>6} {stats['rps']:>8.1f} "
+              f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f}")
+    total = results['total']
+    print(f"{'total':<18} {total['count']:>7} {total['errors']:>6} {total['rps']:>8.1f}")
+
+def compare(results, baseline, threshold, slack_ms):
+    """Endpoints whose p95 grew by more than ``threshold`` (and ``slack_ms``) over the baseline"""
+    regressions = []
+    for label, stats in results['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(label)
+        if not previous:
+            continue
+        limit = max(previous['p95_ms'] * (1 + threshold), previous['p95_ms'] + slack_ms)
+        if stats['p95_ms'] > limit:
+            regressions.append((label, previous['p95_ms'], stats['p95_ms']))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--driver', choices=list(DRIVERS), default='client')
+    parser.add_argument('--scale', choices=['small', 'medium', 'large'], default='small')
+    parser.add_argument('--database', help='Generated dataset to reuse (created on first use)')
+    parser.add_argument('--seconds', type=float, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--clients', type=int, default=8, help='Concurrent connections (http driver)')
+    parser.add_argument('--server', choices=['gunicorn', 'waitress'],
+                        default='waitress' if sys.platform == 'win32' else 'gunicorn')
+    parser.add_argument('--workers', type=int, help='Server workers (http driver; default from serve.py)')
+    parser.add_argument('--port', type=int, default=5056)
+    parser.add_argument('--output', help='Write results JSON here')
+    parser.add_argument('--baseline', help='Baseline JSON (default baselines/<driver>-<scale>.json)')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the baseline')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed p95 growth (0.25 = 25%%)')
+    parser.add_argument('--slack-ms', type=float, default=2.0, help='Ignore p95 growth below this many ms')
+    args = parser.parse_args()
+
+    keep_database = bool(args.database)
+    app, args.database, ctx = prepare_dataset(args.database, args.scale, args.seed)
+    try:
+        recorder = Recorder()
+        print(f'⏱️  {args.driver} driver for {args.seconds:g}s against the {args.scale} dataset')
+        elapsed = DRIVERS[args.driver](app, ctx, args, recorder)
+    finally:
+        if not keep_database:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(args.database + suffix):
+                    os.unlink(args.database + suffix)
+
+    results = summarize(recorder, elapsed)
+    results['meta'] = {
+        'driver': args.driver, 'scale': args.scale, 'seconds': args.seconds, 'seed': args.seed,
+        'clients': args.clients if args.driver == 'http' else 1,
+        'python': platform.python_version(), 'machine': platform.machine(), 'cpus': os.cpu_count(),
+        'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    print_table(results)
+
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(results, handle, indent=2)
+        print(f'📄 Results written to {args.output}')
+
+    baseline_path = args.baseline or os.path.join(BASELINE_DIR, f'{args.driver}-{args.scale}.json')
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        with open(baseline_path, 'w') as handle:
+            json.dump(results, handle, indent=2)
+        print(f'📌 Baseline saved to {baseline_path}')
+        return 0
+    if not os.path.exists(baseline_path):
+        print(f'No baseline at {baseline_path}; run with --save-baseline to record one')
+        return 0
+
+    with open(baseline_path) as handle:
+        regressions = compare(results, json.load(handle), args.threshold, args.slack_ms)
+    if regressions:
+        print(f'❌ p95 regressed beyond {args.threshold:.0%} against {baseline_path}:')
+        for label, before, after in regressions:
+            print(f'   {label:<18} {before:8.2f} ms -> {after:8.2f} ms')
+        return 1
+    print(f'✅ No p95 regressions beyond {args.threshold:.0%} against {baseline_path}')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Compare requests/sec of the Werkzeug dev server against the production servers
+
+Each server is started as a subprocess on a seeded throwaway database and
+hammered with GET /api/products from concurrent keep-alive clients.
+
+    python benchmarks/bench_wsgi.py --clients 16 --seconds 10
+    python benchmarks/bench_wsgi.py --servers dev gunicorn --workers 4
+"""
+
+import argparse
+import http.client
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from common import BACKEND_DIR, make_app, wait_until_up
+
+SERVERS = {
+    'dev': lambda args, port: [sys.executable, '-c',
+                               f"from wsgi import app; app.run(host='127.0.0.1', port={port}, debug=True, use_reloader=False)"],
+    'gunicorn': lambda args, port: [sys.executable, 'serve.py', '--server', 'gunicorn', '--bind', f'127.0.0.1:{port}',
+                                    '--workers', str(args.workers), '--threads', str(args.threads)],
+    'waitress': lambda args, port: [sys.executable, 'serve.py', '--server', 'waitress', '--bind', f'127.0.0.1:{port}',
+                                    '--workers', str(args.workers), '--threads', str(args.threads)],
+}
+
+def seed(db_path, product_count):
+    from datetime import datetime
+    from sqlalchemy import insert
+    from models import db, User, Vendor, Product, UserRole, VendorStatus
+
+    app, _ = make_app(db_path)
+    with app.app_context():
+        now = datetime.utcnow()
+        user = User(username='bench-vendor', email='bench-vendor@example.com', password='x', role=UserRole.VENDOR)
+        db.session.add(user)
+        db.session.flush()
+        vendor = Vendor(user_id=user.id, business_name='Bench', business_address='Lagos',
+                        business_phone='08000000000', business_email='bench@example.com', status=VendorStatus.APPROVED)
+        db.session.add(vendor)
+        db.session.flush()
+        db.session.execute(insert(Product), [
+            {'vendor_id': vendor.id, 'name': f'Product {n}', 'price': 1000.0, 'category': 'electronics',
+             'stock': 10, 'min_stock': 5, 'is_active': True, 'featured': False, 'rating': 0.0,
+             'review_count': 0, 'created_at': now, 'updated_at': now}
+            for n in range(product_count)
+        ])
+        db.session.commit()
+        db.engine.dispose()
+
+def load(port, clients, seconds, path):
+    deadline = time.perf_counter() + seconds
+    counts = {'ok': 0, 'errors': 0}
+    lock = threading.Lock()
+
+    def client():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        ok = errors = 0
+        while time.perf_counter() < deadline:
+            try:
+                conn.request('GET', path)
+                response = conn.getresponse()
+                response.read()
+                if response.status == 200:
+                    ok += 1
+                else:
+                    errors += 1
+                if response.getheader('Connection', '').lower() == 'close':
+                    conn.close()
+            except (OSError, http.client.HTTPException):
+                errors += 1
+                conn.close()
+        with lock:
+            counts['ok'] += ok
+            counts['errors'] += errors
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--servers', nargs='+', choices=list(SERVERS), default=['dev', 'gunicorn', 'waitress'])
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--products', type=int, default=500)
+    parser.add_argument('--port', type=int, default=5055)
+    args = parser.parse_args()
+    args.workers = args.workers or (os.cpu_count() or 1) * 2 + 1
+
+    _, db_path = make_app()
+    seed(db_path, args.products)
+    env = dict(os.environ, FLASK_CONFIG='production', DATABASE_URL=f'sqlite:///{db_path}',
+               JWT_SECRET_KEY='bench-secret', RATELIMIT_ENABLED='False', AUDIT_BUFFER_ENABLED='False')
+    try:
+        for name in args.servers:
+            process = subprocess.Popen(SERVERS[name](args, args.port), cwd=BACKEND_DIR, env=env,
+                                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                wait_until_up(args.port)
+                counts = load(args.port, args.clients, args.seconds, '/api/products?per_page=20')
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+            print(f"{name:<10} {counts['ok'] / args.seconds:9.1f} req/s   errors {counts['errors']}")
+    finally:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.unlink(db_path + suffix)
+
+if __name__ == '__main__':
+    main()
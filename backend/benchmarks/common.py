@@ -0,0 +1,72 @@
+"""
+Shared helpers for the benchmark scripts in this directory
+
+Benchmarks run against a throwaway SQLite file, never the development
+database. Run them from the backend directory, e.g.:
+
+    python benchmarks/bench_admin_vendors.py
+"""
+
+import http.client
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from config import config, TestingConfig
+
+def make_app(db_path=None, **overrides):
+    """Create an app bound to a fresh SQLite file; returns (app, db_path)"""
+    from app import create_app
+
+    if db_path is None:
+        fd, db_path = tempfile.mkstemp(prefix='shopnaija-bench-', suffix='.db')
+        os.close(fd)
+        os.unlink(db_path)
+
+    attrs = {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}', 'SQLALCHEMY_ECHO': False}
+    attrs.update(overrides)
+    config['benchmark'] = type('BenchmarkConfig', (TestingConfig,), attrs)
+    return create_app('benchmark'), db_path
+
+def auth_headers(app, user_id):
+    """Bearer header for ``user_id`` signed with the app's JWT key"""
+    from flask_jwt_extended import create_access_token
+
+    with app.app_context():
+        token = create_access_token(identity=str(user_id))
+    return {'Authorization': f'Bearer {token}'}
+
+def wait_until_up(port, timeout=30):
+    """Block until a server on localhost:``port`` answers /health"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/health')
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'server on port {port} did not start')
+
+def measure(fn, repeat=20, warmup=2):
+    """Call ``fn`` repeatedly; returns timings in milliseconds"""
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def report(label, timings):
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"{label:<40} median {statistics.median(ordered):9.2f} ms   p95 {p95:9.2f} ms   n={len(ordered)}")
@@ -0,0 +1,66 @@
+"""
+Small in-process TTL cache
+
+Used for short-lived response/query caching. Each worker process has its own
+copy, so entries should only be cached for as long as a little staleness is
+acceptable.
+"""
+
+import threading
+import time
+
+class TTLCache:
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._data.pop(key, None)
+            return default
+        return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            if len(self._data) >= self.maxsize and key not in self._data:
+                self._evict()
+            self._data[key] = (time.monotonic() + ttl, value)
+
+    def get_or_set(self, key, ttl, factory):
+        """Return the cached value for ``key``, computing and storing it on a miss"""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = factory()
+            self.set(key, value, ttl)
+        return value
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def invalidate(self, prefix):
+        """Drop every key that is a tuple starting with ``prefix`` (or equal to it)"""
+        with self._lock:
+            for key in [key for key in self._data if key == prefix or (isinstance(key, tuple) and key[:1] == (prefix,))]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def _evict(self):
+        now = time.monotonic()
+        expired = [key for key, (expires_at, _) in self._data.items() if expires_at < now]
+        for key in expired:
+            del self._data[key]
+        if len(self._data) >= self.maxsize:
+            # Still full: drop the entry closest to expiry
+            del self._data[min(self._data, key=lambda key: self._data[key][0])]
+
+cache = TTLCache()
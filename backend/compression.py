@@ -0,0 +1,190 @@
+"""
+Response compression and precompressed frontend assets
+
+init_compression(app) compresses responses with brotli (when the brotli
+package is installed and the client accepts it) or gzip:
+
+- only COMPRESSION_MIMETYPES, and only bodies of at least COMPRESSION_MIN_SIZE
+- streamed responses (the CSV/NDJSON exports) are compressed chunk by chunk,
+  flushing after each one so the download keeps streaming
+- compressed bodies are cached by content hash for COMPRESSION_CACHE_TTL
+  seconds, so a hot payload (the first product page, say) is compressed once
+  per worker rather than once per request
+
+init_frontend(app) serves the built React app from FRONTEND_DIST, sending a
+file's .br/.gz sibling when one exists and the client accepts it. Create the
+siblings after `npm run build` with:
+
+    python compression.py ../frontend/dist
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import sys
+import zlib
+from flask import current_app, request, send_file
+from werkzeug.security import safe_join
+from cache import TTLCache
+
+try:
+    import brotli
+except ImportError:  # Optional dependency
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+compressed_bodies = TTLCache(maxsize=256)
+
+# Encoders
+def _gzip_stream(chunks, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip container
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def _brotli_stream(chunks, quality):
+    compressor = brotli.Compressor(quality=quality)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+ENCODERS = {
+    'gzip': (lambda body, config: gzip.compress(body, config['COMPRESSION_GZIP_LEVEL'], mtime=0),
+             lambda chunks, config: _gzip_stream(chunks, config['COMPRESSION_GZIP_LEVEL'])),
+}
+if brotli is not None:
+    ENCODERS['br'] = (lambda body, config: brotli.compress(body, quality=config['COMPRESSION_BROTLI_QUALITY']),
+                      lambda chunks, config: _brotli_stream(chunks, config['COMPRESSION_BROTLI_QUALITY']))
+PREFERENCE = ('br', 'gzip')
+
+def accepted_encoding(available=ENCODERS):
+    """The best encoding in ``available`` that the request accepts, or None"""
+    for encoding in PREFERENCE:
+        if encoding in available and request.accept_encodings[encoding] > 0:
+            return encoding
+    return None
+
+def _add_vary(response):
+    vary = response.headers.get('Vary', '')
+    if 'accept-encoding' not in vary.lower():
+        response.headers['Vary'] = f'{vary}, Accept-Encoding' if vary else 'Accept-Encoding'
+
+# Dynamic responses
+def compress_response(response):
+    config = current_app.config
+    if (response.status_code < 200 or response.status_code in (204, 206, 304)
+            or response.direct_passthrough or 'Content-Encoding' in response.headers
+            or response.mimetype not in config['COMPRESSION_MIMETYPES']):
+        return response
+    _add_vary(response)
+    encoding = accepted_encoding()
+    if encoding is None or request.method == 'HEAD':
+        return response
+    compress, compress_stream = ENCODERS[encoding]
+
+    if response.is_streamed:
+        response.response = compress_stream(response.response, config)
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        if len(body) < config['COMPRESSION_MIN_SIZE']:
+            return response
+        if len(body) <= config['COMPRESSION_CACHE_MAX_BODY']:
+            key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+            data = compressed_bodies.get_or_set(key, config['COMPRESSION_CACHE_TTL'], lambda: compress(body, config))
+        else:
+            data = compress(body, config)
+        response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+def init_compression(app):
+    """Compress responses after every request (unless COMPRESSION_ENABLED is off)"""
+    if not app.config.get('COMPRESSION_ENABLED', True):
+        return
+    compressed_bodies.maxsize = app.config.get('COMPRESSION_CACHE_SIZE', 256)
+    app.after_request(compress_response)
+
+# Built frontend
+PRECOMPRESSED = {'br': '.br', 'gzip': '.gz'}
+
+def frontend_view(path=''):
+    root = current_app.config['FRONTEND_DIST']
+    filename = safe_join(root, path) if path else None
+    if not filename or not os.path.isfile(filename):
+        # Unknown API URLs and missing assets are 404s, anything else is a client-side route
+        if path.startswith('api/') or os.path.splitext(path)[1]:
+            return {'error': 'Resource not found'}, 404
+        filename = os.path.join(root, 'index.html')
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    variants = {encoding: filename + suffix for encoding, suffix in PRECOMPRESSED.items()
+                if os.path.isfile(filename + suffix)}
+    encoding = accepted_encoding(variants)
+    response = send_file(variants[encoding] if encoding else filename, mimetype=mimetype, conditional=True)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if variants:
+        _add_vary(response)
+    # Vite fingerprints everything under assets/; index.html must always be revalidated
+    if os.path.relpath(filename, root).startswith('assets' + os.sep):
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def init_frontend(app):
+    """Serve FRONTEND_DIST at / (with client-side routing); returns whether it is served"""
+    root = app.config.get('FRONTEND_DIST')
+    if not root or not os.path.isfile(os.path.join(root, 'index.html')):
+        return False
+    app.config['FRONTEND_DIST'] = os.path.abspath(root)
+    app.add_url_rule('/', 'frontend', frontend_view)
+    app.add_url_rule('/<path:path>', 'frontend', frontend_view)
+    return True
+
+# Build step
+COMPRESSIBLE_EXTENSIONS = ('.html', '.js', '.mjs', '.css', '.json', '.svg', '.txt', '.xml', '.map', '.ico', '.wasm')
+
+def precompress(root, min_size=256):
+    """Write .gz (and .br, if brotli is installed) next to every compressible file; returns the count"""
+    written = 0
+    for directory, _, files in os.walk(root):
+        for name in files:
+            if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            path = os.path.join(directory, name)
+            if os.path.getsize(path) < min_size:
+                continue
+            with open(path, 'rb') as handle:
+                body = handle.read()
+            variants = {'.gz': lambda: gzip.compress(body, 9, mtime=0)}
+            if brotli is not None:
+                variants['.br'] = lambda: brotli.compress(body, quality=11)
+            for suffix, compress in variants.items():
+                target = path + suffix
+                if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(path):
+                    continue
+                data = compress()
+                if len(data) < len(body):
+                    with open(target, 'wb') as handle:
+                        handle.write(data)
+                    written += 1
+    return written
+
+if __name__ == '__main__':
+    root = sys.argv[1] if len(sys.argv) > 1 else os.path.join('..', 'frontend', 'dist')
+    count = precompress(root)
+    print(f"✅ Wrote {count} precompressed files under {root}"
+          f"{'' if brotli else ' (gzip only: pip install brotli for .br)'}")
@@ -1,14 +1,41 @@
 import os
 from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
+# Load environment variables from backend/.env (by explicit path, so it works from any working
+# directory and for scripts that import config without create_app); variables already set win
+load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env'))
+
+# Used when SECRET_KEY is unset; anything signed with it can be forged, so profiling refuses it
+FALLBACK_SECRET_KEY = 'fallback-secret-key'
 
 class Config:
     # Database Configuration
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///ecommerce.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False  # Disable modification tracking to save resources
 
+    # SQLite connection PRAGMAs, applied to every new connection
+    SQLITE_PRAGMAS = {
+        'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),  # Readers don't block the writer
+        'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),  # Safe with WAL, far fewer fsyncs
+        'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000)),  # ms to wait on a locked database
+        'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', -64000)),  # Negative = KiB, i.e. 64 MB
+        'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 268435456)),  # 256 MB memory-mapped reads
+        'temp_store': 'MEMORY',
+        'foreign_keys': os.getenv('SQLITE_FOREIGN_KEYS', 'ON'),
+    }
+
+    # Connection pool for server databases (PostgreSQL/MySQL)
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 30))  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))  # Seconds before a connection is replaced
+
+    # Read replicas (see replicas.py): GET requests to @replica_reads views read from these
+    SQLALCHEMY_REPLICA_URIS = [uri.strip() for uri in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if uri.strip()]
+    REPLICA_MAX_LAG = float(os.getenv('REPLICA_MAX_LAG', 5.0))  # Seconds behind before a replica is skipped
+    REPLICA_LAG_CHECK_INTERVAL = float(os.getenv('REPLICA_LAG_CHECK_INTERVAL', 2.0))
+    REPLICA_STICKY_SECONDS = float(os.getenv('REPLICA_STICKY_SECONDS', 5.0))  # Client reads stay on the primary after a write
+
     # JWT Configuration
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY')  # Mandatory secret key
     JWT_ACCESS_TOKEN_EXPIRES = int(os.getenv('JWT_ACCESS_TOKEN_EXPIRES', 3600))  # 1 hour by default
@@ -17,12 +44,94 @@ class Config:
     JWT_HEADER_TYPE = 'Bearer'
 
     # Security Configuration
-    SECRET_KEY = os.getenv('SECRET_KEY', 'fallback-secret-key')  # Flask secret key
+    SECRET_KEY = os.getenv('SECRET_KEY', FALLBACK_SECRET_KEY)  # Flask secret key
     DEBUG = os.getenv('DEBUG', 'False').lower() == 'true'  # Debug mode
 
     # CORS Configuration (if needed)
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', '*')  # Allow all origins by default
 
+    # Cache Configuration
+    DASHBOARD_CACHE_TTL = int(os.getenv('DASHBOARD_CACHE_TTL', 15))  # Seconds to cache admin dashboard stats
+    IDENTITY_CACHE_TTL = int(os.getenv('IDENTITY_CACHE_TTL', 30))  # Seconds to cache a user's role/vendor lookup
+    IDENTITY_SYNC_INTERVAL = float(os.getenv('IDENTITY_SYNC_INTERVAL', 2))  # Seconds before other workers' invalidations apply
+
+    # Password Hashing Configuration
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))  # Hashes with another cost are upgraded on login
+    BCRYPT_WORKERS = int(os.getenv('BCRYPT_WORKERS', 0)) or None  # Hashing threads; default min(4, CPUs)
+
+    # Rate Limiting Configuration (token bucket per route and user, or route and IP for anonymous
+    # requests, plus in-flight budgets per worker). The IP is request.remote_addr: behind a reverse
+    # proxy that is the proxy's address, so wrap the app in werkzeug's ProxyFix there.
+    RATELIMIT_ENABLED = os.getenv('RATELIMIT_ENABLED', 'True').lower() == 'true'
+    RATELIMIT_STORAGE = os.getenv('RATELIMIT_STORAGE', 'memory')  # 'memory' or a SQLite file shared by workers
+    RATELIMIT_SWEEP_INTERVAL = int(os.getenv('RATELIMIT_SWEEP_INTERVAL', 60))  # Seconds between drops of refilled buckets
+    RATE_LIMITS = {
+        'login': os.getenv('RATE_LIMIT_LOGIN', '10/minute'),
+        'signup': os.getenv('RATE_LIMIT_SIGNUP', '5/minute'),
+        'create_order': os.getenv('RATE_LIMIT_CREATE_ORDER', '20/minute'),
+        'search': os.getenv('RATE_LIMIT_SEARCH', '60/minute'),
+        'availability': os.getenv('RATE_LIMIT_AVAILABILITY', '120/minute'),
+    }
+    CONCURRENCY_LIMITS = {
+        'login': int(os.getenv('CONCURRENCY_LIMIT_LOGIN', 8)),
+        'signup': int(os.getenv('CONCURRENCY_LIMIT_SIGNUP', 4)),
+        'create_order': int(os.getenv('CONCURRENCY_LIMIT_CREATE_ORDER', 8)),
+        'search': int(os.getenv('CONCURRENCY_LIMIT_SEARCH', 16)),
+    }
+    LOAD_SHED_RETRY_AFTER = 1  # Seconds suggested to shed (503) clients
+
+    # Signup Availability Check Configuration
+    AVAILABILITY_ERROR_RATE = float(os.getenv('AVAILABILITY_ERROR_RATE', 0.01))  # Bloom filter false-positive rate
+    AVAILABILITY_REFRESH_INTERVAL = int(os.getenv('AVAILABILITY_REFRESH_INTERVAL', 5))  # Seconds between top-ups from the DB
+
+    # Metrics Configuration
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')  # If set, /metrics requires "Authorization: Bearer <token>"
+    SERVER_TIMING = os.getenv('SERVER_TIMING', 'False').lower() == 'true'  # Server-Timing response header
+
+    # Slow Query Log (see slowlog.py)
+    SLOW_QUERY_LOG_ENABLED = os.getenv('SLOW_QUERY_LOG_ENABLED', 'True').lower() == 'true'
+    SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', 100))  # Statements at least this slow are logged
+    SLOW_QUERY_LOG_PARAMETERS = os.getenv('SLOW_QUERY_LOG_PARAMETERS', 'False').lower() == 'true'  # Values may be emails, hashes, tokens
+    SLOW_QUERY_EXPLAIN = os.getenv('SLOW_QUERY_EXPLAIN', 'True').lower() == 'true'  # EXPLAIN each new slow statement shape
+    SLOW_QUERY_MAX_SHAPES = int(os.getenv('SLOW_QUERY_MAX_SHAPES', 500))  # Distinct statements kept per worker
+
+    # Profiling Configuration (see profiling.py)
+    PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'True').lower() == 'true'
+    PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', 0.0))  # Fraction of requests profiled without a token
+    PROFILING_TOKEN_MAX_AGE = int(os.getenv('PROFILING_TOKEN_MAX_AGE', 900))  # Seconds an X-Profile token stays valid
+    PROFILING_DIR = os.getenv('PROFILING_DIR')  # Default: instance/profiles
+    PROFILING_MAX_FILES = int(os.getenv('PROFILING_MAX_FILES', 200))  # Oldest profiles are deleted beyond this
+    PROFILING_MAX_SAMPLE_SECONDS = float(os.getenv('PROFILING_MAX_SAMPLE_SECONDS', 60))
+
+    # Compression Configuration
+    COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'True').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 500))  # Bytes; smaller bodies are sent as-is
+    COMPRESSION_MIMETYPES = {
+        'application/json', 'application/x-ndjson', 'text/csv', 'text/plain', 'text/html', 'text/css',
+        'text/javascript', 'application/javascript', 'image/svg+xml', 'application/xml', 'text/xml'
+    }
+    COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', 6))
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', 4))  # Fast enough for dynamic bodies
+    COMPRESSION_CACHE_SIZE = int(os.getenv('COMPRESSION_CACHE_SIZE', 256))  # Compressed bodies kept per worker
+    COMPRESSION_CACHE_TTL = int(os.getenv('COMPRESSION_CACHE_TTL', 60))  # Seconds
+    COMPRESSION_CACHE_MAX_BODY = int(os.getenv('COMPRESSION_CACHE_MAX_BODY', 256 * 1024))  # Larger bodies aren't cached
+
+    # Built frontend, served at / when its index.html exists (precompress with compression.py)
+    FRONTEND_DIST = os.getenv('FRONTEND_DIST', os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                            '..', 'frontend', 'dist'))
+
+    # JSON Configuration
+    JSON_BACKEND = os.getenv('JSON_BACKEND', 'auto')  # 'orjson', 'json', or 'auto' (orjson when installed)
+    JSON_SORT_KEYS = os.getenv('JSON_SORT_KEYS', 'False').lower() == 'true'
+
+    # Audit Log Configuration
+    AUDIT_BUFFER_ENABLED = os.getenv('AUDIT_BUFFER_ENABLED', 'True').lower() == 'true'
+    AUDIT_BUFFER_SIZE = int(os.getenv('AUDIT_BUFFER_SIZE', 100))  # Flush once this many entries are buffered
+    AUDIT_FLUSH_INTERVAL = float(os.getenv('AUDIT_FLUSH_INTERVAL', 2.0))  # Seconds between background flushes
+    AUDIT_FLUSH_RETRIES = int(os.getenv('AUDIT_FLUSH_RETRIES', 3))  # Then the batch is written row by row, bad rows dropped
+    AUDIT_ARCHIVE_AFTER_DAYS = int(os.getenv('AUDIT_ARCHIVE_AFTER_DAYS', 90))
+
     # Email Configuration (optional, for future use)
     MAIL_SERVER = os.getenv('MAIL_SERVER', 'smtp.example.com')
     MAIL_PORT = int(os.getenv('MAIL_PORT', 587))
@@ -34,22 +143,34 @@ class Config:
     UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'uploads')
     MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))  # 16MB by default
 
+    # Startup
+    AUTO_CREATE_SCHEMA = os.getenv('AUTO_CREATE_SCHEMA', 'True').lower() == 'true'  # create_all() in create_app
+    WARMUP_ENABLED = os.getenv('WARMUP_ENABLED', 'True').lower() == 'true'  # Prime caches before a worker serves
+
 # Development-specific configuration
 class DevelopmentConfig(Config):
     DEBUG = True
     SQLALCHEMY_ECHO = True  # Log SQL queries for debugging
+    SERVER_TIMING = True
 
 # Production-specific configuration
 class ProductionConfig(Config):
     DEBUG = False
     JWT_ACCESS_TOKEN_EXPIRES = 3600  # 1 hour
     SQLALCHEMY_ECHO = False
+    # Schema changes are a deploy step (flask --app wsgi init-db), not something every worker races to do
+    AUTO_CREATE_SCHEMA = os.getenv('AUTO_CREATE_SCHEMA', 'False').lower() == 'true'
+    PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'False').lower() == 'true'  # Opt in; needs a real SECRET_KEY
 
 # Testing-specific configuration
 class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'  # Use in-memory SQLite for tests
     JWT_ACCESS_TOKEN_EXPIRES = 60  # 1 minute for tests
+    AUDIT_BUFFER_ENABLED = False  # In-memory SQLite is a single shared connection
+    BCRYPT_ROUNDS = 4  # Minimum cost keeps test logins fast
+    RATELIMIT_ENABLED = False
+    SERVER_TIMING = True
 
 # Configuration mapping
 config = {
@@ -0,0 +1,112 @@
+"""
+Shared test fixtures
+
+Test apps are TestingConfig (in-memory SQLite) plus whatever overrides a test
+module returns from its own ``app_config`` fixture:
+
+    @pytest.fixture
+    def app_config():
+        return {'RATELIMIT_ENABLED': True}
+
+``app`` yields that app inside an app context with its tables created;
+``shop`` seeds it with an admin, customers and approved vendors. Seeded users
+log in with PASSWORD.
+"""
+
+from types import SimpleNamespace
+import pytest
+from flask_jwt_extended import create_access_token
+from app import create_app
+from config import config, TestingConfig
+from models import db, User, Vendor, Product, Cart, UserRole, VendorStatus
+from platform_stats import rebuild_platform_stats
+
+PASSWORD = 'Password123'
+
+def build_app(**overrides):
+    """create_app() for TestingConfig with ``overrides`` (no SQL echo or identity/dashboard caching)"""
+    attrs = {'SECRET_KEY': 'pytest-secret-key', 'SQLALCHEMY_ECHO': False, 'IDENTITY_CACHE_TTL': 0,
+             'DASHBOARD_CACHE_TTL': 0}
+    attrs.update(overrides)
+    config['pytest'] = type('PytestConfig', (TestingConfig,), attrs)
+    return create_app('pytest')
+
+# Seeding (``session`` defaults to db.session; pass a Session to seed another engine)
+def add_user(username, role=UserRole.CUSTOMER, session=None, **fields):
+    session = db.session if session is None else session
+    user = User(username=username, email=f'{username}@example.com', role=role, **fields)
+    user.set_password(PASSWORD)
+    session.add(user)
+    session.flush()
+    return user
+
+def add_vendor(user, business_name, status=VendorStatus.APPROVED, session=None, **fields):
+    session = db.session if session is None else session
+    fields = dict({'business_address': 'Lagos', 'business_phone': '08000000000',
+                   'business_email': f'{user.username}-shop@example.com'}, **fields)
+    vendor = Vendor(user_id=user.id, business_name=business_name, status=status, **fields)
+    session.add(vendor)
+    session.flush()
+    return vendor
+
+def add_product(vendor, name, price=1000.0, stock=50, session=None, **fields):
+    session = db.session if session is None else session
+    fields = dict({'description': 'Seeded', 'category': 'electronics'}, **fields)
+    product = Product(vendor_id=vendor.id, name=name, price=price, stock=stock, **fields)
+    session.add(product)
+    session.flush()
+    return product
+
+# Fixtures
+@pytest.fixture
+def app_config():
+    """Config overrides for ``app``; override this fixture in a test module"""
+    return {}
+
+@pytest.fixture
+def app(app_config):
+    app = build_app(**app_config)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def shop(app):
+    """An admin, customer0-1, and vendor0-1 approved (10% commission) with one product each (1000 and 2000)"""
+    admin = add_user('admin', UserRole.ADMIN, is_verified=True)
+    customers = [add_user(f'customer{i}') for i in range(2)]
+    vendor_users = [add_user(f'vendor{i}', UserRole.VENDOR) for i in range(2)]
+    vendors = [add_vendor(user, f'Shop {i}', commission_rate=10.0) for i, user in enumerate(vendor_users)]
+    products = [add_product(vendor, f'Item {i}', price=1000.0 * (i + 1), stock=100)
+                for i, vendor in enumerate(vendors)]
+    db.session.commit()
+    rebuild_platform_stats()  # Counters as init-db would have built them
+    return SimpleNamespace(admin=admin.id, customers=[user.id for user in customers],
+                           vendor_users=[user.id for user in vendor_users],
+                           vendors=[vendor.id for vendor in vendors], products=[product.id for product in products])
+
+@pytest.fixture
+def bearer(app):
+    """``bearer(user_id)`` -> Authorization header for that user"""
+    def bearer(user_id):
+        return {'Authorization': f"Bearer {create_access_token(identity=str(user_id))}"}
+    return bearer
+
+@pytest.fixture
+def checkout(client, bearer):
+    """``checkout(user_id, {product_id: quantity})`` fills the cart and places the order; returns the response"""
+    def checkout(user_id, quantities):
+        for product_id, quantity in quantities.items():
+            db.session.add(Cart(user_id=user_id, product_id=product_id, quantity=quantity))
+        db.session.commit()
+        response = client.post('/api/orders', json={'delivery_address': 'Lagos', 'delivery_phone': '0800'},
+                               headers=bearer(user_id))
+        db.session.expire_all()
+        return response
+    return checkout
@@ -0,0 +1,163 @@
+"""
+Database engine setup
+
+init_database(app) replaces db.init_app(app). It fills in engine options from
+the config: busy timeout and per-connection PRAGMAs for SQLite (WAL, so
+readers no longer block the writer; synchronous=NORMAL; cache and mmap sizes;
+foreign keys), or pool sizing for server databases. Other modules can run
+their own statements on every new DBAPI connection with @on_connect.
+
+Read replica engines (SQLALCHEMY_REPLICA_URIS) are made by
+create_replica_engines() with the same options and hooks; replicas.py routes
+reads to them.
+
+Statement timing is shared: one pair of cursor-execute listeners on every
+Engine times each statement once and hands the duration to the observers
+registered with @on_query (metrics, profiling, the slow-query log).
+
+add_to_row() adds to a counter row, creating it if missing, in a single
+upsert, so concurrent first writes for the same key cannot collide.
+"""
+
+import os
+import time
+from sqlalchemy import create_engine, event, insert, update
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import IntegrityError
+from models import db
+
+_connect_hooks = []
+_query_observers = []
+
+def on_connect(hook):
+    """Register ``hook(dbapi_connection, dialect_name)`` to run on every new connection"""
+    _connect_hooks.append(hook)
+    return hook
+
+def on_query(observer):
+    """Register ``observer(conn, statement, parameters, executemany, seconds)`` to run after every statement"""
+    if observer not in _query_observers:
+        _query_observers.append(observer)
+    if not event.contains(Engine, 'before_cursor_execute', _start_query_timer):
+        event.listen(Engine, 'before_cursor_execute', _start_query_timer)
+        event.listen(Engine, 'after_cursor_execute', _stop_query_timer)
+    return observer
+
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_query_start', []).append(time.perf_counter())
+
+def _stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('_query_start')
+    if not starts:
+        return
+    seconds = time.perf_counter() - starts.pop()
+    for observer in _query_observers:
+        observer(conn, statement, parameters, executemany, seconds)
+
+def is_sqlite(uri):
+    return make_url(uri).get_backend_name() == 'sqlite'
+
+def engine_options(config, uri=None):
+    """SQLALCHEMY_ENGINE_OPTIONS derived from the config (explicit options win)"""
+    uri = uri or config['SQLALCHEMY_DATABASE_URI']
+    if is_sqlite(uri):
+        busy_timeout = config.get('SQLITE_PRAGMAS', {}).get('busy_timeout', 5000)
+        options = {'connect_args': {'timeout': busy_timeout / 1000, 'check_same_thread': False}}
+    else:
+        options = {
+            'pool_size': config.get('DB_POOL_SIZE', 5),
+            'max_overflow': config.get('DB_MAX_OVERFLOW', 10),
+            'pool_timeout': config.get('DB_POOL_TIMEOUT', 30),
+            'pool_recycle': config.get('DB_POOL_RECYCLE', 1800),
+            'pool_pre_ping': config.get('DB_POOL_PRE_PING', True),
+        }
+    options.update(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    return options
+
+def _apply_sqlite_pragmas(pragmas):
+    def apply(dbapi_connection, dialect_name):
+        if dialect_name != 'sqlite':
+            return
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+    return apply
+
+def init_database(app):
+    """Configure engine options, initialise Flask-SQLAlchemy and install connection hooks"""
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+    db.init_app(app)
+
+    with app.app_context():
+        for engine in db.engines.values():
+            _install_hooks(app, engine)
+
+def _install_hooks(app, engine):
+    hooks = [_apply_sqlite_pragmas(app.config.get('SQLITE_PRAGMAS', {}))]
+    dialect_name = engine.dialect.name
+
+    @event.listens_for(engine, 'connect')
+    def run_hooks(dbapi_connection, connection_record):
+        for hook in hooks + _connect_hooks:
+            hook(dbapi_connection, dialect_name)
+
+def create_replica_engines(app):
+    """One engine per SQLALCHEMY_REPLICA_URIS entry, configured like the primary"""
+    engines = []
+    for uri in app.config.get('SQLALCHEMY_REPLICA_URIS') or []:
+        url = make_url(uri)
+        if is_sqlite(uri) and url.database and url.database != ':memory:' and not os.path.isabs(url.database):
+            url = url.set(database=os.path.join(app.instance_path, url.database))  # As Flask-SQLAlchemy does
+        engine = create_engine(url, echo=app.config.get('SQLALCHEMY_ECHO', False), **engine_options(app.config, uri))
+        _install_hooks(app, engine)
+        engines.append(engine)
+    return engines
+
+# Counter rows
+def add_to_row(model, keys, deltas):
+    """Add ``deltas`` (column -> amount) to the ``model`` row matching ``keys``, inserting it if missing.
+
+    ``keys`` must be the table's primary key or a unique constraint. SQLite and
+    PostgreSQL use INSERT ... ON CONFLICT DO UPDATE, MySQL ON DUPLICATE KEY
+    UPDATE; elsewhere a losing concurrent INSERT is retried as an UPDATE.
+    """
+    table = model.__table__
+    values = {**keys, **deltas}
+    dialect_name = db.session.get_bind().dialect.name
+    if dialect_name in ('sqlite', 'postgresql'):
+        # Imported here: loading the dialect packages up front costs every process ~15 ms at startup
+        from sqlalchemy.dialects import postgresql, sqlite
+        upsert_insert = sqlite.insert if dialect_name == 'sqlite' else postgresql.insert
+        statement = upsert_insert(table).values(values)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={name: table.c[name] + statement.excluded[name] for name in deltas}
+        )
+    elif dialect_name in ('mysql', 'mariadb'):
+        from sqlalchemy.dialects import mysql
+        statement = mysql.insert(table).values(values)
+        statement = statement.on_duplicate_key_update(
+            {name: table.c[name] + statement.inserted[name] for name in deltas}
+        )
+    else:
+        _add_then_insert(table, keys, deltas)
+        return
+    db.session.execute(statement)
+
+def _add_then_insert(table, keys, deltas):
+    increment = (update(table)
+                 .where(*[table.c[name] == value for name, value in keys.items()])
+                 .values({name: table.c[name] + delta for name, delta in deltas.items()}))
+    if db.session.execute(increment).rowcount:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.execute(insert(table).values({**keys, **deltas}))
+    except IntegrityError:  # Another transaction created the row first
+        db.session.execute(increment)
+
+def sqlite_pragma(name):
+    """Current value of a PRAGMA on a pooled connection (for checks and benchmarks)"""
+    with db.engine.connect() as connection:
+        return connection.exec_driver_sql(f'PRAGMA {name}').scalar()
@@ -0,0 +1,144 @@
+"""
+Streaming report exports
+
+Rows are read through a server-side cursor (yield_per) and written out as
+CSV or NDJSON in chunks by a generator, so memory use stays flat however many
+orders a date range covers.
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime, timedelta
+from sqlalchemy import func, select
+from models import db, User, Vendor, Order, OrderItem, Product
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+FETCH_SIZE = 1000
+CHUNK_ROWS = 500
+
+def parse_date_range(args):
+    """``(start, end)`` datetimes from ``from``/``to`` query args; ``to`` is inclusive"""
+    start = date.fromisoformat(args['from']) if args.get('from') else None
+    end = date.fromisoformat(args['to']) if args.get('to') else None
+    if start and end and start > end:
+        raise ValueError('from must not be after to')
+    return (
+        datetime.combine(start, datetime.min.time()) if start else None,
+        datetime.combine(end + timedelta(days=1), datetime.min.time()) if end else None
+    )
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, 'value'):  # Enum
+        return value.value
+    return value
+
+def write_rows(columns, rows, fmt):
+    """Yield CSV or NDJSON text chunks for ``rows`` (sequences matching ``columns``)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == 'csv' else None
+    if writer:
+        writer.writerow(columns)
+    count = 0
+    for row in rows:
+        values = [_plain(value) for value in row]
+        if writer:
+            writer.writerow(values)
+        else:
+            buffer.write(json.dumps(dict(zip(columns, values)), separators=(',', ':')))
+            buffer.write('\n')
+        count += 1
+        if count % CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def _stream(stmt):
+    return db.session.execute(stmt.execution_options(yield_per=FETCH_SIZE))
+
+ORDER_COLUMNS = [
+    'order_id', 'order_number', 'created_at', 'status', 'customer_username', 'customer_email',
+    'order_total', 'delivery_fee', 'item_id', 'product_id', 'product_name', 'vendor_id',
+    'vendor_name', 'quantity', 'price', 'line_total', 'commission_rate', 'commission', 'vendor_amount'
+]
+
+def order_rows(start=None, end=None, include_subtotals=False):
+    """One row per order line item; optionally followed by per-vendor subtotal rows"""
+    stmt = select(
+        Order.id, Order.order_number, Order.created_at, Order.status, User.username, User.email,
+        Order.total_amount, Order.delivery_fee, OrderItem.id, OrderItem.product_id, Product.name,
+        OrderItem.vendor_id, Vendor.business_name, OrderItem.quantity, OrderItem.price,
+        OrderItem.commission_rate, OrderItem.vendor_amount
+    ).join(OrderItem, OrderItem.order_id == Order.id
+    ).join(User, User.id == Order.user_id
+    ).join(Product, Product.id == OrderItem.product_id
+    ).join(Vendor, Vendor.id == OrderItem.vendor_id)
+    if start:
+        stmt = stmt.where(Order.created_at >= start)
+    if end:
+        stmt = stmt.where(Order.created_at < end)
+    stmt = stmt.order_by(Order.created_at, Order.id, OrderItem.id)
+
+    subtotals = {}
+    for (order_id, order_number, created_at, status, username, email, total, delivery_fee, item_id,
+         product_id, product_name, vendor_id, vendor_name, quantity, price, rate, vendor_amount) in _stream(stmt):
+        line_total = price * quantity
+        commission = line_total - vendor_amount
+        if include_subtotals:
+            subtotal = subtotals.setdefault(vendor_id, [vendor_name, 0, 0.0, 0.0, 0.0])
+            subtotal[1] += quantity
+            subtotal[2] += line_total
+            subtotal[3] += commission
+            subtotal[4] += vendor_amount
+        yield (order_id, order_number, created_at, status, username, email, total, delivery_fee,
+               item_id, product_id, product_name, vendor_id, vendor_name, quantity, price,
+               round(line_total, 2), rate, round(commission, 2), round(vendor_amount, 2))
+
+    # Subtotal rows reuse the line-item layout with the order columns left blank
+    for vendor_id, (vendor_name, quantity, line_total, commission, vendor_amount) in sorted(subtotals.items()):
+        yield (None, 'SUBTOTAL', None, None, None, None, None, None, None, None, None, vendor_id,
+               vendor_name, quantity, None, round(line_total, 2), None, round(commission, 2),
+               round(vendor_amount, 2))
+
+VENDOR_COLUMNS = [
+    'vendor_id', 'business_name', 'business_email', 'business_phone', 'status', 'commission_rate',
+    'total_sales', 'current_balance', 'created_at', 'approved_at', 'username', 'email'
+]
+
+def vendor_rows():
+    stmt = select(
+        Vendor.id, Vendor.business_name, Vendor.business_email, Vendor.business_phone, Vendor.status,
+        Vendor.commission_rate, Vendor.total_sales, Vendor.current_balance, Vendor.created_at,
+        Vendor.approved_at, User.username, User.email
+    ).join(User, User.id == Vendor.user_id).order_by(Vendor.id)
+    return _stream(stmt)
+
+COMMISSION_COLUMNS = [
+    'vendor_id', 'business_name', 'orders', 'units', 'gross_sales', 'commission', 'vendor_amount'
+]
+
+def commission_rows(start=None, end=None):
+    """Per-vendor commission totals, aggregated by the database in one grouped scan"""
+    gross = func.sum(OrderItem.price * OrderItem.quantity)
+    stmt = select(
+        OrderItem.vendor_id, Vendor.business_name, func.count(func.distinct(OrderItem.order_id)),
+        func.sum(OrderItem.quantity), gross, gross - func.sum(OrderItem.vendor_amount),
+        func.sum(OrderItem.vendor_amount)
+    ).join(Order, Order.id == OrderItem.order_id
+    ).join(Vendor, Vendor.id == OrderItem.vendor_id)
+    if start:
+        stmt = stmt.where(Order.created_at >= start)
+    if end:
+        stmt = stmt.where(Order.created_at < end)
+    stmt = stmt.group_by(OrderItem.vendor_id, Vendor.business_name).order_by(OrderItem.vendor_id)
+
+    for vendor_id, name, orders, units, gross_sales, commission, vendor_amount in _stream(stmt):
+        yield (vendor_id, name, orders, units, round(gross_sales or 0, 2),
+               round(commission or 0, 2), round(vendor_amount or 0, 2))
@@ -0,0 +1,13 @@
+"""
+gunicorn settings for the ShopNaija API: gunicorn -c gunicorn.conf.py wsgi:app
+
+Values come from serve.settings() (sized from the CPU count, overridable via
+WEB_CONCURRENCY, WEB_THREADS, BIND, ...).
+"""
+
+from serve import settings, post_fork, post_worker_init
+
+globals().update(settings())
+
+worker_class = 'gthread'
+preload_app = True  # Import and configure the app once, then fork workers
@@ -0,0 +1,96 @@
+"""
+Fast JSON for Flask
+
+init_json(app) installs a JSON provider that encodes datetimes and dates as
+ISO 8601 and enums by value, so routes and serializers can hand over model
+values as they are instead of calling .isoformat()/.value per row. orjson is
+used when installed (several times faster, and it writes bytes straight into
+the response); otherwise the standard library json module.
+
+Keys are not sorted (Flask's default provider sorts them on every response);
+JSON_SORT_KEYS = True restores that.
+"""
+
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date, time
+from enum import Enum
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Optional dependency
+    orjson = None
+
+def _default(value):
+    """Values neither encoder handles natively"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if hasattr(value, '__html__'):
+        return str(value.__html__())
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """The standard library encoder with ISO datetimes and enum values"""
+
+    name = 'json'
+    sort_keys = False
+    default = staticmethod(_default)
+
+    def _pretty(self):
+        return self.compact is False or (self.compact is None and self._app.debug)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = 2 if self._pretty() else None
+        separators = None if indent else (',', ':')
+        return self._app.response_class(
+            f'{self.dumps(obj, indent=indent, separators=separators)}\n', mimetype=self.mimetype
+        )
+
+class OrjsonProvider(StdlibJSONProvider):
+    """orjson encoder: datetimes, dates, enums, UUIDs and dataclasses natively"""
+
+    name = 'orjson'
+
+    def _options(self, pretty=False):
+        options = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if pretty:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=_default, option=self._options(bool(kwargs.get('indent')))).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        options = self._options(self._pretty()) | orjson.OPT_APPEND_NEWLINE
+        return self._app.response_class(orjson.dumps(obj, default=_default, option=options),
+                                        mimetype=self.mimetype)
+
+PROVIDERS = {'json': StdlibJSONProvider}
+if orjson is not None:
+    PROVIDERS['orjson'] = OrjsonProvider
+
+def init_json(app):
+    """Install the JSON provider named by JSON_BACKEND ('auto' picks orjson when installed)"""
+    backend = app.config.get('JSON_BACKEND', 'auto')
+    if backend == 'auto':
+        backend = 'orjson' if orjson is not None else 'json'
+    if backend not in PROVIDERS:
+        raise RuntimeError(f"JSON_BACKEND '{backend}' is not available (installed: {', '.join(PROVIDERS)})")
+    app.json = PROVIDERS[backend](app)
+    app.json.sort_keys = app.config.get('JSON_SORT_KEYS', False)
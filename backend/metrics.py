@@ -0,0 +1,165 @@
+"""
+Request and SQL metrics
+
+init_metrics(app) times every request and counts the SQL statements it runs
+(via database.on_query), keeping per-endpoint latency histograms,
+status-code counters, response sizes and DB time in process memory. They are
+served at /metrics in the Prometheus text format. Requests that end in an
+unhandled exception are recorded from teardown_request as status 500. With SERVER_TIMING enabled
+(development/testing) each response also carries a Server-Timing header.
+
+Metrics are per process: under gunicorn each worker reports its own, so
+scrape every worker or aggregate in Prometheus by instance.
+"""
+
+import bisect
+import threading
+import time
+from flask import Response, current_app, g, request
+from database import on_query
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Registry:
+    """Thread-safe in-memory counters, keyed by (endpoint, method)"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.latency = {}      # key -> [bucket counts..., +Inf count, sum]
+            self.statuses = {}     # (endpoint, method, status) -> count
+            self.sizes = {}        # key -> [count, total bytes]
+            self.queries = {}      # key -> [statements, seconds]
+            self.background = [0, 0.0]  # statements/seconds outside any request
+
+    def observe(self, endpoint, method, status, seconds, size, queries, db_seconds):
+        key = (endpoint, method)
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            latency = self.latency.get(key)
+            if latency is None:
+                latency = self.latency[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            latency[index] += 1
+            latency[-1] += seconds
+            status_key = (endpoint, method, status)
+            self.statuses[status_key] = self.statuses.get(status_key, 0) + 1
+            if size is not None:
+                sizes = self.sizes.setdefault(key, [0, 0])
+                sizes[0] += 1
+                sizes[1] += size
+            counts = self.queries.setdefault(key, [0, 0.0])
+            counts[0] += queries
+            counts[1] += db_seconds
+
+    def observe_background_query(self, seconds):
+        with self._lock:
+            self.background[0] += 1
+            self.background[1] += seconds
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            latency = {key: list(values) for key, values in self.latency.items()}
+            statuses = dict(self.statuses)
+            sizes = {key: list(values) for key, values in self.sizes.items()}
+            queries = {key: list(values) for key, values in self.queries.items()}
+            background = list(self.background)
+
+        lines = [
+            '# HELP http_request_duration_seconds Request latency by endpoint.',
+            '# TYPE http_request_duration_seconds histogram',
+        ]
+        for (endpoint, method), values in sorted(latency.items()):
+            labels = f'endpoint="{endpoint}",method="{method}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            total = cumulative + values[len(self.buckets)]
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {total}')
+            lines.append(f'http_request_duration_seconds_sum{{{labels}}} {values[-1]:.6f}')
+            lines.append(f'http_request_duration_seconds_count{{{labels}}} {total}')
+
+        lines += ['# HELP http_requests_total Requests by endpoint and status code.',
+                  '# TYPE http_requests_total counter']
+        for (endpoint, method, status), count in sorted(statuses.items()):
+            lines.append(f'http_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {count}')
+
+        lines += ['# HELP http_response_size_bytes Response body sizes (streamed responses excluded).',
+                  '# TYPE http_response_size_bytes summary']
+        for (endpoint, method), (count, total) in sorted(sizes.items()):
+            labels = f'endpoint="{endpoint}",method="{method}"'
+            lines.append(f'http_response_size_bytes_sum{{{labels}}} {total}')
+            lines.append(f'http_response_size_bytes_count{{{labels}}} {count}')
+
+        lines += ['# HELP db_queries_total SQL statements executed, by endpoint.',
+                  '# TYPE db_queries_total counter']
+        for (endpoint, method), (count, _) in sorted(queries.items()):
+            lines.append(f'db_queries_total{{endpoint="{endpoint}",method="{method}"}} {count}')
+        lines.append(f'db_queries_total{{endpoint="background",method=""}} {background[0]}')
+
+        lines += ['# HELP db_query_seconds_total Time spent executing SQL, by endpoint.',
+                  '# TYPE db_query_seconds_total counter']
+        for (endpoint, method), (_, seconds) in sorted(queries.items()):
+            lines.append(f'db_query_seconds_total{{endpoint="{endpoint}",method="{method}"}} {seconds:.6f}')
+        lines.append(f'db_query_seconds_total{{endpoint="background",method=""}} {background[1]:.6f}')
+        return '\n'.join(lines) + '\n'
+
+registry = Registry()
+
+# SQL instrumentation (all engines; cheap when no request is active)
+def _observe_query(conn, statement, parameters, executemany, seconds):
+    if g and '_metrics_start' in g:
+        g._db_queries += 1
+        g._db_seconds += seconds
+    else:
+        registry.observe_background_query(seconds)
+
+def _start_timer():
+    g._metrics_start = time.perf_counter()
+    g._db_queries = 0
+    g._db_seconds = 0.0
+
+def _record(response):
+    start = g.pop('_metrics_start', None)
+    if start is None:
+        return response
+    elapsed = time.perf_counter() - start
+    endpoint = request.endpoint or 'unmatched'
+    size = None if response.is_streamed else response.content_length
+    registry.observe(endpoint, request.method, response.status_code, elapsed, size,
+                     g._db_queries, g._db_seconds)
+    if current_app.config.get('SERVER_TIMING'):
+        response.headers['Server-Timing'] = (
+            f'app;dur={elapsed * 1000:.1f}, '
+            f'db;dur={g._db_seconds * 1000:.1f};desc="{g._db_queries} queries"'
+        )
+    return response
+
+def _record_failure(error=None):
+    """A request whose exception skipped after_request is still counted, as a 500"""
+    start = g.pop('_metrics_start', None)
+    if start is None:
+        return
+    registry.observe(request.endpoint or 'unmatched', request.method, 500, time.perf_counter() - start, None,
+                     g._db_queries, g._db_seconds)
+
+def metrics_view():
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return Response('Unauthorized\n', status=401, mimetype='text/plain')
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+def init_metrics(app):
+    """Install the request hooks and the /metrics endpoint (unless METRICS_ENABLED is off)"""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    on_query(_observe_query)
+    app.before_request(_start_timer)
+    app.after_request(_record)
+    app.teardown_request(_record_failure)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
@@ -1,12 +1,14 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
-import bcrypt
+from passwords import hash_password, verify_password, needs_rehash
 import re
 from sqlalchemy.orm import validates
+from sqlalchemy.schema import CreateIndex, DropIndex
 from enum import Enum
 import secrets
+from replicas import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class UserRole(Enum):
     CUSTOMER = "customer"
@@ -53,10 +55,21 @@ class User(db.Model):
     def set_password(self, password):
         if len(password) < 8:
             raise ValueError("Password must be at least 8 characters")
-        self.password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        self.password = hash_password(password)
 
     def check_password(self, password):
-        return bcrypt.checkpw(password.encode('utf-8'), self.password.encode('utf-8'))
+        return verify_password(password, self.password)
+
+    def rehash_password(self, password):
+        """Re-hash a just-verified password if BCRYPT_ROUNDS changed; True if it did"""
+        if not needs_rehash(self.password):
+            return False
+        self.password = hash_password(password)
+        return True
+
+# Case-insensitive lookups (availability.is_available) compare lower(column), which the unique indexes can't serve
+db.Index('ix_user_username_lower', db.func.lower(User.username))
+db.Index('ix_user_email_lower', db.func.lower(User.email))
 
 class Vendor(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -71,7 +84,7 @@ class Vendor(db.Model):
     account_name = db.Column(db.String(100))
     status = db.Column(db.Enum(VendorStatus), default=VendorStatus.PENDING)
     commission_rate = db.Column(db.Float, default=8.0)  # 8% commission
-    total_sales = db.Column(db.Float, default=0.0)
+    total_sales = db.Column(db.Float, default=0.0, index=True)
     current_balance = db.Column(db.Float, default=0.0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     approved_at = db.Column(db.DateTime)
@@ -80,8 +93,17 @@ class Vendor(db.Model):
     products = db.relationship('Product', backref='vendor', lazy=True)
 
 class Product(db.Model):
+    __table_args__ = (
+        # Partial index covering the low-stock listing/counts, so they never scan Product
+        db.Index(
+            'ix_product_low_stock', 'vendor_id', 'is_active', 'stock', 'min_stock',
+            sqlite_where=db.text('stock <= min_stock AND is_active = 1'),
+            postgresql_where=db.text('stock <= min_stock AND is_active')
+        ),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    vendor_id = db.Column(db.Integer, db.ForeignKey('vendor.id'), nullable=False)
+    vendor_id = db.Column(db.Integer, db.ForeignKey('vendor.id'), nullable=False, index=True)
     name = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text)
     price = db.Column(db.Float, nullable=False)
@@ -118,7 +140,7 @@ class Product(db.Model):
 
 class ProductImage(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False, index=True)
     image_url = db.Column(db.String(500), nullable=False)
     is_primary = db.Column(db.Boolean, default=False)
     alt_text = db.Column(db.String(200))
@@ -135,6 +157,8 @@ class ProductReview(db.Model):
     user = db.relationship('User', backref='reviews')
 
 class Order(db.Model):
+    __table_args__ = (db.Index('ix_order_created_at_id', 'created_at', 'id'),)
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     order_number = db.Column(db.String(20), unique=True, nullable=False)
@@ -155,9 +179,9 @@ class Order(db.Model):
 
 class OrderItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False, index=True)
     product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
-    vendor_id = db.Column(db.Integer, db.ForeignKey('vendor.id'), nullable=False)
+    vendor_id = db.Column(db.Integer, db.ForeignKey('vendor.id'), nullable=False, index=True)
     quantity = db.Column(db.Integer, nullable=False)
     price = db.Column(db.Float, nullable=False)  # Price at time of purchase
     commission_rate = db.Column(db.Float, nullable=False)  # Commission rate at time of purchase
@@ -165,6 +189,55 @@ class OrderItem(db.Model):
     
     vendor = db.relationship('Vendor', backref='order_items')
 
+class VendorSalesDaily(db.Model):
+    """Per-vendor daily sales bucket, maintained at checkout (see analytics.py)"""
+    __tablename__ = 'vendor_sales_daily'
+    __table_args__ = (db.UniqueConstraint('vendor_id', 'day', name='uq_vendor_sales_daily_vendor_day'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    vendor_id = db.Column(db.Integer, db.ForeignKey('vendor.id'), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)  # Sum of vendor_amount
+    units = db.Column(db.Integer, nullable=False, default=0)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+
+class StockAlert(db.Model):
+    """Low-stock threshold crossing recorded by stock_alerts.record_stock_changes"""
+    __tablename__ = 'stock_alert'
+    __table_args__ = (db.Index('ix_stock_alert_vendor_created', 'vendor_id', 'created_at'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
+    vendor_id = db.Column(db.Integer, db.ForeignKey('vendor.id'), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)  # low_stock, out_of_stock, restocked
+    stock = db.Column(db.Integer, nullable=False)
+    min_stock = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class IdentityChange(db.Model):
+    """A user's role, vendor status, username or email changed; other workers re-read them (auth.py, availability.py)"""
+    __tablename__ = 'identity_change'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)  # No foreign key: deleted users are recorded too
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class PlatformStat(db.Model):
+    """Platform-wide counter maintained on the write paths (see platform_stats.py)"""
+    __tablename__ = 'platform_stat'
+
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Float, nullable=False, default=0.0)
+
+class PlatformDailyStat(db.Model):
+    """Daily order/revenue rollup backing the time-windowed dashboard figures"""
+    __tablename__ = 'platform_daily_stat'
+
+    day = db.Column(db.Date, primary_key=True)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+    commission = db.Column(db.Float, nullable=False, default=0.0)
+
 class Cart(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -181,6 +254,11 @@ class Cart(db.Model):
         return quantity
 
 class AdminAction(db.Model):
+    __table_args__ = (
+        db.Index('ix_admin_action_created_at_id', 'created_at', 'id'),
+        db.Index('ix_admin_action_type_created_at', 'action_type', 'created_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     admin_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     action_type = db.Column(db.String(100), nullable=False)  # vendor_approval, product_review, etc.
@@ -190,6 +268,21 @@ class AdminAction(db.Model):
     
     admin = db.relationship('User', backref='admin_actions')
 
+class AdminActionArchive(db.Model):
+    """Admin actions moved out of the hot table by audit.archive_admin_actions"""
+    __tablename__ = 'admin_action_archive'
+    __table_args__ = (
+        db.Index('ix_admin_action_archive_created_at_id', 'created_at', 'id'),
+        db.Index('ix_admin_action_archive_type_created_at', 'action_type', 'created_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    admin_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    action_type = db.Column(db.String(100), nullable=False)
+    target_id = db.Column(db.Integer)
+    description = db.Column(db.Text)
+    created_at = db.Column(db.DateTime)
+
 class EmailTemplate(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), unique=True, nullable=False)
@@ -197,3 +290,32 @@ class EmailTemplate(db.Model):
     content = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+# Expression indexes can't be reflected, so checkfirst never sees them; these dialects check in the DDL instead
+_IF_EXISTS_DIALECTS = ('sqlite', 'postgresql')
+
+def create_index(connection, index):
+    """CREATE INDEX unless it already exists"""
+    if connection.dialect.name in _IF_EXISTS_DIALECTS:
+        connection.execute(CreateIndex(index, if_not_exists=True))
+    else:
+        index.create(connection, checkfirst=True)
+
+def drop_index(connection, index):
+    """DROP INDEX if it exists"""
+    if connection.dialect.name in _IF_EXISTS_DIALECTS:
+        connection.execute(DropIndex(index, if_exists=True))
+    else:
+        index.drop(connection, checkfirst=True)
+
+def create_missing_indexes():
+    """Create indexes declared on models that db.create_all() skipped because the table already existed"""
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                create_index(connection, index)
+
+def create_schema():
+    """Create missing tables and indexes (the init-db command; on startup only with AUTO_CREATE_SCHEMA)"""
+    db.create_all()
+    create_missing_indexes()
@@ -0,0 +1,51 @@
+"""
+Keyset (cursor) pagination helpers
+
+Listings ordered by (created_at DESC, id DESC) hand out an opaque cursor for
+the last row of a page. The next page starts strictly after that row, so its
+cost does not grow with the page number the way OFFSET does. Rows without a
+created_at sort last (as the oldest) on every dialect.
+"""
+
+import base64
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+def encode_cursor(created_at, row_id):
+    created = created_at.isoformat() if created_at is not None else ''
+    raw = f'{created}|{row_id}'.encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_cursor(cursor):
+    """Return ``(created_at, id)`` from a cursor (created_at may be None); raises ValueError if malformed"""
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+        return datetime.fromisoformat(created_at) if created_at else None, int(row_id)
+    except (UnicodeError, ValueError, TypeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+def after_cursor(created_col, id_col, cursor):
+    """Filter clause selecting rows that come after ``cursor`` in (created_at DESC NULLS LAST, id DESC) order"""
+    created_at, row_id = decode_cursor(cursor)
+    if created_at is None:
+        return and_(created_col.is_(None), id_col < row_id)
+    return or_(created_col < created_at, and_(created_col == created_at, id_col < row_id), created_col.is_(None))
+
+def newest_first(query, created_col, id_col):
+    """``query`` ordered by (created_at DESC NULLS LAST, id DESC)"""
+    created = created_col.desc()
+    if query.session.get_bind().dialect.name == 'postgresql':  # SQLite and MySQL already sort NULL last in DESC
+        created = created.nulls_last()
+    return query.order_by(created, id_col.desc())
+
+def keyset_page(query, created_col, id_col, per_page, cursor=None):
+    """Fetch one keyset page; returns ``(rows, next_cursor)``"""
+    if cursor:
+        query = query.filter(after_cursor(created_col, id_col, cursor))
+    rows = newest_first(query, created_col, id_col).limit(per_page + 1).all()
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, created_col.key), getattr(last, id_col.key))
+    return rows, next_cursor
@@ -0,0 +1,71 @@
+"""
+Password hashing service
+
+bcrypt releases the GIL while it works, so hashes run in a small bounded
+thread pool (BCRYPT_WORKERS) instead of on the request thread: a burst of
+logins can use at most that many cores and the other request threads keep
+getting scheduled. The cost factor comes from BCRYPT_ROUNDS; hashes made with
+a different cost are upgraded on the next successful login (see needs_rehash).
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, has_app_context
+
+DEFAULT_ROUNDS = 12
+
+_pool = {'executor': None}
+_pool_lock = threading.Lock()
+
+def _setting(name, default):
+    return current_app.config.get(name, default) if has_app_context() else default
+
+def _executor():
+    if _pool['executor'] is None:
+        with _pool_lock:
+            if _pool['executor'] is None:
+                workers = _setting('BCRYPT_WORKERS', None) or min(4, os.cpu_count() or 1)
+                _pool['executor'] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+    return _pool['executor']
+
+def configured_rounds():
+    return _setting('BCRYPT_ROUNDS', DEFAULT_ROUNDS)
+
+def hash_password(password, rounds=None):
+    """bcrypt hash of ``password`` at ``rounds`` (default BCRYPT_ROUNDS), computed in the pool"""
+    import bcrypt  # Imported on first use; only the auth routes need it
+    salt = bcrypt.gensalt(rounds or configured_rounds())
+    return _executor().submit(bcrypt.hashpw, password.encode('utf-8'), salt).result().decode('utf-8')
+
+def verify_password(password, hashed):
+    """True if ``password`` matches ``hashed``, checked in the pool"""
+    if not hashed:
+        return False
+    import bcrypt
+    try:
+        return _executor().submit(bcrypt.checkpw, password.encode('utf-8'), hashed.encode('utf-8')).result()
+    except ValueError:  # Not a bcrypt hash
+        return False
+
+def hash_rounds(hashed):
+    """Cost factor stored in a ``$2b$12$...`` hash, or None if it cannot be read"""
+    try:
+        return int(hashed.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+def needs_rehash(hashed):
+    """True when ``hashed`` was made with a cost other than BCRYPT_ROUNDS"""
+    return hash_rounds(hashed) != configured_rounds()
+
+def shutdown():
+    """Stop the worker pool (a new one is started on next use)"""
+    with _pool_lock:
+        executor, _pool['executor'] = _pool['executor'], None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+def reset_after_fork():
+    """Forget a pool inherited from the parent process; its threads did not survive the fork"""
+    _pool['executor'] = None
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Platform counters for the admin dashboard
+
+The write paths (signup, vendor registration/approval, product create and
+deactivation, checkout) adjust PlatformStat counters and the PlatformDailyStat
+rollup inside their own transactions. The dashboard then reads a handful of
+rows instead of scanning User/Vendor/Product/Order.
+
+Counters are only adjusted once they exist. They are created by init-db
+(init_platform_stats), never lazily by a request, so two workers cannot race
+to rebuild them. rebuild_platform_stats() recomputes everything from the
+source tables and works as a repair tool: python platform_stats.py
+"""
+
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from sqlalchemy import bindparam, func, update
+from database import add_to_row
+from models import db, User, Vendor, Product, Order, PlatformStat, PlatformDailyStat, UserRole, VendorStatus, OrderStatus
+
+logger = logging.getLogger(__name__)
+
+CUSTOMERS = 'customers'
+VENDORS = 'vendors'
+VENDORS_PENDING = 'vendors_pending'
+VENDORS_APPROVED = 'vendors_approved'
+PRODUCTS = 'products'
+PRODUCTS_ACTIVE = 'products_active'
+ORDERS = 'orders'
+ORDERS_PENDING = 'orders_pending'
+REVENUE = 'revenue'
+COMMISSION = 'commission'
+
+COUNTERS = (CUSTOMERS, VENDORS, VENDORS_PENDING, VENDORS_APPROVED, PRODUCTS,
+            PRODUCTS_ACTIVE, ORDERS, ORDERS_PENDING, REVENUE, COMMISSION)
+
+_VENDOR_STATUS_COUNTERS = {
+    VendorStatus.PENDING: VENDORS_PENDING,
+    VendorStatus.APPROVED: VENDORS_APPROVED,
+}
+
+def increment(**deltas):
+    """Add ``deltas`` (counter name -> amount) to the counters in the current transaction"""
+    rows = [{'b_name': name, 'b_delta': delta} for name, delta in deltas.items() if delta]
+    if not rows:
+        return
+    table = PlatformStat.__table__
+    db.session.execute(
+        update(table)
+        .where(table.c.name == bindparam('b_name'))
+        .values(value=table.c.value + bindparam('b_delta')),
+        rows
+    )
+
+def vendor_status_changed(old_status, new_status, count=1):
+    """Move ``count`` vendors between the per-status counters"""
+    deltas = defaultdict(int)
+    if old_status in _VENDOR_STATUS_COUNTERS:
+        deltas[_VENDOR_STATUS_COUNTERS[old_status]] -= count
+    if new_status in _VENDOR_STATUS_COUNTERS:
+        deltas[_VENDOR_STATUS_COUNTERS[new_status]] += count
+    increment(**deltas)
+
+def record_order(order):
+    """Count a new order in the totals and in today's rollup"""
+    increment(**{
+        ORDERS: 1,
+        ORDERS_PENDING: 1,
+        REVENUE: order.total_amount,
+        COMMISSION: order.commission_amount
+    })
+
+    day = (order.created_at or datetime.utcnow()).date()
+    add_to_row(PlatformDailyStat, {'day': day},
+               {'orders': 1, 'revenue': order.total_amount, 'commission': order.commission_amount})
+
+def rebuild_platform_stats():
+    """Recompute every counter and daily rollup from the source tables"""
+    values = {
+        CUSTOMERS: User.query.filter(User.role == UserRole.CUSTOMER).count(),
+        VENDORS: Vendor.query.count(),
+        VENDORS_PENDING: Vendor.query.filter(Vendor.status == VendorStatus.PENDING).count(),
+        VENDORS_APPROVED: Vendor.query.filter(Vendor.status == VendorStatus.APPROVED).count(),
+        PRODUCTS: Product.query.count(),
+        PRODUCTS_ACTIVE: Product.query.filter(Product.is_active == True).count(),
+        ORDERS: Order.query.count(),
+        ORDERS_PENDING: Order.query.filter(Order.status == OrderStatus.PENDING).count(),
+        REVENUE: db.session.query(func.sum(Order.total_amount)).scalar() or 0,
+        COMMISSION: db.session.query(func.sum(Order.commission_amount)).scalar() or 0,
+    }
+
+    day = func.date(Order.created_at)
+    daily = db.session.query(
+        day, func.count(Order.id), func.sum(Order.total_amount), func.sum(Order.commission_amount)
+    ).group_by(day).all()
+
+    PlatformStat.query.delete()
+    PlatformDailyStat.query.delete()
+    db.session.bulk_insert_mappings(PlatformStat, [
+        {'name': name, 'value': value} for name, value in values.items()
+    ])
+    db.session.bulk_insert_mappings(PlatformDailyStat, [
+        {
+            'day': day_value if isinstance(day_value, date) else date.fromisoformat(day_value),
+            'orders': orders,
+            'revenue': revenue or 0.0,
+            'commission': commission or 0.0
+        } for day_value, orders, revenue, commission in daily if day_value is not None
+    ])
+    db.session.commit()
+    return values
+
+def init_platform_stats():
+    """Build the counters if any is missing (part of init-db); returns True if they were rebuilt"""
+    names = {name for (name,) in db.session.query(PlatformStat.name)}
+    if all(name in names for name in COUNTERS):
+        return False
+    rebuild_platform_stats()
+    return True
+
+def get_counters():
+    """Current counter values (missing ones read as 0 until init-db creates them)"""
+    values = dict(db.session.query(PlatformStat.name, PlatformStat.value).all())
+    missing = [name for name in COUNTERS if name not in values]
+    if missing:
+        logger.warning("Platform counters %s are missing; run `flask init-db` or `python platform_stats.py`",
+                       ', '.join(missing))
+        values.update(dict.fromkeys(missing, 0))
+    return values
+
+def get_dashboard_stats(days):
+    """Admin dashboard payload built from counters, rollups and two small indexed reads"""
+    counters = get_counters()
+    start_day = (datetime.utcnow() - timedelta(days=days)).date()
+
+    recent_orders, recent_revenue = db.session.query(
+        func.sum(PlatformDailyStat.orders), func.sum(PlatformDailyStat.revenue)
+    ).filter(PlatformDailyStat.day >= start_day).one()
+
+    # Reads only the partial ix_product_low_stock index
+    low_stock_products = Product.query.filter(
+        Product.stock <= Product.min_stock,
+        Product.is_active == True
+    ).count()
+
+    top_vendors = db.session.query(
+        Vendor.id, Vendor.business_name, Vendor.total_sales
+    ).order_by(Vendor.total_sales.desc()).limit(5).all()
+    product_counts = dict(db.session.query(
+        Product.vendor_id, func.count(Product.id)
+    ).filter(
+        Product.vendor_id.in_([vendor.id for vendor in top_vendors])
+    ).group_by(Product.vendor_id).all()) if top_vendors else {}
+
+    return {
+        'summary': {
+            'total_users': int(counters[CUSTOMERS]),
+            'total_vendors': int(counters[VENDORS]),
+            'pending_vendors': int(counters[VENDORS_PENDING]),
+            'approved_vendors': int(counters[VENDORS_APPROVED]),
+            'total_products': int(counters[PRODUCTS]),
+            'active_products': int(counters[PRODUCTS_ACTIVE]),
+            'total_orders': int(counters[ORDERS]),
+            'recent_orders': int(recent_orders or 0),
+            'pending_orders': int(counters[ORDERS_PENDING]),
+            'low_stock_products': low_stock_products
+        },
+        'revenue': {
+            'total_revenue': counters[REVENUE],
+            'total_commission': counters[COMMISSION],
+            'recent_revenue': recent_revenue or 0,
+            'commission_rate': 8.0
+        },
+        'top_vendors': [
+            {
+                'business_name': vendor.business_name,
+                'total_sales': vendor.total_sales,
+                'product_count': product_counts.get(vendor.id, 0)
+            } for vendor in top_vendors
+        ]
+    }
+
+if __name__ == '__main__':
+    from app import create_app
+
+    app = create_app()
+    with app.app_context():
+        values = rebuild_platform_stats()
+        print("✅ Rebuilt platform counters:")
+        for name, value in values.items():
+            print(f"   - {name}: {value}")
@@ -0,0 +1,231 @@
+"""
+On-demand profiling for production requests
+
+Request profiles: a request is run under cProfile when it carries a valid
+X-Profile token (from POST /api/admin/profiling/token, signed with SECRET_KEY
+and valid for PROFILING_TOKEN_MAX_AGE seconds) or is picked at random with
+probability PROFILING_SAMPLE_RATE. Each profile is written to PROFILING_DIR
+(default instance/profiles) as <id>.pstats plus <id>.json holding the route,
+status, timings and every SQL statement with its duration; the response
+carries X-Profile-Id. Admins list and fetch them under
+/api/admin/profiling/profiles, or open a file with `python -m pstats`.
+One request per process is profiled at a time; others run normally. For
+streamed responses only the view itself is profiled, not the stream.
+
+Stack sampling: StackSampler records every thread's stack every few
+milliseconds for a time window and returns collapsed stacks, one
+"frame;frame;frame count" line per distinct stack - the input format of
+flamegraph.pl and speedscope. POST /api/admin/profiling/sample runs it in the
+worker process that handles that request.
+
+With PROFILING_ENABLED off (the ProductionConfig default) nothing is
+installed, and nothing is while SECRET_KEY is unset either: tokens signed
+with the fallback key could be forged by anyone. With it on and no token or
+sample hit, a request costs one header lookup and one random().
+"""
+
+import io
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from flask import current_app, g, request
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from config import FALLBACK_SECRET_KEY
+from database import on_query
+
+HEADER = 'X-Profile'
+PROFILE_ID = re.compile(r'^[\w.-]+$')
+
+_profiling = threading.Lock()  # cProfile cannot run in two threads at once on newer Pythons
+
+# Tokens
+def _serializer():
+    return URLSafeTimedSerializer(current_app.secret_key, salt='profiling')
+
+def create_token(admin_id):
+    """Signed token that turns on profiling for requests carrying it in X-Profile"""
+    return _serializer().dumps({'admin': admin_id})
+
+def token_valid(token):
+    try:
+        _serializer().loads(token, max_age=current_app.config.get('PROFILING_TOKEN_MAX_AGE', 900))
+        return True
+    except BadSignature:
+        return False
+
+# Request profiling
+def profile_dir(app=None):
+    app = app or current_app
+    return app.config.get('PROFILING_DIR') or os.path.join(app.instance_path, 'profiles')
+
+def _wanted():
+    token = request.headers.get(HEADER)
+    if token:
+        return token_valid(token)
+    rate = current_app.config.get('PROFILING_SAMPLE_RATE', 0.0)
+    return rate > 0 and random.random() < rate
+
+def _start_profile():
+    if not _wanted() or not _profiling.acquire(blocking=False):
+        return
+    import cProfile  # Only profiled requests need it
+    g._profile_queries = []
+    g._profile_started = time.perf_counter()
+    g._profiler = cProfile.Profile()
+    g._profiler.enable()
+
+def _finish_profile(response):
+    profiler = g.pop('_profiler', None)
+    if profiler is None:
+        return response
+    profiler.disable()
+    _profiling.release()
+    try:
+        response.headers['X-Profile-Id'] = save_profile(profiler, response)
+    except OSError as e:
+        current_app.logger.warning('Could not save profile: %s', e)
+    return response
+
+def _release_profile(error=None):
+    """A request that failed before after_request still has to stop its profiler"""
+    profiler = g.pop('_profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        _profiling.release()
+
+def save_profile(profiler, response):
+    """Write <id>.pstats and <id>.json; returns the id"""
+    directory = profile_dir()
+    os.makedirs(directory, exist_ok=True)
+    now = datetime.utcnow()
+    endpoint = (request.endpoint or 'unmatched').replace('.', '-')
+    profile_id = f"{now:%Y%m%dT%H%M%S%f}-{endpoint}-{os.getpid()}"
+    profiler.dump_stats(os.path.join(directory, f'{profile_id}.pstats'))
+    queries = g.pop('_profile_queries', [])
+    meta = {
+        'id': profile_id,
+        'created_at': now.isoformat(),
+        'method': request.method,
+        'path': request.full_path.rstrip('?'),
+        'endpoint': request.endpoint,
+        'status': response.status_code,
+        'duration_ms': round((time.perf_counter() - g._profile_started) * 1000, 3),
+        'query_count': len(queries),
+        'query_ms': round(sum(duration for _, duration in queries), 3),
+        'queries': [{'sql': sql, 'ms': duration} for sql, duration in queries],
+    }
+    with open(os.path.join(directory, f'{profile_id}.json'), 'w') as handle:
+        json.dump(meta, handle, indent=2)
+    _prune(directory, current_app.config.get('PROFILING_MAX_FILES', 200))
+    return profile_id
+
+def _prune(directory, keep):
+    ids = sorted(name[:-len('.pstats')] for name in os.listdir(directory) if name.endswith('.pstats'))
+    for profile_id in ids[:-keep] if keep else []:
+        for suffix in ('.pstats', '.json'):
+            try:
+                os.remove(os.path.join(directory, profile_id + suffix))
+            except FileNotFoundError:
+                pass
+
+def list_profiles(limit=50):
+    """Metadata (without the query list) of the newest profiles"""
+    directory = profile_dir()
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if not name.endswith('.json'):
+            continue
+        with open(os.path.join(directory, name)) as handle:
+            meta = json.load(handle)
+        meta.pop('queries', None)
+        profiles.append(meta)
+        if len(profiles) >= limit:
+            break
+    return profiles
+
+def profile_path(profile_id, suffix):
+    """Path of a stored profile file, or None for unknown or malformed ids"""
+    if not PROFILE_ID.match(profile_id):
+        return None
+    path = os.path.join(profile_dir(), profile_id + suffix)
+    return path if os.path.isfile(path) else None
+
+SORT_KEYS = ('cumulative', 'tottime', 'calls')
+
+def stats_report(path, sort='cumulative', limit=40):
+    """pstats' text table of the top ``limit`` functions in a stored profile"""
+    import pstats
+    output = io.StringIO()
+    pstats.Stats(path, stream=output).sort_stats(sort).print_stats(limit)
+    return output.getvalue()
+
+# SQL capture for profiled requests
+def _observe_query(conn, statement, parameters, executemany, seconds):
+    if g and '_profile_queries' in g:
+        g._profile_queries.append((' '.join(statement.split()), round(seconds * 1000, 3)))
+
+# Stack sampling
+class StackSampler:
+    """Periodic snapshots of every thread's stack, aggregated as collapsed stacks"""
+
+    def __init__(self, interval=0.005, ignore=()):
+        self.interval = interval
+        self.ignore = set(ignore)
+        self.stacks = Counter()
+        self.samples = 0
+
+    def sample(self):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id in self.ignore:
+                continue
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            frames.append(names.get(thread_id, f'thread-{thread_id}'))
+            self.stacks[';'.join(reversed(frames))] += 1
+        self.samples += 1
+
+    def run(self, seconds):
+        """Sample for ``seconds``; returns self"""
+        self.ignore.add(threading.get_ident())
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            self.sample()
+            time.sleep(self.interval)
+        return self
+
+    def collapsed(self):
+        """One "root;...;leaf count" line per distinct stack, most frequent first"""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+def sample_stacks(seconds, interval=0.005):
+    """Sample this process's other threads for ``seconds``; returns the StackSampler"""
+    return StackSampler(interval).run(seconds)
+
+def is_installed(app):
+    """Whether init_profiling installed the hooks on ``app``"""
+    return app.extensions.get('profiling', False)
+
+def init_profiling(app):
+    """Install the profiling hooks (unless PROFILING_ENABLED is off or SECRET_KEY is the fallback)"""
+    if not app.config.get('PROFILING_ENABLED', True):
+        return
+    if not app.secret_key or app.secret_key == FALLBACK_SECRET_KEY:
+        app.logger.warning('Profiling not installed: set SECRET_KEY, or X-Profile tokens could be forged')
+        return
+    app.extensions['profiling'] = True
+    app.before_request(_start_profile)
+    app.after_request(_finish_profile)
+    app.teardown_request(_release_profile)
+    on_query(_observe_query)
@@ -0,0 +1,71 @@
+"""
+Query counting for tests: per-endpoint budgets and N+1 detection
+
+    with count_queries() as queries:
+        client.get('/api/products')
+    assert len(queries) <= 5, queries.report()
+    assert not queries.repeated(), queries.report()
+
+count_queries() records every SQL statement executed on the app's engine(s)
+while it is active. repeated() groups them by SQL text: the same statement
+run again and again with different parameters inside one request is the
+signature of a lazy load in a loop (N+1).
+
+raise_on_lazy_load() makes any lazy relationship load that would hit the
+database raise instead, to pin down where an N+1 comes from.
+"""
+
+import re
+from collections import Counter
+from contextlib import contextmanager
+from sqlalchemy import event
+from sqlalchemy.orm import raiseload
+from models import db
+
+_WHITESPACE = re.compile(r'\s+')
+
+class QueryLog(list):
+    """SQL statements (normalised text) executed while counting"""
+
+    def repeated(self, threshold=3):
+        """``{statement: count}`` for statements run at least ``threshold`` times"""
+        return {sql: count for sql, count in Counter(self).items() if count >= threshold}
+
+    def report(self):
+        lines = [f'{len(self)} queries:']
+        for sql, count in Counter(self).most_common():
+            lines.append(f'  {count:>3} x {sql[:200]}')
+        return '\n'.join(lines)
+
+@contextmanager
+def count_queries():
+    """Collect the statements executed on every engine of the current app"""
+    log = QueryLog()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        log.append(_WHITESPACE.sub(' ', statement).strip())
+
+    engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield log
+    finally:
+        for engine in engines:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+_raiseload = {'enabled': False}
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _add_raiseload(orm_execute_state):
+    if _raiseload['enabled'] and orm_execute_state.is_select and not orm_execute_state.is_relationship_load:
+        orm_execute_state.statement = orm_execute_state.statement.options(raiseload('*', sql_only=True))
+
+@contextmanager
+def raise_on_lazy_load():
+    """Make lazy relationship loads that would emit SQL raise InvalidRequestError"""
+    previous, _raiseload['enabled'] = _raiseload['enabled'], True
+    try:
+        yield
+    finally:
+        _raiseload['enabled'] = previous
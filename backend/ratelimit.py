@@ -0,0 +1,225 @@
+"""
+Rate limiting and load shedding for expensive endpoints
+
+Each limited route has a token bucket per client: the authenticated user
+(read from the bearer token without touching the DB), otherwise the remote
+address. A signed-in user is deliberately not also keyed by address: that
+would make customers behind one NAT or proxy share a limit, or let a user
+multiply their allowance by switching addresses. Behind a reverse proxy
+remote_addr is the proxy's, so the app must be wrapped in ProxyFix.
+
+Buckets live in process memory by default; set RATELIMIT_STORAGE to a SQLite
+file path to share them between the workers of one host. A bucket that has
+refilled completely is the same as no bucket, so those are swept out every
+RATELIMIT_SWEEP_INTERVAL seconds and idle clients cost nothing. A request
+over its bucket gets 429 with Retry-After.
+
+Routes may also have a concurrency budget (CONCURRENCY_LIMITS): once that
+many requests to the route are in flight in this worker, further ones are
+shed with 503 and Retry-After instead of queueing on the database.
+
+Both checks run in the decorator, before the view does any DB work.
+"""
+
+import math
+import sqlite3
+import threading
+import time
+from functools import wraps
+from flask import current_app, jsonify, request
+from flask_jwt_extended import decode_token
+
+_PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+def parse_rate(rate):
+    """``'10/minute'`` -> ``(10, 60.0)``; also accepts ``'10/30s'`` style periods"""
+    count, period = rate.split('/')
+    period = period.strip()
+    if period in _PERIODS:
+        seconds = _PERIODS[period]
+    else:
+        seconds = float(period.rstrip('s'))
+    return int(count), float(seconds)
+
+def _refill(tokens, updated, now, capacity, per):
+    return min(capacity, tokens + (now - updated) * capacity / per)
+
+def _full_at(tokens, now, capacity, per):
+    """When a bucket holding ``tokens`` at ``now`` will be full again (and can be dropped)"""
+    return now + (capacity - tokens) * per / capacity
+
+class MemoryBackend:
+    """Token buckets in a dict, shared by the threads of one process"""
+
+    def __init__(self, sweep_interval=60):
+        self.sweep_interval = sweep_interval
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._swept = time.time()
+
+    def take(self, key, capacity, per, now=None):
+        """Take one token; returns 0 if allowed, else seconds until a token is available"""
+        now = time.time() if now is None else now
+        with self._lock:
+            if now - self._swept >= self.sweep_interval:
+                self._sweep(now)
+            tokens, updated, _ = self._buckets.get(key, (capacity, now, now))
+            tokens = _refill(tokens, updated, now, capacity, per)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now, _full_at(tokens, now, capacity, per))
+            return 0 if allowed else (1 - tokens) * per / capacity
+
+    def _sweep(self, now):
+        for key in [key for key, (_, _, full_at) in self._buckets.items() if full_at <= now]:
+            del self._buckets[key]
+        self._swept = now
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+class SQLiteBackend:
+    """Token buckets in a local SQLite file, shared by every worker on the host"""
+
+    def __init__(self, path, sweep_interval=60):
+        self.path = path
+        self.sweep_interval = sweep_interval
+        self._local = threading.local()
+        self._swept = time.time()
+        conn = self._connect()
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(rate_bucket)')]
+        if columns and 'full_at' not in columns:  # Buckets are disposable; recreate an older layout
+            conn.execute('DROP TABLE rate_bucket')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS rate_bucket '
+            '(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, full_at REAL NOT NULL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS ix_rate_bucket_full_at ON rate_bucket (full_at)')
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')
+            self._local.conn = conn
+        return conn
+
+    def take(self, key, capacity, per, now=None):
+        now = time.time() if now is None else now
+        conn = self._connect()
+        if now - self._swept >= self.sweep_interval:
+            self._swept = now  # Each worker sweeps on its own schedule; a sweep is one indexed DELETE
+            conn.execute('DELETE FROM rate_bucket WHERE full_at <= ?', (now,))
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tokens, updated FROM rate_bucket WHERE key = ?', (key,)).fetchone()
+            tokens = _refill(row[0], row[1], now, capacity, per) if row else capacity
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            conn.execute(
+                'INSERT OR REPLACE INTO rate_bucket (key, tokens, updated, full_at) VALUES (?, ?, ?, ?)',
+                (key, tokens, now, _full_at(tokens, now, capacity, per))
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return 0 if allowed else (1 - tokens) * per / capacity
+
+    def __len__(self):
+        return self._connect().execute('SELECT COUNT(*) FROM rate_bucket').fetchone()[0]
+
+    def reset(self):
+        self._connect().execute('DELETE FROM rate_bucket')
+
+_state = {'backend': None, 'storage': None}
+_state_lock = threading.Lock()
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+def get_backend():
+    """Bucket backend for the current app's RATELIMIT_STORAGE ('memory' or a file path)"""
+    storage = current_app.config.get('RATELIMIT_STORAGE', 'memory')
+    if _state['storage'] != storage:
+        with _state_lock:
+            if _state['storage'] != storage:
+                sweep_interval = current_app.config.get('RATELIMIT_SWEEP_INTERVAL', 60)
+                _state['backend'] = (MemoryBackend(sweep_interval) if storage == 'memory'
+                                     else SQLiteBackend(storage, sweep_interval))
+                _state['storage'] = storage
+    return _state['backend']
+
+def reset_after_fork():
+    """Drop backends and in-flight counts inherited from the parent process"""
+    _state['backend'] = _state['storage'] = None
+    _in_flight.clear()
+
+def client_key():
+    """``u<id>`` for a valid bearer token, otherwise ``ip:<remote address>`` (the route is added by the caller)"""
+    header = request.headers.get('Authorization', '')
+    if header.startswith('Bearer '):
+        try:
+            return f"u{decode_token(header[7:])['sub']}"
+        except Exception:
+            pass
+    return f"ip:{request.remote_addr}"
+
+def _too_many(message, status, retry_after):
+    response = jsonify({'error': message})
+    response.status_code = status
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+def _acquire(name, budget):
+    with _in_flight_lock:
+        if _in_flight.get(name, 0) >= budget:
+            return False
+        _in_flight[name] = _in_flight.get(name, 0) + 1
+        return True
+
+def _release(name):
+    with _in_flight_lock:
+        _in_flight[name] -= 1
+
+def in_flight(name):
+    return _in_flight.get(name, 0)
+
+def rate_limited(name, applies=None):
+    """Apply the RATE_LIMITS / CONCURRENCY_LIMITS entries called ``name`` to a view.
+
+    ``applies`` is an optional predicate; when it returns False the request
+    is not limited (e.g. only limit the product list when it is a search).
+    Place the decorator directly under the route so it runs first.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            config = current_app.config
+            if not config.get('RATELIMIT_ENABLED', True) or (applies and not applies()):
+                return f(*args, **kwargs)
+
+            rate = config.get('RATE_LIMITS', {}).get(name)
+            if rate:
+                capacity, per = parse_rate(rate)
+                retry_after = get_backend().take(f"{name}:{client_key()}", capacity, per)
+                if retry_after:
+                    return _too_many('Too many requests, please slow down', 429, retry_after)
+
+            budget = config.get('CONCURRENCY_LIMITS', {}).get(name)
+            if not budget:
+                return f(*args, **kwargs)
+            if not _acquire(name, budget):
+                return _too_many('Server busy, please retry shortly', 503, config.get('LOAD_SHED_RETRY_AFTER', 1))
+            try:
+                return f(*args, **kwargs)
+            finally:
+                _release(name)
+        return decorated_function
+    return decorator
@@ -0,0 +1,184 @@
+"""
+Read-replica routing
+
+With SQLALCHEMY_REPLICA_URIS set (DATABASE_REPLICA_URLS, comma-separated),
+db.session sends plain SELECTs to a replica when the request allows it and
+everything else to the primary:
+
+- GET/HEAD requests to views marked @replica_reads (catalog, product detail,
+  dashboards, exports) read from a replica; all other requests use the primary
+- once a session flushes or runs an INSERT/UPDATE/DELETE, its later reads go
+  to the primary too (read-your-writes within a request)
+- a request that wrote sets a short-lived cookie (REPLICA_STICKY_SECONDS) so
+  the same client's next reads also come from the primary
+- the X-DB-Route: primary header sends a request to the primary, and
+  `with use_primary():` does so for a block of code. Clients can only opt
+  out of replicas, never in: unsafe methods (what they read before their
+  first flush - stock, prices, statuses - is what they are about to write),
+  unmarked views and sticky clients always use the primary
+- each session (so each request) reads from one replica, picked round-robin
+  from the healthy ones; lag is checked every REPLICA_LAG_CHECK_INTERVAL
+  seconds (LAG_PROBES, per dialect) and a replica more than REPLICA_MAX_LAG
+  seconds behind, or unreachable, is skipped until it catches up. With no
+  healthy replica, reads fall back to the primary.
+
+Without replicas the session behaves exactly like Flask-SQLAlchemy's.
+"""
+
+import itertools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from flask import current_app, g, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import text
+
+ROUTE_HEADER = 'X-DB-Route'
+STICKY_COOKIE = 'db_primary_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+WROTE = 'replicas.wrote'  # Session.info keys
+PINNED = 'replicas.engine'
+
+# Replica lag (seconds behind the primary; None when it cannot be told)
+def _postgresql_lag(connection):
+    return connection.execute(text(
+        "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+    )).scalar()
+
+def _mysql_lag(connection):
+    row = connection.exec_driver_sql('SHOW REPLICA STATUS').mappings().first()
+    if row is None:  # Not a replica
+        return 0
+    return row.get('Seconds_Behind_Source')  # NULL while replication is stopped
+
+LAG_PROBES = {'postgresql': _postgresql_lag, 'mysql': _mysql_lag}  # Other dialects count as in sync
+
+def replica_lag(engine):
+    probe = LAG_PROBES.get(engine.dialect.name)
+    if probe is None:
+        return 0.0
+    with engine.connect() as connection:
+        lag = probe(connection)
+    return math.inf if lag is None else float(lag)
+
+class ReplicaSet:
+    """The replica engines of one app, with their last measured lag"""
+
+    def __init__(self, engines, max_lag=5.0, check_interval=2.0, logger=None):
+        self.engines = list(engines)
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.logger = logger
+        self.lag = {index: math.inf for index in range(len(self.engines))}  # Unknown until checked
+        self._checked = None
+        self._lock = threading.Lock()
+        self._turn = itertools.count()
+
+    def check(self):
+        """Measure every replica's lag now"""
+        for index, engine in enumerate(self.engines):
+            try:
+                self.lag[index] = replica_lag(engine)
+            except Exception as e:
+                self.lag[index] = math.inf
+                if self.logger:
+                    self.logger.warning('Replica %s unavailable: %s', engine.url.render_as_string(), e)
+        self._checked = time.monotonic()
+
+    def healthy(self):
+        """Engines within max_lag (re-checked at most every check_interval, by one thread at a time)"""
+        if self._checked is None or time.monotonic() - self._checked >= self.check_interval:
+            if self._lock.acquire(blocking=False):
+                try:
+                    self.check()
+                finally:
+                    self._lock.release()
+        return [engine for index, engine in enumerate(self.engines) if self.lag[index] <= self.max_lag]
+
+    def choose(self):
+        """Next healthy replica engine, or None to use the primary"""
+        engines = self.healthy()
+        if not engines:
+            return None
+        return engines[next(self._turn) % len(engines)]
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that reads from a replica when the current request allows it"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None:
+            return engine
+        if self._flushing or getattr(clause, 'is_dml', False):
+            self.info[WROTE] = True
+            return engine
+        if (not getattr(clause, 'is_select', False) or getattr(clause, '_for_update_arg', None) is not None
+                or self.info.get(WROTE) or g.get('db_route') != 'replica'):
+            return engine
+        replicas = current_app.extensions.get('replicas')
+        if replicas is None or engine is not self._db.engines.get(None):  # Other binds are not replicated
+            return engine
+        if PINNED not in self.info:  # One replica per session, so a request sees one consistent snapshot
+            self.info[PINNED] = replicas.choose() or engine
+        return self.info[PINNED]
+
+# Choosing a route
+def replica_reads(view):
+    """Mark a view whose GET/HEAD requests may read from a replica"""
+    view.replica_reads = True
+    return view
+
+@contextmanager
+def use_primary():
+    """Send this block's reads to the primary, even in a replica request"""
+    previous = g.get('db_route')
+    g.db_route = 'primary'
+    try:
+        yield
+    finally:
+        g.db_route = previous
+
+def _sticky():
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+def request_route():
+    """'replica' or 'primary' for the current request"""
+    if request.method not in ('GET', 'HEAD'):
+        return 'primary'
+    if request.headers.get(ROUTE_HEADER, '').lower() == 'primary':
+        return 'primary'
+    view = current_app.view_functions.get(request.endpoint)
+    if not getattr(view, 'replica_reads', False) or _sticky():
+        return 'primary'
+    return 'replica'
+
+def _route_request():
+    g.db_route = request_route()
+
+def _stick_to_primary(response):
+    from models import db
+
+    seconds = current_app.config.get('REPLICA_STICKY_SECONDS', 5)
+    if seconds and request.method not in SAFE_METHODS and db.session.info.get(WROTE):
+        response.set_cookie(STICKY_COOKIE, f'{time.time() + seconds:.3f}', max_age=math.ceil(seconds),
+                            httponly=True, samesite='Lax')
+    return response
+
+def init_replicas(app):
+    """Create the SQLALCHEMY_REPLICA_URIS engines and route reads to them (no-op without any)"""
+    from database import create_replica_engines
+
+    engines = create_replica_engines(app)
+    if not engines:
+        return None
+    replicas = ReplicaSet(engines, app.config.get('REPLICA_MAX_LAG', 5.0),
+                          app.config.get('REPLICA_LAG_CHECK_INTERVAL', 2.0), app.logger)
+    app.extensions['replicas'] = replicas
+    app.before_request(_route_request)
+    app.after_request(_stick_to_primary)
+    return replicas
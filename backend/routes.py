@@ -1,53 +1,28 @@
 from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import create_access_token, get_jwt_identity, jwt_required
+from flask_jwt_extended import get_jwt_identity, jwt_required
 from werkzeug.security import generate_password_hash, check_password_hash
-from models import db, User, Product, Cart, Vendor, Order, OrderItem, ProductReview, UserRole, VendorStatus, OrderStatus
-from datetime import datetime, timedelta
+from models import db, User, Product, ProductImage, Cart, Vendor, Order, OrderItem, ProductReview, UserRole, VendorStatus, OrderStatus
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from analytics import record_order_sales
+from stock_alerts import record_stock_changes
+from platform_stats import increment, record_order
+from ratelimit import rate_limited
+from replicas import replica_reads
+from availability import FIELDS, is_available, duplicate_user_error
+from auth import admin_required, get_current_user_id, create_user_token, invalidate_identity
+from serializers import PRODUCT_CARD, PRODUCT_DETAIL, PRODUCT_IMAGE, PRODUCT_REVIEW, CART_ITEM
 import secrets
 import re
 
-# Utility function to handle JWT identity
-def get_current_user_id():
-    """Get current user ID from JWT, handling both string and int formats"""
-    user_id = get_jwt_identity()
-    if isinstance(user_id, str):
-        return int(user_id)
-    return user_id
-
 # Create blueprints
 api = Blueprint('api', __name__)
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 vendor_bp = Blueprint('vendor', __name__, url_prefix='/vendor')
 
-# Security middleware
-def admin_required(f):
-    """Decorator to require admin access"""
-    from functools import wraps
-    @wraps(f)
-    @jwt_required()
-    def decorated_function(*args, **kwargs):
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        if not user or user.role != UserRole.ADMIN:
-            return jsonify({'error': 'Admin access required'}), 403
-        return f(*args, **kwargs)
-    return decorated_function
-
-def vendor_required(f):
-    """Decorator to require vendor access"""
-    from functools import wraps
-    @wraps(f)
-    @jwt_required()
-    def decorated_function(*args, **kwargs):
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        if not user or (user.role != UserRole.VENDOR and user.role != UserRole.ADMIN):
-            return jsonify({'error': 'Vendor access required'}), 403
-        return f(*args, **kwargs)
-    return decorated_function
-
 # Authentication Routes
 @api.route('/signup', methods=['POST'])
+@rate_limited('signup')
 def signup():
     try:
         data = request.get_json()
@@ -58,13 +33,6 @@ def signup():
             if not data.get(field):
                 return jsonify({'error': f'{field} is required'}), 400
         
-        # Check if user exists
-        if User.query.filter_by(email=data['email']).first():
-            return jsonify({'error': 'Email already registered'}), 400
-        
-        if User.query.filter_by(username=data['username']).first():
-            return jsonify({'error': 'Username already taken'}), 400
-        
         # Create new user
         user = User(
             username=data['username'],
@@ -76,10 +44,11 @@ def signup():
         user.set_password(data['password'])
         
         db.session.add(user)
+        increment(customers=1)
         db.session.commit()
         
         # Create access token
-        access_token = create_access_token(identity=str(user.id), expires_delta=timedelta(days=7))
+        access_token = create_user_token(user)
         
         return jsonify({
             'message': 'User created successfully',
@@ -92,10 +61,31 @@ def signup():
             }
         }), 201
         
+    except IntegrityError as e:
+        db.session.rollback()
+        return jsonify({'error': duplicate_user_error(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/availability', methods=['GET'])
+@rate_limited('availability')
+def check_availability():
+    """Whether a username and/or email is still free (a hint for the signup form)"""
+    try:
+        values = {field: request.args[field] for field in FIELDS if request.args.get(field, '').strip()}
+        if not values:
+            return jsonify({'error': 'username or email is required'}), 400
+        
+        return jsonify({
+            field: {'value': value, 'available': is_available(field, value)}
+            for field, value in values.items()
+        }), 200
+        
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @api.route('/login', methods=['POST'])
+@rate_limited('login')
 def login():
     try:
         data = request.get_json()
@@ -108,12 +98,13 @@ def login():
         if not user or not user.check_password(data['password']):
             return jsonify({'error': 'Invalid credentials'}), 401
         
-        # Update last login
+        # Upgrade the hash if the bcrypt cost changed, and update last login
+        user.rehash_password(data['password'])
         user.last_login = datetime.utcnow()
         db.session.commit()
         
         # Create access token
-        access_token = create_access_token(identity=str(user.id), expires_delta=timedelta(days=7))
+        access_token = create_user_token(user)
         
         return jsonify({
             'message': 'Login successful',
@@ -144,13 +135,6 @@ def register_admin():
             if not data.get(field):
                 return jsonify({'error': f'{field} is required'}), 400
         
-        # Check if user exists
-        if User.query.filter_by(email=data['email']).first():
-            return jsonify({'error': 'Email already registered'}), 400
-        
-        if User.query.filter_by(username=data['username']).first():
-            return jsonify({'error': 'Username already taken'}), 400
-        
         # Create new admin user
         admin_user = User(
             username=data['username'],
@@ -176,6 +160,9 @@ def register_admin():
             }
         }), 201
         
+    except IntegrityError as e:
+        db.session.rollback()
+        return jsonify({'error': duplicate_user_error(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -204,13 +191,6 @@ def create_first_admin():
         if len(data['password']) < 8:
             return jsonify({'error': 'Password must be at least 8 characters long'}), 400
         
-        # Check if user exists
-        if User.query.filter_by(email=data['email']).first():
-            return jsonify({'error': 'Email already registered'}), 400
-        
-        if User.query.filter_by(username=data['username']).first():
-            return jsonify({'error': 'Username already taken'}), 400
-        
         # Create new admin user
         admin_user = User(
             username=data['username'],
@@ -227,7 +207,7 @@ def create_first_admin():
         db.session.commit()
         
         # Create access token
-        access_token = create_access_token(identity=admin_user.id, expires_delta=timedelta(days=7))
+        access_token = create_user_token(admin_user)
         
         return jsonify({
             'message': 'First admin created successfully',
@@ -241,6 +221,9 @@ def create_first_admin():
             }
         }), 201
         
+    except IntegrityError as e:
+        db.session.rollback()
+        return jsonify({'error': duplicate_user_error(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -284,9 +267,11 @@ def register_vendor():
         )
         
         # Update user role
+        increment(customers=-1 if user.role == UserRole.CUSTOMER else 0, vendors=1, vendors_pending=1)
         user.role = UserRole.VENDOR
         
         db.session.add(vendor)
+        invalidate_identity(user.id)
         db.session.commit()
         
         return jsonify({
@@ -303,6 +288,8 @@ def register_vendor():
 
 # Product Routes
 @api.route('/products', methods=['GET'])
+@replica_reads
+@rate_limited('search', applies=lambda: bool(request.args.get('search')))
 def get_products():
     try:
         page = request.args.get('page', 1, type=int)
@@ -313,7 +300,9 @@ def get_products():
         min_price = request.args.get('min_price', type=float)
         max_price = request.args.get('max_price', type=float)
         
-        query = Product.query.filter(Product.is_active == True)
+        query = PRODUCT_CARD.query().select_from(Product).outerjoin(
+            Vendor, Vendor.id == Product.vendor_id
+        ).filter(Product.is_active == True)
         
         # Apply filters
         if category:
@@ -332,33 +321,7 @@ def get_products():
         
         products = query.paginate(page=page, per_page=per_page, error_out=False)
         
-        result = []
-        for product in products.items:
-            # Get primary image
-            primary_image = next((img.image_url for img in product.images if img.is_primary), None)
-            if not primary_image and product.images:
-                primary_image = product.images[0].image_url
-            
-            result.append({
-                'id': product.id,
-                'name': product.name,
-                'description': product.description,
-                'price': product.price,
-                'category': product.category,
-                'subcategory': product.subcategory,
-                'brand': product.brand,
-                'stock': product.stock,
-                'rating': product.rating,
-                'review_count': product.review_count,
-                'image_url': primary_image or f'https://picsum.photos/400/300?random={product.id}',
-                'vendor': {
-                    'id': product.vendor.id,
-                    'business_name': product.vendor.business_name,
-                    'status': product.vendor.status.value
-                } if product.vendor else None,
-                'is_low_stock': product.stock <= product.min_stock,
-                'out_of_stock': product.stock == 0
-            })
+        result = PRODUCT_CARD.many(products.items)
         
         return jsonify({
             'products': result,
@@ -376,54 +339,31 @@ def get_products():
         return jsonify({'error': str(e)}), 500
 
 @api.route('/products/<int:product_id>', methods=['GET'])
+@replica_reads
 def get_product(product_id):
     try:
-        product = Product.query.get_or_404(product_id)
+        row = PRODUCT_DETAIL.query(Product.is_active).select_from(Product).join(
+            Vendor, Vendor.id == Product.vendor_id
+        ).filter(Product.id == product_id).first()
+        if row is None:
+            return jsonify({'error': 'Resource not found'}), 404
         
-        if not product.is_active:
+        if not row.is_active:
             return jsonify({'error': 'Product not available'}), 404
         
-        # Get all images
-        images = [{'url': img.image_url, 'is_primary': img.is_primary, 'alt_text': img.alt_text} 
-                 for img in product.images]
-        
-        # Get reviews
-        reviews = []
-        for review in product.reviews[:10]:  # Limit to 10 recent reviews
-            reviews.append({
-                'id': review.id,
-                'rating': review.rating,
-                'comment': review.comment,
-                'user': review.user.username,
-                'created_at': review.created_at.isoformat(),
-                'is_verified_purchase': review.is_verified_purchase
-            })
+        product = PRODUCT_DETAIL(row)
+        product['images'] = PRODUCT_IMAGE.many(
+            PRODUCT_IMAGE.query().filter(ProductImage.product_id == product_id).order_by(ProductImage.id)
+        )
         
-        return jsonify({
-            'id': product.id,
-            'name': product.name,
-            'description': product.description,
-            'price': product.price,
-            'category': product.category,
-            'subcategory': product.subcategory,
-            'brand': product.brand,
-            'weight': product.weight,
-            'dimensions': product.dimensions,
-            'stock': product.stock,
-            'rating': product.rating,
-            'review_count': product.review_count,
-            'images': images,
-            'reviews': reviews,
-            'vendor': {
-                'id': product.vendor.id,
-                'business_name': product.vendor.business_name,
-                'total_sales': product.vendor.total_sales,
-                'created_at': product.vendor.created_at.isoformat()
-            },
-            'is_low_stock': product.stock <= product.min_stock,
-            'out_of_stock': product.stock == 0,
-            'created_at': product.created_at.isoformat()
-        }), 200
+        # The 10 most recent reviews with their authors in one query
+        product['reviews'] = PRODUCT_REVIEW.many(
+            PRODUCT_REVIEW.query().join(User, User.id == ProductReview.user_id).filter(
+                ProductReview.product_id == product_id
+            ).order_by(ProductReview.created_at.desc(), ProductReview.id.desc()).limit(10)
+        )
+        
+        return jsonify(product), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -434,35 +374,12 @@ def get_product(product_id):
 def get_cart():
     try:
         current_user_id = get_jwt_identity()
-        cart_items = Cart.query.filter_by(user_id=current_user_id).all()
-        
-        result = []
-        total = 0
-        
-        for item in cart_items:
-            product = item.product
-            item_total = product.price * item.quantity
-            total += item_total
-            
-            # Get primary image
-            primary_image = next((img.image_url for img in product.images if img.is_primary), None)
-            if not primary_image and product.images:
-                primary_image = product.images[0].image_url
-            
-            result.append({
-                'id': item.id,
-                'quantity': item.quantity,
-                'added_at': item.added_at.isoformat(),
-                'item_total': item_total,
-                'product': {
-                    'id': product.id,
-                    'name': product.name,
-                    'price': product.price,
-                    'stock': product.stock,
-                    'image_url': primary_image or f'https://picsum.photos/400/300?random={product.id}',
-                    'vendor': product.vendor.business_name
-                }
-            })
+        result = CART_ITEM.many(
+            CART_ITEM.query().join(Product, Product.id == Cart.product_id).join(
+                Vendor, Vendor.id == Product.vendor_id
+            ).filter(Cart.user_id == current_user_id).order_by(Cart.id)
+        )
+        total = sum(item['item_total'] for item in result)
         
         return jsonify({
             'cart_items': result,
@@ -514,6 +431,7 @@ def add_to_cart():
 
 # Order Routes
 @api.route('/orders', methods=['POST'])
+@rate_limited('create_order')
 @jwt_required()
 def create_order():
     try:
@@ -567,6 +485,8 @@ def create_order():
         db.session.flush()  # Get order ID
         
         # Create order items and update stock
+        order_items = []
+        stock_changes = []
         for item in cart_items:
             vendor_amount = (item.product.price * item.quantity) * (1 - item.product.vendor.commission_rate / 100)
             
@@ -581,13 +501,22 @@ def create_order():
             )
             
             # Update product stock
+            old_stock = item.product.stock
             item.product.stock -= item.quantity
+            stock_changes.append((item.product_id, item.product.vendor_id, old_stock,
+                                  item.product.stock, item.product.min_stock))
             
             # Update vendor balance
             item.product.vendor.current_balance += vendor_amount
             item.product.vendor.total_sales += (item.product.price * item.quantity)
             
             db.session.add(order_item)
+            order_items.append(order_item)
+        
+        # Update vendor sales buckets for analytics
+        record_order_sales(order, order_items)
+        record_stock_changes(stock_changes)
+        record_order(order)
         
         # Clear cart
         Cart.query.filter_by(user_id=current_user_id).delete()
@@ -0,0 +1,159 @@
+"""
+Response serializers
+
+A Serializer describes one response shape as the columns it needs and is
+compiled once, at import, into a plain function that builds the dict from a
+row tuple by position - no ORM objects, lazy loads or per-row attribute
+lookups. Datetimes and enums are left as they are; the JSON provider
+(json_provider.py) encodes them.
+
+    rows = PRODUCT_CARD.query().filter(...).all()
+    products = PRODUCT_CARD.many(rows)
+
+Fields are given as:
+    Product.name                          key 'name'
+    ('user', User.username)               explicit key
+    ('vendor', VENDOR_BRIEF)              nested object; None when its first column is NULL
+    ('is_low_stock', Computed(fn, *cols)) fn called with the values of cols
+    ('image_url', Lookup(fn, col))        fn(list of col values) -> {value: result},
+                                          called once per many() (batch load, like selectinload)
+"""
+
+from models import db, Product, ProductImage, ProductReview, Vendor, Cart, User
+
+class Computed:
+    """A field computed in Python from one or more columns"""
+
+    def __init__(self, function, *expressions):
+        self.function = function
+        self.expressions = expressions
+
+class Lookup:
+    """A field filled from one batch query over a key column (missing keys give None)"""
+
+    def __init__(self, function, expression):
+        self.function = function
+        self.expression = expression
+
+class Serializer:
+    """Row tuple -> dict for one response shape, compiled once"""
+
+    def __init__(self, *fields):
+        self.fields = [field if isinstance(field, tuple) else (field.key, field) for field in fields]
+        self.columns = []
+        self._functions = {}
+        self._lookups = []
+        body = self._source()
+        parameters = ''.join(f', _l{index}' for index in range(len(self._lookups)))
+        source = f'def serialize(row{parameters}):\n    return {body}\n'
+        namespace = dict(self._functions)
+        exec(compile(source, f'<serializer {", ".join(key for key, _ in self.fields)}>', 'exec'), namespace)
+        self._serialize = namespace['serialize']
+
+    def _index(self, expression):
+        """Position of ``expression`` in the select list, adding it if new"""
+        for index, column in enumerate(self.columns):
+            if column is expression:
+                return index
+        self.columns.append(expression)
+        return len(self.columns) - 1
+
+    def _source(self, fields=None):
+        parts = []
+        for key, value in fields or self.fields:
+            if isinstance(value, Serializer):
+                first = self._index(value.fields[0][1])
+                parts.append(f'{key!r}: ({self._source(value.fields)} if row[{first}] is not None else None)')
+            elif isinstance(value, Lookup):
+                index = self._index(value.expression)
+                self._lookups.append((value.function, index))
+                parts.append(f'{key!r}: _l{len(self._lookups) - 1}.get(row[{index}])')
+            elif isinstance(value, Computed):
+                name = f'_f{len(self._functions)}'
+                self._functions[name] = value.function
+                arguments = ', '.join(f'row[{self._index(expression)}]' for expression in value.expressions)
+                parts.append(f'{key!r}: {name}({arguments})')
+            else:
+                parts.append(f'{key!r}: row[{self._index(value)}]')
+        return '{' + ', '.join(parts) + '}'
+
+    def _load_lookups(self, rows):
+        return [function(list({row[index] for row in rows})) for function, index in self._lookups]
+
+    def __call__(self, row):
+        return self._serialize(row, *self._load_lookups([row]))
+
+    def many(self, rows):
+        rows = list(rows)
+        if not self._lookups:
+            return list(map(self._serialize, rows))
+        lookups = self._load_lookups(rows)
+        return [self._serialize(row, *lookups) for row in rows]
+
+    def query(self, *extra):
+        """Session query selecting this shape's columns (then ``extra``, unused by the serializer)"""
+        return db.session.query(*self.columns, *extra)
+
+# Shared pieces
+def primary_image_urls(product_ids):
+    """``{product_id: url}``: the primary image, else the first one, else a placeholder"""
+    urls = {product_id: f'https://picsum.photos/400/300?random={product_id}' for product_id in product_ids}
+    if product_ids:
+        images = db.session.query(ProductImage.product_id, ProductImage.image_url, ProductImage.is_primary).filter(
+            ProductImage.product_id.in_(product_ids)
+        ).order_by(ProductImage.id)
+        found = {}  # product_id -> whether the chosen image is the primary one
+        for product_id, url, is_primary in images:
+            if product_id not in found or (is_primary and not found[product_id]):
+                urls[product_id] = url
+                found[product_id] = bool(is_primary)
+    return urls
+
+IMAGE_URL = Lookup(primary_image_urls, Product.id)
+IS_LOW_STOCK = Computed(lambda stock, min_stock: stock <= min_stock, Product.stock, Product.min_stock)
+OUT_OF_STOCK = Computed(lambda stock: stock == 0, Product.stock)
+
+VENDOR_BRIEF = Serializer(Vendor.id, Vendor.business_name, Vendor.status)
+
+# Product shapes
+PRODUCT_CARD = Serializer(
+    Product.id, Product.name, Product.description, Product.price, Product.category, Product.subcategory,
+    Product.brand, Product.stock, Product.rating, Product.review_count, ('image_url', IMAGE_URL),
+    ('vendor', VENDOR_BRIEF), ('is_low_stock', IS_LOW_STOCK), ('out_of_stock', OUT_OF_STOCK)
+)
+
+PRODUCT_DETAIL = Serializer(
+    Product.id, Product.name, Product.description, Product.price, Product.category, Product.subcategory,
+    Product.brand, Product.weight, Product.dimensions, Product.stock, Product.rating, Product.review_count,
+    ('vendor', Serializer(Vendor.id, Vendor.business_name, Vendor.total_sales, Vendor.created_at)),
+    ('is_low_stock', IS_LOW_STOCK), ('out_of_stock', OUT_OF_STOCK), Product.created_at
+)
+
+VENDOR_PRODUCT = Serializer(
+    Product.id, Product.name, Product.description, Product.price, Product.category, Product.subcategory,
+    Product.brand, Product.stock, Product.min_stock, Product.is_active, Product.featured, Product.rating,
+    Product.review_count, ('image_url', IMAGE_URL), ('is_low_stock', IS_LOW_STOCK),
+    Product.created_at, Product.updated_at
+)
+
+ADMIN_PRODUCT = Serializer(
+    Product.id, Product.name, Product.price, Product.category, Product.stock, Product.min_stock,
+    Product.is_active, Product.rating, Product.review_count, ('vendor', VENDOR_BRIEF),
+    ('is_low_stock', IS_LOW_STOCK), Product.created_at
+)
+
+PRODUCT_IMAGE = Serializer(('url', ProductImage.image_url), ProductImage.is_primary, ProductImage.alt_text)
+
+PRODUCT_REVIEW = Serializer(
+    ProductReview.id, ProductReview.rating, ProductReview.comment, ('user', User.username),
+    ProductReview.created_at, ProductReview.is_verified_purchase
+)
+
+CART_ITEM = Serializer(
+    Cart.id, Cart.quantity, Cart.added_at,
+    ('item_total', Computed(lambda price, quantity: price * quantity, Product.price, Cart.quantity)),
+    ('product', Serializer(
+        Product.id, Product.name, Product.price, Product.stock, ('image_url', IMAGE_URL),
+        ('vendor', Vendor.business_name)
+    ))
+)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Production server for the ShopNaija API
+
+Runs wsgi:app under gunicorn (Linux/macOS) or waitress (Windows, or
+--server waitress after `pip install waitress`) with defaults sized from the
+CPU count. Every setting can also come from the environment:
+
+    WEB_CONCURRENCY   worker processes (gunicorn)   default 2 x CPUs + 1
+    WEB_THREADS       threads per worker             default 4
+    BIND              host:port                      default 0.0.0.0:5000
+    WEB_TIMEOUT       seconds before a stuck worker is restarted
+    WEB_KEEPALIVE     seconds to hold idle keep-alive connections
+
+    python serve.py                          # gunicorn, or waitress on Windows
+    python serve.py --workers 4 --threads 8
+    gunicorn -c gunicorn.conf.py wsgi:app    # equivalent to the first line
+
+The app is created once in the master process (preload) and every worker
+calls after_fork() to drop state inherited from it: pooled DB connections,
+the audit flusher and bcrypt threads, and rate-limit backends. Each worker
+then runs warmup.warmup() before it accepts connections.
+
+Tables are not created on startup in production; run `flask --app wsgi
+init-db` (or `python serve.py --init-db`) as a deploy step.
+"""
+
+import argparse
+import os
+import sys
+
+def default_workers():
+    return int(os.getenv('WEB_CONCURRENCY', 0)) or (os.cpu_count() or 1) * 2 + 1
+
+def default_threads():
+    return int(os.getenv('WEB_THREADS', 4))
+
+def settings(workers=None, threads=None, bind=None):
+    """Server settings shared by gunicorn.conf.py and the waitress runner"""
+    return {
+        'bind': bind or os.getenv('BIND', '0.0.0.0:5000'),
+        'workers': workers or default_workers(),
+        'threads': threads or default_threads(),
+        'timeout': int(os.getenv('WEB_TIMEOUT', 30)),
+        'graceful_timeout': int(os.getenv('WEB_GRACEFUL_TIMEOUT', 30)),
+        'keepalive': int(os.getenv('WEB_KEEPALIVE', 5)),
+        'max_requests': int(os.getenv('WEB_MAX_REQUESTS', 2000)),  # Recycle workers to bound memory growth
+        'max_requests_jitter': int(os.getenv('WEB_MAX_REQUESTS_JITTER', 200)),
+        'limit_request_line': 8190,
+        'limit_request_fields': 100,
+        'limit_request_field_size': 8190,
+    }
+
+def after_fork(app):
+    """Reset per-process state a worker inherited from the preloaded master"""
+    from models import db
+    import audit
+    import passwords
+    import ratelimit
+
+    with app.app_context():
+        # Pooled connections belong to the parent; close=False leaves its sockets/files alone
+        replicas = app.extensions.get('replicas')
+        for engine in [*db.engines.values(), *(replicas.engines if replicas else [])]:
+            engine.dispose(close=False)
+    passwords.reset_after_fork()
+    ratelimit.reset_after_fork()
+    audit.init_audit(app)
+
+def post_fork(server, worker):
+    """gunicorn post_fork hook"""
+    from wsgi import app
+    after_fork(app)
+
+def post_worker_init(worker):
+    """gunicorn post_worker_init hook: warm up before the worker starts accepting"""
+    from wsgi import app
+    from warmup import warmup
+    warmup(app)
+
+def init_db():
+    """Create missing tables, indexes and counters for the configured database (as `flask init-db`)"""
+    from wsgi import app
+    from app import init_db_command
+    with app.app_context():
+        init_db_command()
+
+def run_gunicorn(options):
+    from gunicorn.app.base import BaseApplication
+
+    class StandaloneApplication(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+            self.cfg.set('preload_app', True)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('post_fork', post_fork)
+            self.cfg.set('post_worker_init', post_worker_init)
+
+        def load(self):
+            from wsgi import app
+            return app
+
+    StandaloneApplication().run()
+
+def run_waitress(options, app=None):
+    from waitress import serve
+    from warmup import warmup
+
+    if app is None:
+        from wsgi import app
+    warmup(app)
+    host, _, port = options['bind'].rpartition(':')
+    serve(
+        app, host=host or '0.0.0.0', port=int(port),
+        threads=options['threads'] * options['workers'],  # One process, so all the capacity goes to threads
+        channel_timeout=options['timeout'],
+        max_request_body_size=app.config['MAX_CONTENT_LENGTH'],
+        max_request_header_size=options['limit_request_field_size'] * 8,
+        connection_limit=max(100, options['threads'] * 25),
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the ShopNaija API with a production WSGI server')
+    parser.add_argument('--server', choices=['gunicorn', 'waitress'],
+                        default='waitress' if sys.platform == 'win32' else 'gunicorn')
+    parser.add_argument('--bind', help='host:port (default $BIND or 0.0.0.0:5000)')
+    parser.add_argument('--workers', type=int, help='Worker processes (waitress runs workers x threads threads in one process)')
+    parser.add_argument('--threads', type=int, help='Threads per worker')
+    parser.add_argument('--init-db', action='store_true', help='Create missing tables and indexes first')
+    args = parser.parse_args()
+
+    if args.init_db:
+        init_db()
+
+    options = settings(args.workers, args.threads, args.bind)
+    print(f"🚀 Starting ShopNaija API with {args.server} on {options['bind']} "
+          f"({options['workers']} workers x {options['threads']} threads)")
+    if args.server == 'gunicorn':
+        run_gunicorn(options)
+    else:
+        run_waitress(options)
+
+if __name__ == '__main__':
+    main()
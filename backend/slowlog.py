@@ -0,0 +1,194 @@
+"""
+Slow-query log with EXPLAIN capture
+
+init_slow_query_log(app) times every SQL statement (via database.on_query);
+one that takes at least SLOW_QUERY_THRESHOLD_MS is logged (statement,
+endpoint, the line in our code that ran it, duration) to the
+'shopnaija.slowquery' logger and
+aggregated per statement shape - the SQL text with IN-lists collapsed - in
+process memory. The first time a shape is slow its plan is captured with the
+dialect's EXPLAIN (EXPLAIN QUERY PLAN on SQLite) using the same parameters,
+and full table scans in it are flagged:
+
+    SQLite       SCAN <table>               (without USING ... INDEX)
+    PostgreSQL   Seq Scan on <table>
+    MySQL        type = ALL
+
+Bound parameters can hold emails, password hashes and reset tokens, so they
+are only logged and kept with SLOW_QUERY_LOG_PARAMETERS on; without it,
+quoted literals in captured plans (PostgreSQL prints filter values) are
+masked as well.
+
+Admins read the top offenders at GET /api/admin/slow-queries. Like /metrics
+the numbers are per worker process; the log lines cover every worker.
+"""
+
+import logging
+import os
+import re
+import sys
+import threading
+from datetime import datetime
+from flask import has_request_context, request
+from database import on_query
+
+logger = logging.getLogger('shopnaija.slowquery')
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+_SKIP_FILES = {os.path.join(BACKEND_DIR, name) for name in ('slowlog.py', 'metrics.py', 'profiling.py', 'querybudget.py', 'database.py')}
+_WHITESPACE = re.compile(r'\s+')
+_QUOTED = re.compile(r"'(?:[^']|'')*'")
+_IN_LIST = re.compile(r'\((?:\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*,)+\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*\)')
+EXPLAINABLE = ('SELECT', 'WITH', 'UPDATE', 'DELETE')
+
+def statement_shape(statement):
+    """SQL text with whitespace normalised and bound IN-lists collapsed to (?...)"""
+    return _IN_LIST.sub('(?...)', _WHITESPACE.sub(' ', statement).strip())
+
+def _caller():
+    """file:line (function) of the innermost frame in this app's own code"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(BACKEND_DIR) and filename not in _SKIP_FILES and os.sep + 'eshop' + os.sep not in filename:
+            return f'{os.path.basename(filename)}:{frame.f_lineno} ({frame.f_code.co_name})'
+        frame = frame.f_back
+    return None
+
+# Plans (rows of the dialect's EXPLAIN -> (plan lines, tables scanned in full))
+_SQLITE_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?!\w| USING)')  # "SCAN t USING [COVERING] INDEX" reads an index
+_POSTGRESQL_SCAN = re.compile(r'Seq Scan on (\S+)')
+
+def _sqlite_plan(cursor, statement, parameters):
+    cursor.execute(f'EXPLAIN QUERY PLAN {statement}', parameters)
+    lines = [row[-1] for row in cursor.fetchall()]
+    scans = [match.group(1) for match in map(_SQLITE_SCAN.match, lines) if match]
+    return lines, [table for table in scans if table != 'CONSTANT']  # SCAN CONSTANT ROW reads no table
+
+def _postgresql_plan(cursor, statement, parameters):
+    # A failed EXPLAIN would abort the request's transaction, so it runs in a savepoint
+    cursor.execute('SAVEPOINT slow_query_explain')
+    try:
+        cursor.execute(f'EXPLAIN {statement}', parameters)
+        lines = [row[0] for row in cursor.fetchall()]
+    except Exception:
+        cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+        raise
+    cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+    return lines, [match.group(1) for match in map(_POSTGRESQL_SCAN.search, lines) if match]
+
+def _mysql_plan(cursor, statement, parameters):
+    cursor.execute(f'EXPLAIN {statement}', parameters)
+    columns = [column[0] for column in cursor.description]
+    rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    lines = [' '.join(f'{key}={value}' for key, value in row.items() if value is not None) for row in rows]
+    return lines, [row.get('table') for row in rows if row.get('type') == 'ALL']
+
+EXPLAINERS = {'sqlite': _sqlite_plan, 'postgresql': _postgresql_plan, 'mysql': _mysql_plan}
+
+def explain(dbapi_connection, dialect_name, statement, parameters):
+    """``(plan lines, full scans)`` for one statement, or None when it cannot be explained"""
+    explainer = EXPLAINERS.get(dialect_name)
+    if explainer is None or not statement.lstrip().upper().startswith(EXPLAINABLE):
+        return None
+    cursor = dbapi_connection.cursor()
+    try:
+        return explainer(cursor, statement, parameters)
+    finally:
+        cursor.close()
+
+class SlowQueryLog:
+    """Slow statements aggregated by shape (at most ``maxsize`` shapes; the cheapest are dropped)"""
+
+    def __init__(self, maxsize=500):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.entries = {}
+
+    def record(self, shape, milliseconds, endpoint, caller, parameters):
+        """Add one slow execution; returns True if the shape still needs its plan"""
+        now = datetime.utcnow()
+        with self._lock:
+            entry = self.entries.get(shape)
+            if entry is None:
+                if len(self.entries) >= self.maxsize:
+                    cheapest = min(self.entries, key=lambda key: self.entries[key]['total_ms'])
+                    del self.entries[cheapest]
+                entry = self.entries[shape] = {
+                    'statement': shape, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'endpoints': {},
+                    'callers': {}, 'parameters': None, 'plan': None, 'full_scans': [], 'explained': False,
+                    'first_seen': now, 'last_seen': now,
+                }
+            entry['count'] += 1
+            entry['total_ms'] += milliseconds
+            entry['max_ms'] = max(entry['max_ms'], milliseconds)
+            entry['endpoints'][endpoint] = entry['endpoints'].get(endpoint, 0) + 1
+            if caller:
+                entry['callers'][caller] = entry['callers'].get(caller, 0) + 1
+            entry['parameters'] = parameters
+            entry['last_seen'] = now
+            if entry['explained']:
+                return False
+            entry['explained'] = True  # Claimed by this thread
+            return True
+
+    def set_plan(self, shape, plan, mask_values=False):
+        with self._lock:
+            entry = self.entries.get(shape)
+            if entry is not None and plan is not None:
+                lines, entry['full_scans'] = plan
+                entry['plan'] = [_QUOTED.sub("'?'", line) for line in lines] if mask_values else lines
+
+    def top(self, sort='total_ms', limit=20, full_scans_only=False):
+        """The worst shapes by ``sort`` (total_ms, count, max_ms or avg_ms)"""
+        with self._lock:
+            entries = [dict(entry, endpoints=dict(entry['endpoints']), callers=dict(entry['callers']))
+                       for entry in self.entries.values() if entry['full_scans'] or not full_scans_only]
+        for entry in entries:
+            entry['avg_ms'] = round(entry['total_ms'] / entry['count'], 3)
+            entry['total_ms'] = round(entry['total_ms'], 3)
+            entry['max_ms'] = round(entry['max_ms'], 3)
+            del entry['explained']
+        entries.sort(key=lambda entry: entry[sort], reverse=True)
+        return entries[:limit]
+
+slow_queries = SlowQueryLog()
+_settings = {'threshold': None, 'parameters': False, 'explain': True}
+
+def _format_parameters(parameters):
+    text = repr(parameters)
+    return text if len(text) <= 500 else text[:500] + '...'
+
+# Statement observer
+def _observe_query(conn, statement, parameters, executemany, seconds):
+    milliseconds = seconds * 1000
+    threshold = _settings['threshold']
+    if threshold is None or milliseconds < threshold:
+        return
+
+    endpoint = (request.endpoint or 'unmatched') if has_request_context() else 'background'
+    caller = _caller()
+    shown = _format_parameters(parameters) if _settings['parameters'] else None
+    shape = statement_shape(statement)
+    logger.warning('Slow query %.1f ms in %s at %s: %s; parameters %s',
+                   milliseconds, endpoint, caller, shape, shown)
+    if slow_queries.record(shape, milliseconds, endpoint, caller, shown) and _settings['explain'] and not executemany:
+        try:
+            slow_queries.set_plan(shape, explain(conn.connection.dbapi_connection, conn.dialect.name,
+                                                 statement, parameters), mask_values=not _settings['parameters'])
+        except Exception as e:  # Never fail the query because its plan could not be read
+            logger.info('Could not explain %s: %s', shape, e)
+
+def init_slow_query_log(app):
+    """Time every statement on every engine (unless SLOW_QUERY_LOG_ENABLED is off)"""
+    if not app.config.get('SLOW_QUERY_LOG_ENABLED', True):
+        return
+    _settings['threshold'] = app.config.get('SLOW_QUERY_THRESHOLD_MS', 100)
+    _settings['parameters'] = app.config.get('SLOW_QUERY_LOG_PARAMETERS', False)
+    _settings['explain'] = app.config.get('SLOW_QUERY_EXPLAIN', True)
+    slow_queries.maxsize = app.config.get('SLOW_QUERY_MAX_SHAPES', 500)
+    on_query(_observe_query)
@@ -0,0 +1,111 @@
+"""
+Event-driven low-stock alerts
+
+Every code path that changes Product.stock reports (old, new) levels through
+record_stock_changes(). Threshold crossings are written to StockAlert in the
+caller's transaction, and only once that transaction commits are they handed
+to a background worker that runs the registered notification handlers.
+"""
+
+import logging
+import queue
+import threading
+from datetime import datetime
+from sqlalchemy import event, insert
+from models import db, StockAlert
+
+logger = logging.getLogger(__name__)
+
+LOW_STOCK = 'low_stock'
+OUT_OF_STOCK = 'out_of_stock'
+RESTOCKED = 'restocked'
+
+_PENDING_KEY = 'pending_stock_alerts'
+_handlers = []
+_queue = queue.Queue()
+_worker = None
+_worker_lock = threading.Lock()
+
+def register_alert_handler(handler):
+    """Register ``handler(alerts)`` to be called off-request with committed alerts"""
+    _handlers.append(handler)
+    return handler
+
+def _log_alerts(alerts):
+    for alert in alerts:
+        logger.info("Stock alert %s: product %s (vendor %s) at %s/%s",
+                    alert['kind'], alert['product_id'], alert['vendor_id'],
+                    alert['stock'], alert['min_stock'])
+
+register_alert_handler(_log_alerts)
+
+def detect_crossing(old_stock, new_stock, min_stock, old_min_stock=None):
+    """Alert kind for a stock or threshold change, or None if no threshold was crossed"""
+    old_min_stock = min_stock if old_min_stock is None else old_min_stock
+    was_low, is_low = old_stock <= old_min_stock, new_stock <= min_stock
+    if new_stock == 0 and old_stock > 0:
+        return OUT_OF_STOCK
+    if is_low and not was_low:
+        return LOW_STOCK
+    if was_low and not is_low:
+        return RESTOCKED
+    return None
+
+def record_stock_changes(changes):
+    """Record threshold crossings for ``(product_id, vendor_id, old_stock, new_stock, min_stock)`` tuples.
+
+    A tuple may end with the product's previous min_stock when that changed
+    too, so raising the threshold above the current stock also alerts.
+    Alerts are inserted with one multi-row INSERT inside the current
+    transaction and dispatched to handlers after it commits.
+    """
+    now = datetime.utcnow()
+    alerts = []
+    for product_id, vendor_id, old_stock, new_stock, min_stock, *old_min_stock in changes:
+        kind = detect_crossing(old_stock, new_stock, min_stock, *old_min_stock)
+        if kind:
+            alerts.append({
+                'product_id': product_id,
+                'vendor_id': vendor_id,
+                'kind': kind,
+                'stock': new_stock,
+                'min_stock': min_stock,
+                'created_at': now
+            })
+
+    if alerts:
+        db.session.execute(insert(StockAlert), alerts)
+        db.session.info.setdefault(_PENDING_KEY, []).extend(alerts)
+    return alerts
+
+def _run_worker():
+    while True:
+        alerts = _queue.get()
+        for handler in list(_handlers):
+            try:
+                handler(alerts)
+            except Exception:
+                logger.exception("Stock alert handler %r failed", handler)
+        _queue.task_done()
+
+def _ensure_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run_worker, name='stock-alerts', daemon=True)
+            _worker.start()
+
+@event.listens_for(db.session, 'after_commit')
+def _dispatch_after_commit(session):
+    alerts = session.info.pop(_PENDING_KEY, None)
+    if alerts:
+        _ensure_worker()
+        _queue.put(alerts)
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
+
+def wait_for_alerts():
+    """Block until every queued alert batch has been handled (tests/scripts)"""
+    _queue.join()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Vendor sales buckets
+
+Each checkout must add its line items to one VendorSalesDaily row per vendor
+and day (created by the first order of the day, incremented in SQL by later
+ones), and the vendor timeseries endpoint reads its series from those rows.
+
+    python -m pytest test_analytics.py -q
+"""
+
+import pytest
+from datetime import date, datetime
+from models import db, VendorSalesDaily
+
+def buckets():
+    return {row.vendor_id: (row.day, row.revenue, row.units, row.order_count)
+            for row in VendorSalesDaily.query.all()}
+
+def test_first_order_creates_a_bucket_per_vendor(shop, checkout):
+    first, second = shop.products
+    assert checkout(shop.customers[0], {first: 2, second: 1}).status_code == 201
+
+    today = datetime.utcnow().date()
+    assert buckets() == {
+        shop.vendors[0]: (today, pytest.approx(1800.0), 2, 1),    # 2 x 1000 less 10% commission
+        shop.vendors[1]: (today, pytest.approx(1800.0), 1, 1),    # 1 x 2000 less 10% commission
+    }
+
+def test_later_orders_add_to_the_same_bucket(shop, checkout):
+    first, second = shop.products
+    assert checkout(shop.customers[0], {first: 1}).status_code == 201
+    assert checkout(shop.customers[1], {first: 3, second: 1}).status_code == 201
+
+    assert VendorSalesDaily.query.count() == 2
+    assert buckets()[shop.vendors[0]][1:] == (pytest.approx(3600.0), 4, 2)
+    assert buckets()[shop.vendors[1]][1:] == (pytest.approx(1800.0), 1, 1)
+
+def test_failed_checkout_leaves_buckets_alone(shop, checkout):
+    first, second = shop.products
+    assert checkout(shop.customers[0], {first: 1}).status_code == 201
+    assert checkout(shop.customers[0], {second: 1000}).status_code == 400  # Insufficient stock
+    assert set(buckets()) == {shop.vendors[0]}
+
+def test_timeseries_reads_the_buckets(shop, checkout, client, bearer):
+    customer, product, vendor = shop.customers[0], shop.products[0], shop.vendors[0]
+    assert checkout(customer, {product: 1}).status_code == 201
+    assert checkout(customer, {product: 2}).status_code == 201
+    db.session.add(VendorSalesDaily(vendor_id=vendor, day=date(2024, 1, 3), revenue=500.0, units=5, order_count=1))
+    db.session.commit()
+    headers = bearer(shop.vendor_users[0])
+
+    response = client.get('/api/vendor/analytics/timeseries?granularity=month&from=2024-01-01&to=2024-02-29',
+                          headers=headers)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    body = response.get_json()
+    assert [point['period'] for point in body['series']] == ['2024-01-01', '2024-02-01']
+    assert body['series'][1] == {'period': '2024-02-01', 'revenue': 0.0, 'units': 0, 'orders': 0}
+    assert body['totals'] == {'revenue': 500.0, 'units': 5, 'orders': 1}
+
+    response = client.get('/api/vendor/analytics/timeseries', headers=headers)
+    assert response.get_json()['totals'] == {'revenue': pytest.approx(2700.0), 'units': 3, 'orders': 2}
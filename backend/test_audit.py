@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Buffered admin audit log
+
+Audit's flusher state points at the test app (the background thread is not
+started; tests call flush_audit_log directly), which runs on a SQLite file with
+foreign keys on, so an entry for an admin that does not exist is rejected
+by the database like it would be in production.
+
+    python -m pytest test_audit.py -q
+"""
+
+import pytest
+from conftest import add_user, add_vendor
+from models import db, AdminAction, UserRole, VendorStatus
+import audit
+
+MISSING_ADMIN = 9999
+
+@pytest.fixture
+def app_config(tmp_path):
+    return {'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'audit.db'}"}
+
+@pytest.fixture(autouse=True)
+def buffered(app, monkeypatch):
+    """Buffer entries for ``app`` without starting the flusher thread"""
+    monkeypatch.setitem(audit._state, 'app', app)
+    monkeypatch.setitem(audit._state, 'retries', 1)
+    monkeypatch.setitem(audit._state, 'failures', 0)
+    yield
+    del audit._buffer[:]
+
+@pytest.fixture
+def admin_id(app):
+    admin = add_user('admin', UserRole.ADMIN, is_verified=True)
+    db.session.commit()
+    return admin.id
+
+def written():
+    db.session.expire_all()
+    return [(row.admin_id, row.action_type) for row in AdminAction.query.order_by(AdminAction.id)]
+
+def test_entries_are_buffered_when_the_transaction_commits(admin_id):
+    audit.log_admin_action(admin_id, 'vendor_approval', 1, 'Approved')
+    assert audit._buffer == []
+
+    db.session.commit()
+    assert [entry['action_type'] for entry in audit._buffer] == ['vendor_approval']
+    assert written() == []
+
+    assert audit.flush_audit_log() == 1
+    assert audit._buffer == []
+    assert written() == [(admin_id, 'vendor_approval')]
+
+def test_entries_of_a_rolled_back_transaction_are_dropped(admin_id):
+    audit.log_admin_actions(admin_id, 'product_deactivation', [(1, 'One'), (2, 'Two')])
+    db.session.rollback()
+    db.session.commit()
+
+    assert audit._buffer == []
+    assert audit.flush_audit_log() == 0
+    assert written() == []
+
+def test_critical_entries_commit_with_the_request(admin_id):
+    audit.log_admin_action(admin_id, 'admin_deletion', 2, 'Deleted', critical=True)
+    assert written() == [(admin_id, 'admin_deletion')]  # Pending in this session's transaction
+    db.session.rollback()
+    assert written() == []
+
+    audit.log_admin_action(admin_id, 'admin_deletion', 2, 'Deleted', critical=True)
+    db.session.commit()
+    assert audit._buffer == []
+    assert written() == [(admin_id, 'admin_deletion')]
+
+@pytest.mark.parametrize('in_request', [False, True])
+def test_rejected_batch_is_retried_then_written_row_by_row(admin_id, in_request):
+    audit.log_admin_action(admin_id, 'vendor_approval', 1, 'Good')
+    audit.log_admin_action(MISSING_ADMIN, 'vendor_approval', 2, 'Bad')
+    audit.log_admin_action(admin_id, 'vendor_rejection', 3, 'Good')
+    db.session.commit()
+
+    assert audit.flush_audit_log(in_request=in_request) == 0
+    assert [entry['target_id'] for entry in audit._buffer] == [1, 2, 3]  # Re-queued in order
+    assert written() == []
+
+    assert audit.flush_audit_log(in_request=in_request) == 2
+    assert audit._buffer == []
+    assert audit._state['failures'] == 0
+    assert written() == [(admin_id, 'vendor_approval'), (admin_id, 'vendor_rejection')]
+
+def test_admin_sees_their_own_buffered_actions(admin_id, client, bearer):
+    vendor_id = add_vendor(add_user('vendor', UserRole.VENDOR), 'Pending Shop', VendorStatus.PENDING).id
+    db.session.commit()
+    headers = bearer(admin_id)
+
+    response = client.post(f'/api/admin/vendors/{vendor_id}/approve', json={}, headers=headers)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    assert len(audit._buffer) == 1
+
+    response = client.get('/api/admin/actions', headers=headers)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    assert [action['action_type'] for action in response.get_json()['actions']] == ['vendor_approval']
+    assert audit._buffer == []
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Username/email availability
+
+The Bloom filter answers for names it has never seen; a possible match is
+confirmed with an indexed lower() lookup. A second UserFilter stands in for
+another worker's filter to check that renames made elsewhere reach it.
+
+    python -m pytest test_availability.py -q
+"""
+
+import pytest
+from datetime import datetime
+from sqlalchemy import func
+from availability import UserFilter, is_available, user_filter
+from models import db, User, IdentityChange
+from querybudget import count_queries
+
+@pytest.fixture
+def app_config():
+    return {'AVAILABILITY_REFRESH_INTERVAL': 0}
+
+@pytest.fixture(autouse=True)
+def fresh_filter(app):
+    user_filter.reset()
+
+def test_answers_case_insensitively(shop, client):
+    response = client.get('/api/availability?username=CUSTOMER0&email=Free@Example.com')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['username']['available'] is False
+    assert body['email']['available'] is True
+
+def test_unseen_values_skip_the_database(shop):
+    user_filter.refresh()
+    with count_queries() as queries:
+        assert is_available('username', 'somebody-new')
+    assert not [sql for sql in queries if 'lower(' in sql]  # Only the refresh top-up, never the user lookup
+
+@pytest.mark.parametrize('field', ['username', 'email'])
+def test_confirming_a_match_uses_the_lower_index(shop, field):
+    column = getattr(User, field)
+    query = db.session.query(User.id).filter(func.lower(column) == 'customer0')
+    sql = str(query.statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+    plan = ' '.join(row[-1] for row in db.session.execute(db.text(f'EXPLAIN QUERY PLAN {sql}')))
+    assert f'ix_user_{field}_lower' in plan, plan
+
+def test_renames_in_another_worker_reach_this_filter(shop):
+    other_worker = UserFilter()
+    other_worker.rebuild()
+    assert not other_worker.might_exist('username', 'renamed')
+
+    user = db.session.get(User, shop.customers[0])
+    user.last_login = datetime.utcnow()
+    db.session.commit()
+    assert IdentityChange.query.count() == 0  # Only username/email changes are broadcast
+
+    user.username = 'Renamed'
+    db.session.commit()
+
+    other_worker.refresh()
+    assert other_worker.might_exist('username', 'renamed')
+    assert not is_available('username', 'renamed')
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Vendor bulk stock and price updates
+
+POST /api/vendor/products/bulk-update validates every operation and checks
+that the vendor owns every product before writing anything; a batch either
+applies in full, in one transaction, or not at all. Threshold crossings are
+recorded as StockAlert rows.
+
+    python -m pytest test_bulk_update.py -q
+"""
+
+import pytest
+from conftest import add_product
+from models import db, Product, StockAlert, Vendor
+
+@pytest.fixture
+def products(shop):
+    """Three more products of vendor0, at stock 10 with min_stock 5"""
+    vendor = db.session.get(Vendor, shop.vendors[0])
+    ids = [add_product(vendor, f'Stocked {n}', stock=10, min_stock=5).id for n in range(3)]
+    db.session.commit()
+    return ids
+
+def bulk_update(client, bearer, shop, operations):
+    return client.post('/api/vendor/products/bulk-update', json={'operations': operations},
+                       headers=bearer(shop.vendor_users[0]))
+
+def levels(ids):
+    db.session.expire_all()
+    return {product.id: (product.stock, product.price) for product in Product.query.filter(Product.id.in_(ids))}
+
+def alerts():
+    return sorted((alert.product_id, alert.kind, alert.stock) for alert in StockAlert.query.all())
+
+def test_applies_every_operation(shop, products, client, bearer):
+    first, second, third = products
+    response = bulk_update(client, bearer, shop, [
+        {'product_id': first, 'action': 'increase', 'quantity': 5},
+        {'product_id': second, 'action': 'decrease', 'quantity': 3, 'price': 750},
+        {'product_id': third, 'price': 1.5},
+    ])
+    assert response.status_code == 200, response.get_data(as_text=True)
+    assert response.get_json()['updated'] == 3
+    assert levels(products) == {first: (15, 1000.0), second: (7, 750.0), third: (10, 1.5)}
+
+# Second operation of a batch, given the id of a product the vendor owns
+INVALID_OPERATIONS = {
+    'no product_id': lambda product_id: {'action': 'increase', 'quantity': 1},
+    'bad product_id': lambda product_id: {'product_id': 'x', 'action': 'increase', 'quantity': 1},
+    'no action or price': lambda product_id: {'product_id': product_id},
+    'bad action': lambda product_id: {'product_id': product_id, 'action': 'remove', 'quantity': 1},
+    'negative quantity': lambda product_id: {'product_id': product_id, 'action': 'decrease', 'quantity': -1},
+    'negative price': lambda product_id: {'product_id': product_id, 'price': -5},
+    'bad price': lambda product_id: {'product_id': product_id, 'price': 'cheap'},
+}
+
+@pytest.mark.parametrize('invalid', sorted(INVALID_OPERATIONS))
+def test_one_invalid_operation_rejects_the_batch(shop, products, client, bearer, invalid):
+    first, second, _ = products
+    response = bulk_update(client, bearer, shop, [
+        {'product_id': first, 'action': 'set', 'quantity': 0},
+        INVALID_OPERATIONS[invalid](second),
+    ])
+    assert response.status_code == 400
+    assert response.get_json()['error'].startswith('Operation 1')
+    assert levels([first]) == {first: (10, 1000.0)}
+    assert alerts() == []
+
+def test_duplicate_products_are_rejected(shop, products, client, bearer):
+    first = products[0]
+    response = bulk_update(client, bearer, shop, [
+        {'product_id': first, 'action': 'increase', 'quantity': 1},
+        {'product_id': first, 'price': 10},
+    ])
+    assert response.status_code == 400
+    assert 'duplicate' in response.get_json()['error']
+    assert levels([first])[first] == (10, 1000.0)
+
+def test_products_of_another_vendor_are_rejected_with_nothing_written(shop, products, client, bearer):
+    others = shop.products[1]  # vendor1's product
+    response = bulk_update(client, bearer, shop, [
+        {'product_id': products[0], 'action': 'set', 'quantity': 0},
+        {'product_id': others, 'action': 'set', 'quantity': 0, 'price': 1},
+    ])
+    assert response.status_code == 404
+    assert response.get_json()['product_ids'] == [others]
+    assert levels([products[0], others]) == {products[0]: (10, 1000.0), others: (100, 2000.0)}
+    assert alerts() == []
+
+def test_threshold_crossings_write_stock_alerts(shop, products, client, bearer):
+    low, empty, steady = products
+    response = bulk_update(client, bearer, shop, [
+        {'product_id': low, 'action': 'decrease', 'quantity': 6},     # 10 -> 4, under min_stock 5
+        {'product_id': empty, 'action': 'set', 'quantity': 0},       # 10 -> 0
+        {'product_id': steady, 'action': 'decrease', 'quantity': 4},  # 10 -> 6, still above
+    ])
+    assert response.status_code == 200, response.get_data(as_text=True)
+    assert alerts() == [(low, 'low_stock', 4), (empty, 'out_of_stock', 0)]
+    flags = {product['id']: product['is_low_stock'] for product in response.get_json()['products']}
+    assert flags == {low: True, empty: True, steady: False}
+
+    response = bulk_update(client, bearer, shop, [{'product_id': low, 'action': 'increase', 'quantity': 20}])
+    assert response.status_code == 200
+    assert alerts() == [(low, 'low_stock', 4), (low, 'restocked', 24), (empty, 'out_of_stock', 0)]
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Response compression
+
+Buffered and streamed responses are requested with each Accept-Encoding and
+decoded again; the brotli cases need the optional Brotli package
+(requirements-optional.txt) and are skipped without it.
+
+    python -m pytest test_compression.py -q
+"""
+
+import gzip
+import json
+import pytest
+from flask import Response, jsonify, stream_with_context
+import compression
+
+ROWS = [{'id': i, 'name': f'Product {i}', 'price': 1000.0 + i} for i in range(200)]
+ENCODINGS = ['gzip', pytest.param('br', marks=pytest.mark.skipif(compression.brotli is None,
+                                                                  reason='Brotli is not installed'))]
+
+def decode(encoding, data):
+    return gzip.decompress(data) if encoding == 'gzip' else compression.brotli.decompress(data)
+
+@pytest.fixture
+def client(app):
+    app.add_url_rule('/test/rows', 'rows', lambda: jsonify(ROWS))
+    app.add_url_rule('/test/small', 'small', lambda: jsonify(ROWS[:1]))
+
+    def stream():
+        lines = (json.dumps(row) + '\n' for row in ROWS)
+        return Response(stream_with_context(lines), mimetype='application/x-ndjson')
+    app.add_url_rule('/test/stream', 'stream', stream)
+    compression.compressed_bodies.clear()
+    return app.test_client()
+
+@pytest.mark.parametrize('encoding', ENCODINGS)
+def test_buffered_response_is_compressed(client, encoding):
+    response = client.get('/test/rows', headers={'Accept-Encoding': f'{encoding}, identity'})
+    assert response.headers['Content-Encoding'] == encoding
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert json.loads(decode(encoding, response.get_data())) == ROWS
+
+    again = client.get('/test/rows', headers={'Accept-Encoding': encoding})
+    assert again.get_data() == response.get_data()
+
+@pytest.mark.parametrize('encoding', ENCODINGS)
+def test_streamed_response_is_compressed_chunk_by_chunk(client, encoding):
+    response = client.get('/test/stream', headers={'Accept-Encoding': encoding})
+    assert response.headers['Content-Encoding'] == encoding
+    assert 'Content-Length' not in response.headers
+    chunks = list(response.response)
+    assert len(chunks) > 1  # Flushed per row, not buffered to the end
+    lines = decode(encoding, b''.join(chunks)).decode().splitlines()
+    assert [json.loads(line) for line in lines] == ROWS
+
+@pytest.mark.skipif(compression.brotli is None, reason='Brotli is not installed')
+def test_brotli_is_preferred_over_gzip(client):
+    response = client.get('/test/rows', headers={'Accept-Encoding': 'gzip, deflate, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+
+def test_small_or_unaccepted_bodies_are_sent_as_is(client):
+    assert 'Content-Encoding' not in client.get('/test/small', headers={'Accept-Encoding': 'gzip, br'}).headers
+    response = client.get('/test/rows', headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_json() == ROWS
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Platform counters for the admin dashboard
+
+After signups, a vendor registration and approval, and checkouts through the
+API, the counters and daily rollup they maintained must equal what
+rebuild_platform_stats() recomputes from the source tables. Missing counters
+read as 0 and are only created by init-db.
+
+    python -m pytest test_platform_stats.py -q
+"""
+
+import logging
+import pytest
+from datetime import datetime
+from conftest import PASSWORD
+from models import db, User, Vendor, PlatformStat, PlatformDailyStat
+from platform_stats import (COUNTERS, CUSTOMERS, ORDERS, REVENUE, get_counters, init_platform_stats,
+                            rebuild_platform_stats)
+
+def signup(client, name):
+    response = client.post('/api/signup', json={'username': name, 'email': f'{name}@example.com',
+                                                'password': PASSWORD})
+    assert response.status_code == 201, response.get_data(as_text=True)
+    return User.query.filter_by(username=name).one().id
+
+def stored():
+    """(counters, daily rollup) as they are in the database"""
+    db.session.expire_all()
+    counters = dict(db.session.query(PlatformStat.name, PlatformStat.value).all())
+    daily = {row.day: (row.orders, row.revenue, row.commission) for row in PlatformDailyStat.query.all()}
+    return counters, daily
+
+def test_write_paths_keep_counters_equal_to_a_rebuild(shop, client, bearer, checkout):
+    new_customers = [signup(client, f'new{i}') for i in range(3)]
+    assert checkout(shop.customers[0], {shop.products[0]: 2}).status_code == 201
+    assert checkout(new_customers[0], {shop.products[1]: 1}).status_code == 201
+
+    response = client.post('/api/vendor/register', headers=bearer(new_customers[2]),
+                           json={'business_name': 'New Shop', 'business_address': 'Abuja',
+                                 'business_phone': '0800', 'business_email': 'new-shop@example.com'})
+    assert response.status_code == 201, response.get_data(as_text=True)
+    vendor_id = Vendor.query.filter_by(business_name='New Shop').one().id
+    response = client.post(f'/api/admin/vendors/{vendor_id}/approve', json={}, headers=bearer(shop.admin))
+    assert response.status_code == 200, response.get_data(as_text=True)
+
+    counters, daily = stored()
+    assert counters[CUSTOMERS] == 4  # Two seeded, three signed up, one became a vendor
+    assert counters[ORDERS] == 2
+    assert counters[REVENUE] == pytest.approx(4000.0)
+    assert daily == {datetime.utcnow().date(): (2, pytest.approx(4000.0), pytest.approx(400.0))}
+
+    rebuild_platform_stats()
+    assert stored() == (counters, daily)
+
+def test_dashboard_reads_the_counters(shop, client, bearer, checkout):
+    assert checkout(shop.customers[0], {shop.products[0]: 1}).status_code == 201
+
+    response = client.get('/api/admin/dashboard/stats', headers=bearer(shop.admin))
+    assert response.status_code == 200, response.get_data(as_text=True)
+    body = response.get_json()
+    assert body['summary']['total_users'] == 2
+    assert body['summary']['total_orders'] == body['summary']['recent_orders'] == 1
+    assert body['revenue']['total_revenue'] == pytest.approx(1000.0)
+
+def test_missing_counters_read_as_zero_and_are_not_created(shop, caplog):
+    PlatformStat.query.filter(PlatformStat.name.in_([CUSTOMERS, ORDERS])).delete()
+    db.session.commit()
+
+    with caplog.at_level(logging.WARNING, logger='platform_stats'):
+        counters = get_counters()
+    assert set(counters) == set(COUNTERS)
+    assert counters[CUSTOMERS] == counters[ORDERS] == 0
+    assert 'init-db' in caplog.text
+    assert PlatformStat.query.count() == len(COUNTERS) - 2
+
+def test_init_builds_only_missing_counters(shop, client):
+    assert init_platform_stats() is False
+
+    signup(client, 'new')
+    PlatformStat.query.filter_by(name=ORDERS).delete()
+    db.session.commit()
+    assert init_platform_stats() is True
+    counters, _ = stored()
+    assert set(counters) == set(COUNTERS)
+    assert counters[CUSTOMERS] == 3
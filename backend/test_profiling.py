@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Request profiling
+
+X-Profile tokens are signed with SECRET_KEY, so profiling is only installed
+with a real one; with the fallback key (or PROFILING_ENABLED off, the
+ProductionConfig default) no request is profiled and no token is issued.
+
+    python -m pytest test_profiling.py -q
+"""
+
+import logging
+import os
+import pytest
+import profiling
+from config import FALLBACK_SECRET_KEY, ProductionConfig
+from conftest import build_app
+
+@pytest.fixture
+def app_config(tmp_path):
+    return {'PROFILING_DIR': str(tmp_path)}
+
+def test_token_requests_are_profiled(shop, client, bearer):
+    response = client.post('/api/admin/profiling/token', headers=bearer(shop.admin))
+    assert response.status_code == 200, response.get_data(as_text=True)
+    token = response.get_json()['token']
+
+    response = client.get('/api/products', headers={profiling.HEADER: token})
+    assert response.status_code == 200
+    profile_id = response.headers['X-Profile-Id']
+    assert client.get(f'/api/admin/profiling/profiles/{profile_id}', headers=bearer(shop.admin)).status_code == 200
+
+    assert 'X-Profile-Id' not in client.get('/api/products', headers={profiling.HEADER: token + 'x'}).headers
+
+class TestFallbackSecretKey:
+    @pytest.fixture
+    def app_config(self):
+        return {'SECRET_KEY': FALLBACK_SECRET_KEY}
+
+    def test_profiling_is_not_installed(self, app, shop, client, bearer):
+        assert not profiling.is_installed(app)
+        response = client.post('/api/admin/profiling/token', headers=bearer(shop.admin))
+        assert response.status_code == 503
+
+        forged = profiling.create_token(shop.admin)  # Anyone can sign with the fallback key
+        assert 'X-Profile-Id' not in client.get('/api/products', headers={profiling.HEADER: forged}).headers
+
+    def test_a_warning_is_logged(self, caplog):
+        caplog.set_level(logging.WARNING)
+        build_app(SECRET_KEY=FALLBACK_SECRET_KEY)
+        assert 'Profiling not installed' in caplog.text
+
+@pytest.mark.skipif('PROFILING_ENABLED' in os.environ, reason='PROFILING_ENABLED is set in the environment')
+def test_production_defaults_to_off():
+    assert ProductionConfig.PROFILING_ENABLED is False
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Query budgets for every API route
+
+Each route in routes.py, vendor_routes.py and admin_routes.py is called
+against a seeded in-memory dataset with several vendors, products, orders
+and reviews, and must stay within its query budget and not repeat the same
+statement (an N+1) more than it is allowed to. New routes must be added to
+ROUTES; test_every_route_has_a_budget fails otherwise.
+
+    python -m pytest test_query_budget.py -q
+    python test_query_budget.py          # print current counts per route
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from flask_jwt_extended import create_access_token
+from conftest import add_product, add_user, add_vendor, build_app
+from models import db, ProductImage, ProductReview, Cart, Order, OrderItem, UserRole, VendorStatus, OrderStatus
+from platform_stats import rebuild_platform_stats
+from querybudget import count_queries, raise_on_lazy_load
+from warmup import warmup
+
+VENDORS = 3
+PRODUCTS_PER_VENDOR = 4
+CUSTOMERS = 3
+
+def seed():
+    """Vendors with products, images and reviews; customers with carts and orders"""
+    now = datetime.utcnow()
+    admin = add_user('admin', UserRole.ADMIN, is_verified=True)
+    other_admin = add_user('admin2', UserRole.ADMIN, is_verified=True)
+    pending_user = add_user('pending', UserRole.VENDOR)
+    customers = [add_user(f'customer{i}') for i in range(CUSTOMERS)]
+    vendor_users = [add_user(f'vendor{i}', UserRole.VENDOR) for i in range(VENDORS)]
+
+    vendors = [add_vendor(user, f'Shop {i}', approved_at=now) for i, user in enumerate(vendor_users)]
+    pending = add_vendor(pending_user, 'Pending Shop', VendorStatus.PENDING, business_address='Abuja')
+
+    products = []
+    for vendor in vendors:
+        for n in range(PRODUCTS_PER_VENDOR):
+            product = add_product(vendor, f'{vendor.business_name} item {n}', price=1000.0 + n,
+                                  stock=3 if n == 0 else 50, min_stock=5)
+            db.session.add(ProductImage(product_id=product.id, image_url=f'/img/{vendor.id}-{n}.jpg',
+                                        is_primary=True))
+            products.append(product)
+    db.session.flush()
+
+    for customer in customers:
+        for product in products[:3]:
+            db.session.add(ProductReview(product_id=product.id, user_id=customer.id, rating=4, comment='Nice'))
+        db.session.add(Cart(user_id=customer.id, product_id=products[1].id, quantity=1))
+        for day in range(3):
+            items = [products[day * 2], products[day * 2 + PRODUCTS_PER_VENDOR]]
+            order = Order(user_id=customer.id, order_number=f'SN{customer.id:03d}{day:02d}',
+                          total_amount=sum(p.price for p in items), delivery_fee=0.0,
+                          commission_amount=sum(p.price for p in items) * 0.08,
+                          delivery_address='Lagos', delivery_phone='0800', status=OrderStatus.PENDING,
+                          created_at=now - timedelta(days=day))
+            order.items = [OrderItem(product_id=p.id, vendor_id=p.vendor_id, quantity=1, price=p.price,
+                                     commission_rate=8.0, vendor_amount=p.price * 0.92) for p in items]
+            db.session.add(order)
+    db.session.commit()
+    rebuild_platform_stats()  # Counters as the write paths would have maintained them
+    return {
+        'admin': admin.id, 'other_admin': other_admin.id, 'customer': customers[0].id,
+        'vendor': vendor_users[0].id, 'vendor_id': vendors[0].id, 'vendor2_id': vendors[1].id,
+        'pending_vendor_id': pending.id, 'product': products[1].id, 'other_product': products[-1].id,
+    }
+
+def _new_user(tag):
+    return {'username': f'new-{tag}', 'email': f'new-{tag}@example.com', 'password': 'Password123'}
+
+# (method, url, user, payload, expected status, query budget, allowed repeats)
+# url and payload may be callables taking the seeded ids.
+ROUTES = {
+    # routes.py
+    'api.signup': ('POST', '/api/signup', None, _new_user('signup'), 201, 4, 0),
+    'api.check_availability': ('GET', '/api/availability?username=customer0&email=free@example.com', None, None, 200, 1, 0),
+    'api.login': ('POST', '/api/login', None, {'email': 'customer0@example.com', 'password': 'Password123'}, 200, 4, 0),
+    'api.register_admin': ('POST', '/api/admin/register', 'admin', _new_user('admin'), 201, 3, 0),
+    'api.create_first_admin': ('POST', '/api/admin/create-first', None, _new_user('first'), 400, 1, 0),
+    'api.check_admin_exists': ('GET', '/api/admin/check', None, None, 200, 1, 0),
+    'api.register_vendor': ('POST', '/api/vendor/register', 'customer',
+                            {'business_name': 'New Shop', 'business_address': 'Lagos', 'business_phone': '0800',
+                             'business_email': 'new-shop@example.com'}, 201, 7, 0),
+    'api.get_products': ('GET', '/api/products', None, None, 200, 3, 0),
+    'api.get_product': ('GET', lambda ids: f"/api/products/{ids['product']}", None, None, 200, 3, 0),
+    'api.get_cart': ('GET', '/api/cart', 'customer', None, 200, 2, 0),
+    'api.add_to_cart': ('POST', '/api/cart', 'customer', lambda ids: {'product_id': ids['other_product']}, 200, 3, 0),
+    'api.create_order': ('POST', '/api/orders', 'customer', {'delivery_address': 'Lagos', 'delivery_phone': '0800'}, 201, 13, 0),
+    # admin_routes.py
+    'admin.dashboard_stats': ('GET', '/api/admin/dashboard/stats', 'admin', None, 200, 6, 0),
+    'admin.get_vendors': ('GET', '/api/admin/vendors', 'admin', None, 200, 3, 0),
+    'admin.approve_vendor': ('POST', lambda ids: f"/api/admin/vendors/{ids['pending_vendor_id']}/approve",
+                             'admin', {}, 200, 6, 0),
+    'admin.reject_vendor': ('POST', lambda ids: f"/api/admin/vendors/{ids['pending_vendor_id']}/reject",
+                            'admin', {'reason': 'Incomplete'}, 200, 6, 0),
+    'admin.create_vendor': ('POST', '/api/admin/vendors', 'admin',
+                            dict(_new_user('vendor'), business_name='Admin Shop', business_phone='0800',
+                                 business_address='Lagos'), 201, 7, 0),
+    'admin.suspend_vendor': ('POST', lambda ids: f"/api/admin/vendors/{ids['vendor2_id']}/suspend",
+                             'admin', {'reason': 'Policy'}, 200, 8, 0),
+    'admin.bulk_vendor_action': ('POST', '/api/admin/vendors/bulk/approve', 'admin',
+                                 lambda ids: {'vendor_ids': [ids['pending_vendor_id']]}, 200, 6, 0),
+    'admin.admin_get_products': ('GET', '/api/admin/products', 'admin', None, 200, 3, 0),
+    'admin.deactivate_product': ('POST', lambda ids: f"/api/admin/products/{ids['product']}/deactivate",
+                                 'admin', {}, 200, 5, 0),
+    'admin.bulk_deactivate_products': ('POST', '/api/admin/products/bulk/deactivate', 'admin',
+                                       lambda ids: {'product_ids': [ids['product'], ids['other_product']]}, 200, 5, 0),
+    'admin.admin_get_orders': ('GET', '/api/admin/orders', 'admin', None, 200, 3, 0),
+    'admin.get_admin_actions': ('GET', '/api/admin/actions', 'admin', None, 200, 3, 0),
+    'admin.export_orders': ('GET', '/api/admin/exports/orders', 'admin', None, 200, 2, 0),
+    'admin.export_vendors': ('GET', '/api/admin/exports/vendors', 'admin', None, 200, 2, 0),
+    'admin.export_commissions': ('GET', '/api/admin/exports/commissions', 'admin', None, 200, 2, 0),
+    'admin.update_commission_rate': ('PUT', '/api/admin/settings/commission', 'admin',
+                                     lambda ids: {'vendor_id': ids['vendor_id'], 'commission_rate': 10}, 200, 4, 0),
+    'admin.get_admins': ('GET', '/api/admin/admins', 'admin', None, 200, 2, 0),
+    'admin.create_admin': ('POST', '/api/admin/admins', 'admin', _new_user('admin2'), 201, 4, 0),
+    'admin.delete_admin': ('DELETE', lambda ids: f"/api/admin/admins/{ids['other_admin']}", 'admin', None, 200, 11, 0),
+    'admin.create_profiling_token': ('POST', '/api/admin/profiling/token', 'admin', None, 200, 2, 0),
+    'admin.get_profiles': ('GET', '/api/admin/profiling/profiles', 'admin', None, 200, 1, 0),
+    'admin.get_profile': ('GET', '/api/admin/profiling/profiles/missing', 'admin', None, 404, 1, 0),
+    'admin.sample_stacks': ('POST', '/api/admin/profiling/sample', 'admin', {'seconds': 0.05}, 200, 1, 0),
+    'admin.get_slow_queries': ('GET', '/api/admin/slow-queries', 'admin', None, 200, 1, 0),
+    'admin.reset_slow_queries': ('DELETE', '/api/admin/slow-queries', 'admin', None, 200, 1, 0),
+    # vendor_routes.py
+    'vendor.vendor_dashboard': ('GET', '/api/vendor/dashboard/stats', 'vendor', None, 200, 10, 0),
+    'vendor.vendor_sales_timeseries': ('GET', '/api/vendor/analytics/timeseries', 'vendor', None, 200, 2, 0),
+    'vendor.vendor_get_products': ('GET', '/api/vendor/products', 'vendor', None, 200, 4, 0),
+    'vendor.vendor_create_product': ('POST', '/api/vendor/products', 'vendor',
+                                     {'name': 'Fresh item', 'description': 'New', 'price': 10, 'category': 'home',
+                                      'stock': 5, 'images': [{'url': '/img/fresh.jpg'}]}, 201, 5, 0),
+    'vendor.vendor_update_product': ('PUT', lambda ids: f"/api/vendor/products/{ids['product']}", 'vendor',
+                                     {'price': 1200, 'stock': 2}, 200, 4, 0),
+    'vendor.update_product_stock': ('PUT', lambda ids: f"/api/vendor/products/{ids['product']}/stock", 'vendor',
+                                    {'action': 'decrease', 'quantity': 48}, 200, 5, 0),
+    'vendor.bulk_update_products': ('POST', '/api/vendor/products/bulk-update', 'vendor',
+                                    lambda ids: {'operations': [{'product_id': ids['product'], 'price': 999}]}, 200, 4, 0),
+    'vendor.get_stock_alerts': ('GET', '/api/vendor/stock-alerts', 'vendor', None, 200, 3, 0),
+    'vendor.vendor_get_orders': ('GET', '/api/vendor/orders', 'vendor', None, 200, 4, 0),
+    'vendor.get_vendor_profile_info': ('GET', '/api/vendor/profile', 'vendor', None, 200, 1, 0),
+    'vendor.update_vendor_profile': ('PUT', '/api/vendor/profile', 'vendor', {'business_phone': '0801'}, 200, 2, 0),
+    'vendor.get_withdrawal_history': ('GET', '/api/vendor/withdrawals', 'vendor', None, 200, 1, 0),
+    'vendor.get_payment_methods': ('GET', '/api/vendor/payment-methods', 'vendor', None, 200, 1, 0),
+    'vendor.request_withdrawal': ('POST', '/api/vendor/withdraw', 'vendor',
+                                  {'amount': 1000, 'payment_method_id': 1}, 400, 1, 0),
+}
+
+@pytest.fixture
+def api(app, client, bearer):
+    ids = seed()
+    warmup(app)  # Budgets are for a warmed-up worker, as serve.py runs them
+    headers = {role: bearer(ids[role]) for role in ('admin', 'customer', 'vendor')}
+    return client, ids, headers
+
+def call(client, ids, headers, endpoint):
+    """Run one ROUTES entry; returns (response, QueryLog)"""
+    method, url, user, payload, _, _, _ = ROUTES[endpoint]
+    url = url(ids) if callable(url) else url
+    payload = payload(ids) if callable(payload) else payload
+    with count_queries() as queries:
+        response = client.open(url, method=method, json=payload, headers=headers.get(user, {}))
+        response.get_data()  # Drain streamed responses inside the counter
+    db.session.expire_all()
+    return response, queries
+
+@pytest.mark.parametrize('endpoint', sorted(ROUTES))
+def test_query_budget(api, endpoint):
+    client, ids, headers = api
+    _, _, _, _, status, budget, allowed_repeats = ROUTES[endpoint]
+    response, queries = call(client, ids, headers, endpoint)
+    assert response.status_code == status, response.get_data(as_text=True)
+    assert len(queries) <= budget, f'{endpoint} over budget ({budget})\n{queries.report()}'
+    repeated = {sql: count for sql, count in queries.repeated().items() if count > allowed_repeats}
+    assert not repeated, f'{endpoint} repeats statements (N+1?)\n{queries.report()}'
+
+# Listing routes must eager-load what they serialise
+EAGER_ROUTES = ['api.get_products', 'api.get_product', 'admin.admin_get_products',
+                'vendor.vendor_get_products', 'vendor.vendor_get_orders']
+
+@pytest.mark.parametrize('endpoint', EAGER_ROUTES)
+def test_no_lazy_loads(api, endpoint):
+    client, ids, headers = api
+    with raise_on_lazy_load():
+        response, _ = call(client, ids, headers, endpoint)
+    assert response.status_code == ROUTES[endpoint][4], response.get_data(as_text=True)
+
+def test_every_route_has_a_budget(app):
+    endpoints = {rule.endpoint for rule in app.url_map.iter_rules()
+                 if rule.endpoint.split('.')[0] in ('api', 'admin', 'vendor')}
+    assert endpoints - set(ROUTES) == set(), 'add the new routes to ROUTES'
+    assert set(ROUTES) - endpoints == set(), 'remove routes that no longer exist from ROUTES'
+
+if __name__ == '__main__':
+    app = build_app()
+    for endpoint in sorted(ROUTES):
+        with app.app_context():
+            db.create_all()
+            ids = seed()
+            warmup(app)
+            headers = {role: {'Authorization': f"Bearer {create_access_token(identity=str(ids[role]))}"}
+                       for role in ('admin', 'customer', 'vendor')}
+            response, queries = call(app.test_client(), ids, headers, endpoint)
+            repeats = max(queries.repeated().values(), default=0)
+            print(f"{endpoint:<36} {response.status_code}  {len(queries):>3} queries  max repeat {repeats}")
+            db.session.remove()
+            db.drop_all()
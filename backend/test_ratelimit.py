@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Rate limiting and load shedding
+
+The bucket backends are driven with explicit clocks; the decorator is
+exercised through the real login, search and checkout routes with small
+limits, and the limiter state is reset for each test.
+
+    python -m pytest test_ratelimit.py -q
+"""
+
+import sqlite3
+import time
+import pytest
+from conftest import PASSWORD
+import ratelimit
+from ratelimit import MemoryBackend, SQLiteBackend, client_key, parse_rate
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def backend(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryBackend(sweep_interval=10)
+    return SQLiteBackend(str(tmp_path / 'buckets.db'), sweep_interval=10)
+
+def test_parse_rate():
+    assert parse_rate('10/minute') == (10, 60.0)
+    assert parse_rate('3/30s') == (3, 30.0)
+
+def test_bucket_allows_capacity_then_refills(backend):
+    now = time.time()
+    assert backend.take('k', 2, 60, now) == 0
+    assert backend.take('k', 2, 60, now) == 0
+    assert backend.take('k', 2, 60, now) == pytest.approx(30.0)
+    assert backend.take('other', 2, 60, now) == 0  # Buckets are per key
+    assert backend.take('k', 2, 60, now + 29) == pytest.approx(1.0)
+    assert backend.take('k', 2, 60, now + 60) == 0
+
+def test_refilled_buckets_are_swept(backend):
+    now = time.time()
+    backend.take('idle', 2, 60, now)        # Full again at now + 30
+    backend.take('busy', 1, 60, now + 5)    # Full again at now + 65
+    assert len(backend) == 2
+
+    backend.take('new', 2, 60, now + 31)
+    assert len(backend) == 2  # 'idle' dropped, 'busy' kept
+    assert backend.take('busy', 1, 60, now + 31) > 0
+
+def test_sqlite_backend_replaces_an_old_table(tmp_path):
+    path = str(tmp_path / 'buckets.db')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE rate_bucket (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)')
+    conn.execute("INSERT INTO rate_bucket VALUES ('k', 0, 0)")
+    conn.commit()
+    conn.close()
+
+    backend = SQLiteBackend(path)
+    assert len(backend) == 0
+    assert backend.take('k', 1, 60) == 0
+
+@pytest.fixture
+def app_config():
+    return {
+        'RATELIMIT_ENABLED': True,
+        'RATE_LIMITS': {'login': '2/minute', 'search': '1/minute', 'create_order': '1/minute'},
+        'CONCURRENCY_LIMITS': {'login': 1},
+    }
+
+@pytest.fixture(autouse=True)
+def fresh_limits():
+    """Buckets from an earlier test's app must not count against this one"""
+    ratelimit.reset_after_fork()
+    yield
+    ratelimit.reset_after_fork()
+
+def login(client, address='10.0.0.1'):
+    return client.post('/api/login', json={'email': 'customer0@example.com', 'password': PASSWORD},
+                       environ_base={'REMOTE_ADDR': address})
+
+def test_over_the_rate_gets_429_with_retry_after(shop, client):
+    assert login(client).status_code == 200
+    assert login(client).status_code == 200
+
+    response = login(client)
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '30'
+    assert login(client, address='10.0.0.2').status_code == 200  # Another client has its own bucket
+
+def test_concurrency_budget_sheds_with_503(shop, client, monkeypatch):
+    monkeypatch.setitem(ratelimit._in_flight, 'login', 1)  # Another request is already running
+
+    response = login(client)
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+
+    monkeypatch.setitem(ratelimit._in_flight, 'login', 0)
+    assert login(client).status_code == 200
+    assert ratelimit.in_flight('login') == 0  # Released after the view
+
+def test_only_searches_are_limited(client):
+    assert client.get('/api/products').status_code == 200
+    assert client.get('/api/products').status_code == 200
+    assert client.get('/api/products?search=phone').status_code == 200
+    assert client.get('/api/products?search=phone').status_code == 429
+
+def test_signed_in_users_are_keyed_by_user_not_address(app, shop, client, bearer):
+    first, second = (bearer(user_id) for user_id in shop.customers)
+    with app.test_request_context(headers=first, environ_base={'REMOTE_ADDR': '10.0.0.1'}):
+        assert client_key() == f'u{shop.customers[0]}'
+    with app.test_request_context(headers={'Authorization': 'Bearer not-a-token'},
+                                  environ_base={'REMOTE_ADDR': '10.0.0.1'}):
+        assert client_key() == 'ip:10.0.0.1'
+
+    def order(headers, address):
+        return client.post('/api/orders', json={'delivery_address': 'Lagos', 'delivery_phone': '0800'},
+                           headers=headers, environ_base={'REMOTE_ADDR': address}).status_code
+
+    # Two customers behind one address each get their own checkout allowance
+    assert order(first, '10.0.0.1') == order(second, '10.0.0.1') == 400  # Empty cart, but not limited
+    assert order(first, '10.0.0.9') == 429
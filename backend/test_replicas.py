@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Read-replica routing
+
+A primary and two replicas are stood in by three SQLite files, each seeded
+with one product named after its database, so every response shows which
+database served it. Nothing replicates between the files; lag is simulated
+by registering a probe for the sqlite dialect.
+
+    python -m pytest test_replicas.py -q
+"""
+
+import pytest
+from sqlalchemy.orm import Session
+from conftest import add_product, add_user, add_vendor, build_app
+from models import db, Product, Vendor, UserRole
+import replicas
+
+DATABASES = ('primary', 'replica0', 'replica1')
+
+def seed(engine, name):
+    """Schema plus one vendor and one product called ``name``"""
+    db.metadata.create_all(engine)
+    with Session(engine) as session:
+        vendor = add_vendor(add_user(f'{name}-vendor', UserRole.VENDOR, session=session), f'{name} shop',
+                            session=session)
+        add_product(vendor, name, stock=10, session=session)
+        session.commit()
+
+def product_names():
+    return {'names': [name for (name,) in db.session.query(Product.name).order_by(Product.id)]}
+
+def make_app(tmp_path, replica_count=2):
+    uris = {name: f'sqlite:///{tmp_path / name}.db' for name in DATABASES}
+    app = build_app(SQLALCHEMY_DATABASE_URI=uris['primary'],
+                    SQLALCHEMY_REPLICA_URIS=[uris[f'replica{index}'] for index in range(replica_count)],
+                    REPLICA_LAG_CHECK_INTERVAL=0)
+    with app.app_context():
+        seed(db.engine, 'primary')
+        for index in range(replica_count):
+            seed(app.extensions['replicas'].engines[index], f'replica{index}')
+
+    app.add_url_rule('/test/replica-reads', 'replica_view', replicas.replica_reads(lambda: product_names()))
+    app.add_url_rule('/test/primary-reads', 'primary_view', lambda: product_names())
+
+    def add_then_read():
+        vendor_id = db.session.query(Vendor.id).scalar()
+        db.session.add(Product(vendor_id=vendor_id, name='written', description='New', price=1.0,
+                               category='electronics', stock=1))
+        db.session.commit()
+        return product_names()
+    app.add_url_rule('/test/write', 'write_view', add_then_read, methods=['POST'])
+    app.add_url_rule('/test/read-then-write', 'read_then_write_view', replicas.replica_reads(lambda: product_names()),
+                     methods=['GET', 'POST'])
+    return app
+
+@pytest.fixture
+def client(tmp_path):
+    return make_app(tmp_path).test_client()
+
+@pytest.fixture
+def lag(monkeypatch):
+    """Set the simulated lag (seconds) of each replica by database file name"""
+    lags = {}
+
+    def probe(connection):
+        lag = lags.get(connection.engine.url.database.rsplit('/', 1)[-1][:-3], 0)
+        if isinstance(lag, Exception):
+            raise lag
+        return lag
+    monkeypatch.setitem(replicas.LAG_PROBES, 'sqlite', probe)
+    return lags
+
+def served_by(response):
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return response.get_json()['names'][0]
+
+def test_marked_views_read_from_a_replica(client):
+    assert served_by(client.get('/test/replica-reads')).startswith('replica')
+    products = client.get('/api/products').get_json()['products']
+    assert [product['name'] for product in products] in (['replica0'], ['replica1'])
+
+def test_unmarked_views_read_from_the_primary(client):
+    assert served_by(client.get('/test/primary-reads')) == 'primary'
+
+def test_replicas_are_used_in_turn(client):
+    assert {served_by(client.get('/test/replica-reads')) for _ in range(4)} == {'replica0', 'replica1'}
+
+def test_writes_and_later_reads_in_the_request_use_the_primary(client):
+    assert client.post('/test/write').get_json()['names'] == ['primary', 'written']
+
+def test_client_reads_stick_to_the_primary_after_a_write(client):
+    response = client.post('/test/write')
+    assert replicas.STICKY_COOKIE in response.headers.get('Set-Cookie', '')
+    assert served_by(client.get('/test/replica-reads')) == 'primary'
+
+    client.delete_cookie(replicas.STICKY_COOKIE)
+    assert served_by(client.get('/test/replica-reads')).startswith('replica')
+
+def test_reads_do_not_set_the_sticky_cookie(client):
+    assert 'Set-Cookie' not in client.get('/test/primary-reads').headers
+
+def test_header_forces_the_primary(client):
+    headers = {replicas.ROUTE_HEADER: 'primary'}
+    assert served_by(client.get('/test/replica-reads', headers=headers)) == 'primary'
+
+def test_header_cannot_send_unmarked_views_or_sticky_clients_to_a_replica(client):
+    headers = {replicas.ROUTE_HEADER: 'replica'}
+    assert served_by(client.get('/test/primary-reads', headers=headers)) == 'primary'
+    assert served_by(client.get('/test/replica-reads', headers=headers)).startswith('replica')
+
+    client.post('/test/write')
+    assert served_by(client.get('/test/replica-reads', headers=headers)) == 'primary'
+
+def test_header_cannot_send_unsafe_methods_to_a_replica(client):
+    headers = {replicas.ROUTE_HEADER: 'replica'}
+    assert served_by(client.post('/test/read-then-write', headers=headers)) == 'primary'
+    assert client.post('/test/write', headers=headers).get_json()['names'] == ['primary', 'written']
+    client.delete_cookie(replicas.STICKY_COOKIE)
+    assert served_by(client.get('/test/read-then-write', headers=headers)).startswith('replica')
+
+def test_use_primary_inside_a_replica_request(tmp_path):
+    app = make_app(tmp_path)
+
+    def mixed():
+        replica = product_names()['names'][0]
+        with replicas.use_primary():
+            primary = product_names()['names'][0]
+        return {'names': [replica, primary]}
+    app.add_url_rule('/test/mixed', 'mixed_view', replicas.replica_reads(mixed))
+    replica, primary = app.test_client().get('/test/mixed').get_json()['names']
+    assert replica.startswith('replica') and primary == 'primary'
+
+def test_lagging_replica_is_skipped(client, lag):
+    lag['replica0'] = 60
+    assert {served_by(client.get('/test/replica-reads')) for _ in range(4)} == {'replica1'}
+
+    lag['replica0'] = 0
+    assert {served_by(client.get('/test/replica-reads')) for _ in range(4)} == {'replica0', 'replica1'}
+
+def test_falls_back_to_the_primary_without_a_healthy_replica(client, lag):
+    lag['replica0'] = 60
+    lag['replica1'] = RuntimeError('replica down')
+    assert served_by(client.get('/test/replica-reads')) == 'primary'
+
+def test_without_replicas_everything_uses_the_primary(tmp_path):
+    client = make_app(tmp_path, replica_count=0).test_client()
+    assert served_by(client.get('/test/replica-reads')) == 'primary'
+    assert 'Set-Cookie' not in client.post('/test/write').headers
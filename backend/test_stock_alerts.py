@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Low-stock alerts and listings
+
+A product becomes "low" when its stock falls to its min_stock, either by
+selling down or by the vendor raising min_stock; each crossing writes one
+StockAlert. Low-stock listings cover active products only, matching the
+partial index ix_product_low_stock.
+
+    python -m pytest test_stock_alerts.py -q
+"""
+
+import pytest
+from conftest import add_product
+from models import db, StockAlert, Vendor
+from stock_alerts import LOW_STOCK, OUT_OF_STOCK, RESTOCKED, detect_crossing
+
+@pytest.mark.parametrize('old_stock, new_stock, min_stock, old_min_stock, kind', [
+    (10, 4, 5, None, LOW_STOCK),
+    (10, 0, 5, None, OUT_OF_STOCK),
+    (4, 10, 5, None, RESTOCKED),
+    (10, 6, 5, None, None),
+    (3, 2, 5, None, None),         # Already low
+    (10, 10, 20, 5, LOW_STOCK),    # Threshold raised above the stock
+    (10, 10, 5, 20, RESTOCKED),    # Threshold lowered below it
+    (10, 10, 8, 5, None),
+])
+def test_detect_crossing(old_stock, new_stock, min_stock, old_min_stock, kind):
+    assert detect_crossing(old_stock, new_stock, min_stock, old_min_stock) == kind
+
+def alerts():
+    return [(alert.kind, alert.stock, alert.min_stock) for alert in StockAlert.query.order_by(StockAlert.id)]
+
+def test_raising_min_stock_above_the_stock_alerts(shop, client, bearer):
+    product = shop.products[0]  # Stock 100
+    headers = bearer(shop.vendor_users[0])
+
+    response = client.put(f'/api/vendor/products/{product}', json={'min_stock': 150}, headers=headers)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    assert alerts() == [(LOW_STOCK, 100, 150)]
+
+    response = client.put(f'/api/vendor/products/{product}', json={'min_stock': 50, 'stock': 90}, headers=headers)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    assert alerts() == [(LOW_STOCK, 100, 150), (RESTOCKED, 90, 50)]
+
+def test_admin_low_stock_list_skips_inactive_products(shop, client, bearer):
+    vendor = db.session.get(Vendor, shop.vendors[0])
+    low = add_product(vendor, 'Low', stock=2, min_stock=5).id
+    add_product(vendor, 'Low but hidden', stock=2, min_stock=5, is_active=False)
+    db.session.commit()
+
+    response = client.get('/api/admin/products?low_stock=true', headers=bearer(shop.admin))
+    assert response.status_code == 200, response.get_data(as_text=True)
+    assert [product['id'] for product in response.get_json()['products']] == [low]
@@ -1,47 +1,25 @@
 # Vendor Routes for Multi-vendor Management
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, User, Vendor, Product, ProductImage, Order, OrderItem, UserRole, VendorStatus, OrderStatus
-from datetime import datetime, timedelta
-from sqlalchemy import func, desc
+from models import db, User, Vendor, Product, ProductImage, Order, OrderItem, StockAlert, UserRole, VendorStatus, OrderStatus
+from datetime import date, datetime, timedelta
+from sqlalchemy import func, desc, update, case, bindparam
+from sqlalchemy.orm import joinedload, selectinload
+from analytics import GRANULARITIES, MAX_TIMESERIES_DAYS, vendor_timeseries
+from stock_alerts import record_stock_changes
+from platform_stats import increment
+from auth import vendor_required, current_vendor
+from replicas import replica_reads
+from serializers import VENDOR_PRODUCT
 
 vendor_bp = Blueprint('vendor', __name__)
 
-# Utility function to handle JWT identity
-def get_current_user_id():
-    """Get current user ID from JWT, handling both string and int formats"""
-    user_id = get_jwt_identity()
-    if isinstance(user_id, str):
-        return int(user_id)
-    return user_id
-
-def vendor_required(f):
-    """Decorator to require vendor access"""
-    from functools import wraps
-    @wraps(f)
-    @jwt_required()
-    def decorated_function(*args, **kwargs):
-        current_user_id = get_current_user_id()
-        user = User.query.get(current_user_id)
-        if not user or (user.role != UserRole.VENDOR and user.role != UserRole.ADMIN):
-            return jsonify({'error': 'Vendor access required'}), 403
-        return f(*args, **kwargs)
-    return decorated_function
-
-def get_vendor_profile(user_id):
-    """Helper function to get vendor profile"""
-    user = User.query.get(user_id)
-    if not user or not user.vendor_profile:
-        return None
-    return user.vendor_profile
-
 # Vendor Dashboard
 @vendor_bp.route('/dashboard/stats', methods=['GET'])
+@replica_reads
 @vendor_required
 def vendor_dashboard():
     try:
-        current_user_id = get_jwt_identity()
-        vendor = get_vendor_profile(current_user_id)
+        vendor = current_vendor()
         
         if not vendor:
             return jsonify({'error': 'Vendor profile not found'}), 404
@@ -137,13 +115,55 @@ def vendor_dashboard():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@vendor_bp.route('/analytics/timeseries', methods=['GET'])
+@replica_reads
+@vendor_required
+def vendor_sales_timeseries():
+    """Revenue, units and order counts per day/week/month for charts"""
+    try:
+        vendor = current_vendor()
+
+        if not vendor:
+            return jsonify({'error': 'Vendor profile not found'}), 404
+
+        granularity = request.args.get('granularity', 'day')
+        if granularity not in GRANULARITIES:
+            return jsonify({'error': 'Invalid granularity. Use day, week, or month'}), 400
+
+        try:
+            end = date.fromisoformat(request.args['to']) if request.args.get('to') else datetime.utcnow().date()
+            start = date.fromisoformat(request.args['from']) if request.args.get('from') else end - timedelta(days=29)
+        except ValueError:
+            return jsonify({'error': 'Dates must be in YYYY-MM-DD format'}), 400
+
+        if start > end:
+            return jsonify({'error': 'from must not be after to'}), 400
+        if (end - start).days >= MAX_TIMESERIES_DAYS:
+            return jsonify({'error': f'Date range cannot exceed {MAX_TIMESERIES_DAYS} days'}), 400
+
+        series = vendor_timeseries(vendor.id, granularity, start, end)
+
+        return jsonify({
+            'granularity': granularity,
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'series': series,
+            'totals': {
+                'revenue': round(sum(point['revenue'] for point in series), 2),
+                'units': sum(point['units'] for point in series),
+                'orders': sum(point['orders'] for point in series)
+            }
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # Product Management
 @vendor_bp.route('/products', methods=['GET'])
 @vendor_required
 def vendor_get_products():
     try:
-        current_user_id = get_jwt_identity()
-        vendor = get_vendor_profile(current_user_id)
+        vendor = current_vendor()
         
         if not vendor:
             return jsonify({'error': 'Vendor profile not found'}), 404
@@ -153,7 +173,7 @@ def vendor_get_products():
         category = request.args.get('category')
         is_active = request.args.get('is_active')
         
-        query = Product.query.filter_by(vendor_id=vendor.id)
+        query = VENDOR_PRODUCT.query().filter(Product.vendor_id == vendor.id)
         
         if category:
             query = query.filter(Product.category == category)
@@ -164,32 +184,7 @@ def vendor_get_products():
             page=page, per_page=per_page, error_out=False
         )
         
-        result = []
-        for product in products.items:
-            # Get primary image
-            primary_image = next((img.image_url for img in product.images if img.is_primary), None)
-            if not primary_image and product.images:
-                primary_image = product.images[0].image_url
-            
-            result.append({
-                'id': product.id,
-                'name': product.name,
-                'description': product.description,
-                'price': product.price,
-                'category': product.category,
-                'subcategory': product.subcategory,
-                'brand': product.brand,
-                'stock': product.stock,
-                'min_stock': product.min_stock,
-                'is_active': product.is_active,
-                'featured': product.featured,
-                'rating': product.rating,
-                'review_count': product.review_count,
-                'image_url': primary_image or f'https://picsum.photos/400/300?random={product.id}',
-                'is_low_stock': product.stock <= product.min_stock,
-                'created_at': product.created_at.isoformat(),
-                'updated_at': product.updated_at.isoformat()
-            })
+        result = VENDOR_PRODUCT.many(products.items)
         
         return jsonify({
             'products': result,
@@ -208,8 +203,7 @@ def vendor_get_products():
 @vendor_required
 def vendor_create_product():
     try:
-        current_user_id = get_jwt_identity()
-        vendor = get_vendor_profile(current_user_id)
+        vendor = current_vendor()
         
         if not vendor:
             return jsonify({'error': 'Vendor profile not found'}), 404
@@ -242,6 +236,7 @@ def vendor_create_product():
         
         db.session.add(product)
         db.session.flush()  # Get product ID
+        increment(products=1, products_active=1 if product.is_active else 0)
         
         # Add images if provided
         images = data.get('images', [])
@@ -284,8 +279,7 @@ def vendor_create_product():
 @vendor_required
 def vendor_update_product(product_id):
     try:
-        current_user_id = get_jwt_identity()
-        vendor = get_vendor_profile(current_user_id)
+        vendor = current_vendor()
         
         if not vendor:
             return jsonify({'error': 'Vendor profile not found'}), 404
@@ -295,6 +289,8 @@ def vendor_update_product(product_id):
             return jsonify({'error': 'Product not found'}), 404
         
         data = request.get_json()
+        old_stock, old_min_stock = product.stock, product.min_stock
+        was_active = product.is_active
         
         # Update product fields
         if 'name' in data:
@@ -321,6 +317,9 @@ def vendor_update_product(product_id):
             product.is_active = bool(data['is_active'])
         
         product.updated_at = datetime.utcnow()
+        record_stock_changes([(product.id, vendor.id, old_stock, product.stock, product.min_stock, old_min_stock)])
+        if product.is_active != was_active:
+            increment(products_active=1 if product.is_active else -1)
         
         db.session.commit()
         
@@ -334,8 +333,7 @@ def vendor_update_product(product_id):
 @vendor_required
 def update_product_stock(product_id):
     try:
-        current_user_id = get_jwt_identity()
-        vendor = get_vendor_profile(current_user_id)
+        vendor = current_vendor()
         
         if not vendor:
             return jsonify({'error': 'Vendor profile not found'}), 404
@@ -347,6 +345,7 @@ def update_product_stock(product_id):
         data = request.get_json()
         action = data.get('action')  # 'increase', 'decrease', 'set'
         quantity = data.get('quantity', 0)
+        old_stock = product.stock
         
         if action == 'increase':
             product.stock += quantity
@@ -358,6 +357,7 @@ def update_product_stock(product_id):
             return jsonify({'error': 'Invalid action. Use increase, decrease, or set'}), 400
         
         product.updated_at = datetime.utcnow()
+        record_stock_changes([(product.id, vendor.id, old_stock, product.stock, product.min_stock)])
         db.session.commit()
         
         return jsonify({
@@ -366,18 +366,192 @@ def update_product_stock(product_id):
             'is_low_stock': product.stock <= product.min_stock,
             'out_of_stock': product.stock == 0
         }), 200
-        
+
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+MAX_BULK_OPERATIONS = 1000
+
+def _stock_update_statements(now):
+    """Set-based UPDATE statements for bulk stock/price changes, keyed by action"""
+    product = Product.__table__
+    by_id = product.c.id == bindparam('b_id')
+    decreased = product.c.stock - bindparam('b_quantity')
+    return {
+        'increase': update(product).where(by_id).values(
+            stock=product.c.stock + bindparam('b_quantity'), updated_at=now
+        ),
+        'decrease': update(product).where(by_id).values(
+            stock=case((decreased < 0, 0), else_=decreased), updated_at=now
+        ),
+        'set': update(product).where(by_id).values(
+            stock=bindparam('b_quantity'), updated_at=now
+        ),
+        'price': update(product).where(by_id).values(
+            price=bindparam('b_price'), updated_at=now
+        ),
+    }
+
+@vendor_bp.route('/products/bulk-update', methods=['POST'])
+@vendor_required
+def bulk_update_products():
+    """Apply a batch of stock/price operations to the vendor's products in one transaction"""
+    try:
+        vendor = current_vendor()
+
+        if not vendor:
+            return jsonify({'error': 'Vendor profile not found'}), 404
+
+        data = request.get_json() or {}
+        operations = data.get('operations')
+
+        if not isinstance(operations, list) or not operations:
+            return jsonify({'error': 'operations must be a non-empty list'}), 400
+        if len(operations) > MAX_BULK_OPERATIONS:
+            return jsonify({'error': f'At most {MAX_BULK_OPERATIONS} operations per request'}), 400
+
+        # Validate every operation before touching the database
+        params = {'increase': [], 'decrease': [], 'set': [], 'price': []}
+        product_ids = []
+        seen = set()
+        for index, op in enumerate(operations):
+            if not isinstance(op, dict) or not op.get('product_id'):
+                return jsonify({'error': f'Operation {index}: product_id is required'}), 400
+            try:
+                product_id = int(op['product_id'])
+            except (TypeError, ValueError):
+                return jsonify({'error': f'Operation {index}: invalid product_id'}), 400
+            if product_id in seen:
+                return jsonify({'error': f'Operation {index}: duplicate product_id {product_id}'}), 400
+
+            action = op.get('action')
+            if action is None and 'price' not in op:
+                return jsonify({'error': f'Operation {index}: action or price is required'}), 400
+
+            if action is not None:
+                if action not in ('increase', 'decrease', 'set'):
+                    return jsonify({'error': f'Operation {index}: invalid action. Use increase, decrease, or set'}), 400
+                try:
+                    quantity = int(op.get('quantity', 0))
+                except (TypeError, ValueError):
+                    return jsonify({'error': f'Operation {index}: invalid quantity'}), 400
+                if quantity < 0:
+                    return jsonify({'error': f'Operation {index}: quantity cannot be negative'}), 400
+                params[action].append({'b_id': product_id, 'b_quantity': quantity})
+
+            if 'price' in op:
+                try:
+                    price = float(op['price'])
+                except (TypeError, ValueError):
+                    return jsonify({'error': f'Operation {index}: invalid price'}), 400
+                if price < 0:
+                    return jsonify({'error': f'Operation {index}: price cannot be negative'}), 400
+                params['price'].append({'b_id': product_id, 'b_price': price})
+
+            product_ids.append(product_id)
+            seen.add(product_id)
+
+        # Verify ownership of every product with a single query
+        old_stock = dict(db.session.query(Product.id, Product.stock).filter(
+            Product.vendor_id == vendor.id,
+            Product.id.in_(product_ids)
+        ).all())
+        missing = [product_id for product_id in product_ids if product_id not in old_stock]
+        if missing:
+            return jsonify({'error': 'Products not found', 'product_ids': missing}), 404
+
+        # One executemany per statement shape, all inside the same transaction
+        statements = _stock_update_statements(datetime.utcnow())
+        for key, rows in params.items():
+            if rows:
+                db.session.execute(statements[key], rows)
+
+        updated = db.session.query(
+            Product.id, Product.stock, Product.min_stock, Product.price
+        ).filter(Product.id.in_(product_ids)).all()
+
+        record_stock_changes([
+            (row.id, vendor.id, old_stock[row.id], row.stock, row.min_stock) for row in updated
+        ])
+        db.session.commit()
+
+        return jsonify({
+            'message': 'Products updated successfully',
+            'updated': len(updated),
+            'products': [
+                {
+                    'id': row.id,
+                    'new_stock': row.stock,
+                    'price': row.price,
+                    'is_low_stock': row.stock <= row.min_stock,
+                    'out_of_stock': row.stock == 0
+                } for row in updated
+            ]
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@vendor_bp.route('/stock-alerts', methods=['GET'])
+@vendor_required
+def get_stock_alerts():
+    """Recent low-stock alerts plus the current low-stock list"""
+    try:
+        vendor = current_vendor()
+
+        if not vendor:
+            return jsonify({'error': 'Vendor profile not found'}), 404
+
+        limit = min(request.args.get('limit', 50, type=int), 200)
+
+        alerts = db.session.query(
+            StockAlert.id, StockAlert.product_id, StockAlert.kind,
+            StockAlert.stock, StockAlert.min_stock, StockAlert.created_at
+        ).filter(
+            StockAlert.vendor_id == vendor.id
+        ).order_by(StockAlert.created_at.desc(), StockAlert.id.desc()).limit(limit).all()
+
+        # Same predicate as ix_product_low_stock so only the partial index is read
+        low_stock = db.session.query(
+            Product.id, Product.stock, Product.min_stock
+        ).filter(
+            Product.vendor_id == vendor.id,
+            Product.is_active == True,
+            Product.stock <= Product.min_stock
+        ).order_by(Product.stock).all()
+
+        return jsonify({
+            'alerts': [
+                {
+                    'id': alert.id,
+                    'product_id': alert.product_id,
+                    'kind': alert.kind,
+                    'stock': alert.stock,
+                    'min_stock': alert.min_stock,
+                    'created_at': alert.created_at.isoformat()
+                } for alert in alerts
+            ],
+            'low_stock': [
+                {
+                    'product_id': row.id,
+                    'stock': row.stock,
+                    'min_stock': row.min_stock,
+                    'out_of_stock': row.stock == 0
+                } for row in low_stock
+            ]
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # Order Management
 @vendor_bp.route('/orders', methods=['GET'])
 @vendor_required
 def vendor_get_orders():
     try:
-        current_user_id = get_jwt_identity()
-        vendor = get_vendor_profile(current_user_id)
+        vendor = current_vendor()
         
         if not vendor:
             return jsonify({'error': 'Vendor profile not found'}), 404
@@ -386,9 +560,11 @@ def vendor_get_orders():
         per_page = request.args.get('per_page', 20, type=int)
         status = request.args.get('status')
         
-        query = db.session.query(Order).join(OrderItem).filter(
-            OrderItem.vendor_id == vendor.id
-        )
+        # EXISTS keeps one row per order however many of its items are this vendor's
+        query = Order.query.options(
+            joinedload(Order.customer),
+            selectinload(Order.items).joinedload(OrderItem.product)
+        ).filter(Order.items.any(OrderItem.vendor_id == vendor.id))
         
         if status:
             try:
@@ -447,8 +623,7 @@ def vendor_get_orders():
 @vendor_required
 def get_vendor_profile_info():
     try:
-        current_user_id = get_jwt_identity()
-        vendor = get_vendor_profile(current_user_id)
+        vendor = current_vendor()
         
         if not vendor:
             return jsonify({'error': 'Vendor profile not found'}), 404
@@ -478,8 +653,7 @@ def get_vendor_profile_info():
 @vendor_required
 def update_vendor_profile():
     try:
-        current_user_id = get_jwt_identity()
-        vendor = get_vendor_profile(current_user_id)
+        vendor = current_vendor()
         
         if not vendor:
             return jsonify({'error': 'Vendor profile not found'}), 404
@@ -511,8 +685,7 @@ def update_vendor_profile():
 @vendor_required
 def get_withdrawal_history():
     try:
-        current_user_id = get_jwt_identity()
-        vendor = get_vendor_profile(current_user_id)
+        vendor = current_vendor()
         
         if not vendor:
             return jsonify({'error': 'Vendor profile not found'}), 404
@@ -530,8 +703,7 @@ def get_withdrawal_history():
 @vendor_required
 def get_payment_methods():
     try:
-        current_user_id = get_jwt_identity()
-        vendor = get_vendor_profile(current_user_id)
+        vendor = current_vendor()
         
         if not vendor:
             return jsonify({'error': 'Vendor profile not found'}), 404
@@ -555,8 +727,7 @@ def get_payment_methods():
 @vendor_required
 def request_withdrawal():
     try:
-        current_user_id = get_jwt_identity()
-        vendor = get_vendor_profile(current_user_id)
+        vendor = current_vendor()
         
         if not vendor:
             return jsonify({'error': 'Vendor profile not found'}), 404
@@ -0,0 +1,42 @@
+"""
+Worker warmup
+
+warmup(app) does the work a worker would otherwise do on its first requests,
+before the server hands it any traffic:
+
+- configures the ORM mappers (normally done on first query)
+- opens a pooled database connection, running the connect hooks and PRAGMAs
+- builds the username/email availability filter
+- compiles the URL map and loads the password hashing module
+
+serve.py calls it from gunicorn's post_worker_init hook and before waitress
+starts serving. WARMUP_ENABLED = False turns it off. A failure is logged, not
+raised: a worker that could not warm up still serves, just slower at first.
+"""
+
+import time
+from sqlalchemy import text
+from sqlalchemy.orm import configure_mappers
+from models import db
+
+def warmup(app):
+    """Prime per-process caches; returns the seconds taken (None when disabled)"""
+    if not app.config.get('WARMUP_ENABLED', True):
+        return None
+    started = time.perf_counter()
+    try:
+        configure_mappers()
+        with app.app_context():
+            db.session.execute(text('SELECT 1'))
+
+            from availability import user_filter
+            user_filter.rebuild()
+            db.session.remove()
+
+        with app.test_request_context('/'):
+            pass  # Binding the adapter compiles the URL map
+
+        import bcrypt  # noqa: F401 - passwords imports it on first use
+    except Exception as e:
+        app.logger.warning('Warmup failed: %s', e)
+    return time.perf_counter() - started
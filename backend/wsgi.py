@@ -0,0 +1,16 @@
+"""
+WSGI entry point for production servers
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+    python serve.py
+
+FLASK_CONFIG selects the config (default: production). The production config
+does not create tables on startup; run this once per deploy instead:
+
+    flask --app wsgi init-db
+"""
+
+import os
+from app import create_app
+
+app = create_app(os.getenv('FLASK_CONFIG', 'production'))